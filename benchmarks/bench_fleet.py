@@ -0,0 +1,68 @@
+"""Scrape a fleet of fake nodes with FleetDashboard and report cycle time and memory per node.
+
+Usage: python -m benchmarks.bench_fleet --nodes 100 300 --payload-kb 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks.fake_node import FakeNodeServer
+
+
+async def run(nodes: int, payload_kb: int, concurrency: int, cycles: int, port: int, compress: bool):
+    from src.aio_http_client import AioHttpCalls
+    from src.fleet_dashboard import FleetDashboard
+
+    # The fake nodes share this process, so their compression would be timed too. It is off unless asked for.
+    server = FakeNodeServer(nodes=nodes, payload_bytes=payload_kb * 1000, port=port, compress=compress, etag=False)
+    await server.start()
+    try:
+        async with AioHttpCalls(connector_limit=concurrency, conditional=False) as session:
+            dashboard = FleetDashboard(
+                session=session,
+                nodes=server.fleet(),
+                refresh_per_second=1,
+                refresh_metrics_rate=0,
+                refresh_node_rpc_rate=0,
+                concurrency=concurrency,
+            )
+            await dashboard.poll_status()
+
+            tracemalloc.start()
+            baseline, _ = tracemalloc.get_traced_memory()
+            timings = []
+            for _ in range(cycles):
+                started = time.perf_counter()
+                await dashboard.poll_metrics()
+                timings.append(time.perf_counter() - started)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            dashboard.parser.close()
+
+            failed = sum(1 for node in dashboard.nodes if node.error)
+            print(
+                f"{nodes:>6} {min(timings) * 1000:>10.0f} {sum(timings) / len(timings) * 1000:>10.0f} "
+                f"{(current - baseline) / nodes / 1024:>12.2f} {(peak - baseline) / 1024 / 1024:>10.1f} {failed:>7}"
+            )
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--payload-kb", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--port", type=int, default=9300)
+    parser.add_argument("--compression", action="store_true", help="Let the fake nodes gzip/deflate their responses")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>6} {'best ms':>10} {'mean ms':>10} {'KiB/node':>12} {'peak MiB':>10} {'failed':>7}")
+    for nodes in args.nodes:
+        asyncio.run(run(nodes, args.payload_kb, args.concurrency, args.cycles, args.port, args.compression))
+
+
+if __name__ == "__main__":
+    main()
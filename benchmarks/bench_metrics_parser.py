@@ -0,0 +1,75 @@
+"""Compare the compiled extraction plan against the previous per-getter regex scans.
+
+Usage: python -m benchmarks.bench_metrics_parser [--sizes-mb 1 5 10] [--repeat 7]
+"""
+import argparse
+import re
+import time
+
+from benchmarks.payloads import generate_metrics_payload
+from src.metrics_parser import StorageMetrics
+
+# The getters as they were before MetricsTable: one re.search over the whole body each, by snapshot field.
+LEGACY_PATTERNS = {
+    "chain": r'chain_identifier="([^"]+)"',
+    "version": r'walrus_build_info\{version="([^"]+)"\}',
+    "uptime": r"uptime\{[^}]*\}\s+(\d+)",
+    "workers_num": r"checkpoint_downloader_num_workers\s+(\d+)",
+    "total_downloaded_checkpoints": r"event_processor_total_downloaded_checkpoints\s+(\d+)",
+    "pending_events": r'walrus_event_cursor_progress\{state="pending"\}\s+(\d+)',
+    "persisted_events": r'walrus_event_cursor_progress\{state="persisted"\}\s+(\d+)',
+    "highest_finished_event": r'walrus_event_cursor_progress\{state="highest_finished"\}\s+(\d+)',
+    "confirmations_issued_total": r"walrus_storage_confirmations_issued_total\s+(\d+)",
+    "latest_downloaded_checkpoint": r"event_processor_latest_downloaded_checkpoint\s+(\d+)",
+    "checkpoint_downloader_lag": r"checkpoint_downloader_checkpoint_lag\s+(\d+)",
+    "recover_blob_backlog_in_progress": r'walrus_recover_blob_backlog\{state="in-progress"\}\s+(\d+)',
+    "recover_blob_backlog_queued": r'walrus_recover_blob_backlog\{state="queued"\}\s+(\d+)',
+}
+
+
+def legacy_extract(text: str) -> list:
+    results = []
+    for field in StorageMetrics.PLAN.fields:
+        match = re.search(LEGACY_PATTERNS[field], text)
+        results.append(match.group(1) if match else None)
+    return results
+
+
+def table_extract(text: str) -> list:
+    values = StorageMetrics.PLAN.extract(text)
+    return [values[field] for field in StorageMetrics.PLAN.fields]
+
+
+def best_of(func, text: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'lines':>8} {'legacy ms':>10} {'table ms':>10} {'speedup':>8}")
+    for size_mb in args.sizes_mb:
+        text = generate_metrics_payload(size_bytes=int(size_mb * 1_000_000))
+        legacy = [str(value) if value is not None else None for value in legacy_extract(text)]
+        table = [str(value) if value is not None else None for value in table_extract(text)]
+        if legacy != table:
+            raise SystemExit(f"Extraction mismatch:\n legacy={legacy}\n table={table}")
+
+        legacy_time = best_of(legacy_extract, text, args.repeat)
+        table_time = best_of(table_extract, text, args.repeat)
+        print(
+            f"{size_mb:>6.1f}MB {text.count(chr(10)):>8} {legacy_time * 1000:>10.1f} "
+            f"{table_time * 1000:>10.1f} {legacy_time / table_time:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
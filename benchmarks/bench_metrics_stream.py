@@ -0,0 +1,100 @@
+"""Peak memory and time of one scrape: whole /metrics body versus the streaming line filter.
+
+First checks that the line filter keeps every wanted line wherever the chunks of a body end.
+
+Usage: python -m benchmarks.bench_metrics_stream [--sizes-kb 200 1000 5000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+
+
+async def scrape(session, url: str, streamed: bool) -> tuple:
+    from src.metrics_parser import MetricsLineFilter, StorageMetrics
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    line_filter = MetricsLineFilter(StorageMetrics.SCRAPE_NAMES) if streamed else None
+    text = await session.get_storage_metrics(url, line_filter=line_filter)
+    snapshot = StorageMetrics.snapshot(text)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, snapshot
+
+
+def check_chunk_boundaries(size_kb: int, chunk_sizes) -> int:
+    """Feed the body through the line filter split at every chunk size, exit when a snapshot differs from the full parse."""
+    from benchmarks.payloads import generate_metrics_payload
+    from src.metrics_parser import MetricsLineFilter, StorageMetrics
+
+    body = generate_metrics_payload(size_bytes=size_kb * 1000, tick=1).encode()
+    expected = StorageMetrics.PLAN.extract(body.decode())
+    for chunk_size in chunk_sizes:
+        line_filter = MetricsLineFilter(StorageMetrics.SCRAPE_NAMES)
+        for offset in range(0, len(body), chunk_size):
+            if line_filter.feed(body[offset:offset + chunk_size]):
+                break
+        if StorageMetrics.PLAN.extract(line_filter.result().decode()) != expected:
+            raise SystemExit(f"{size_kb} KB body split in {chunk_size} B chunks: the line filter dropped wanted lines")
+    return len(chunk_sizes)
+
+
+async def start_fake_node(size_kb: int, port: int, compress: bool):
+    # A separate process, so building the response bodies is not traced or timed with the scrape.
+    command = [sys.executable, "-m", "benchmarks.fake_node", "--payload-kb", str(size_kb), "--port", str(port), "--no-etag"]
+    if not compress:
+        command.append("--no-compression")
+    process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+    await process.stdout.readline()  # "Serving ..." once the server is listening
+    return process
+
+
+async def run(size_kb: int, repeat: int, port: int, compress: bool):
+    from src.aio_http_client import AioHttpCalls
+
+    server = await start_fake_node(size_kb, port, compress)
+    try:
+        async with AioHttpCalls(conditional=False) as session:
+            url = f"http://127.0.0.1:{port}/node/0/metrics"
+            results = {}
+            for streamed in (False, True):
+                runs = [await scrape(session, url, streamed) for _ in range(repeat)]
+                results[streamed] = (min(run[0] for run in runs), max(run[1] for run in runs), runs[-1][2])
+            full, stream = results[False], results[True]
+            if full[2].pending_events is None or full[2].chain != stream[2].chain:
+                raise SystemExit("Streamed and full scrapes disagree")
+            print(
+                f"{size_kb:>8} {full[0] * 1000:>9.1f} {stream[0] * 1000:>9.1f} "
+                f"{full[1] / 1024:>11.0f} {stream[1] / 1024:>11.0f}"
+            )
+    finally:
+        server.terminate()
+        await server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=9300)
+    parser.add_argument("--compression", action="store_true", help="Let the fake node gzip/deflate its responses")
+    args = parser.parse_args()
+
+    from src.aio_http_client import AioHttpCalls
+
+    # The client's read size, and sizes with a prime step so chunk ends land on every kind of line.
+    chunk_sizes = sorted({AioHttpCalls().chunk_size, *range(1024, 64 * 1024, 1021)})
+    for size_kb in args.sizes_kb:
+        check_chunk_boundaries(size_kb, chunk_sizes)
+    print(f"Line filter matches the full parse at {len(chunk_sizes)} chunk sizes")
+
+    print(f"{'size KB':>8} {'full ms':>9} {'stream ms':>9} {'full KiB':>11} {'stream KiB':>11}")
+    for size_kb in args.sizes_kb:
+        asyncio.run(run(size_kb, args.repeat, args.port, args.compression))
+
+
+if __name__ == "__main__":
+    main()
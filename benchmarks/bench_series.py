@@ -0,0 +1,97 @@
+"""Compare seven deques of Python ints against the ColumnarRingBuffer used for graph series.
+
+Reports memory per scrape (all seven series), append time per scrape and the
+time to hand the last ``--graph-size`` values of one series to the chart code.
+
+Usage: python -m benchmarks.bench_series [--rows 50 1800 43200] [--graph-size 50]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from collections import deque
+
+from src.series import ColumnarRingBuffer
+
+FIELDS = (
+    "latest_downloaded_checkpoint",
+    "confirmations_issued_total",
+    "checkpoint_downloader_lag",
+    "persisted_events",
+    "pending_events",
+    "highest_finished_event",
+    "recover_blob_backlog_queued",
+)
+
+
+def scrape_values(rows: int) -> list:
+    # Raw tokens as scraped, every fill parses its own ints like a real scrape does.
+    rng = random.Random(0)
+    base = {field: rng.randint(10 ** 6, 10 ** 9) for field in FIELDS}
+    return [{field: str(value + row * rng.randint(0, 50)) for field, value in base.items()} for row in range(rows)]
+
+
+def fill_deques(rows: list, capacity: int) -> dict:
+    series = {field: deque(maxlen=capacity) for field in FIELDS}
+    for values in rows:
+        for field in FIELDS:
+            series[field].append(int(values[field]))
+    return series
+
+
+def fill_columns(rows: list, capacity: int) -> ColumnarRingBuffer:
+    series = ColumnarRingBuffer(FIELDS, capacity)
+    timestamp = time.time()
+    for index, values in enumerate(rows):
+        series.append(timestamp + index * 2, {field: int(values[field]) for field in FIELDS})
+    return series
+
+
+def measure(fill, rows: list, capacity: int) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    series = fill(rows, capacity)
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return series, current, elapsed
+
+
+def best_of(func, repeat: int = 200) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 1800, 43200], help="Scrapes kept per series")
+    parser.add_argument("--graph-size", type=int, default=50)
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>7} {'deque B/row':>12} {'ring B/row':>11} {'deque us/row':>13} {'ring us/row':>12} "
+        f"{'deque view us':>14} {'ring view us':>13}"
+    )
+    for capacity in args.rows:
+        rows = scrape_values(capacity)
+        deques, deque_bytes, deque_time = measure(fill_deques, rows, capacity)
+        ring, ring_bytes, ring_time = measure(fill_columns, rows, capacity)
+        if [float(value) for value in list(deques[FIELDS[0]])[-args.graph_size:]] != list(ring.window(FIELDS[0], args.graph_size)):
+            raise SystemExit("Deque and ring buffer disagree")
+
+        # What the live graph needs every time a chart is drawn.
+        deque_view = best_of(lambda: list(deques[FIELDS[0]])[-args.graph_size:])
+        ring_view = best_of(lambda: ring.window(FIELDS[0], args.graph_size))
+        print(
+            f"{capacity:>7} {deque_bytes / capacity:>12.0f} {ring_bytes / capacity:>11.0f} "
+            f"{deque_time / capacity * 1e6:>13.2f} {ring_time / capacity * 1e6:>12.2f} "
+            f"{deque_view * 1e6:>14.2f} {ring_view * 1e6:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
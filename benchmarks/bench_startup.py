@@ -0,0 +1,85 @@
+"""Time from launching main.py to the first frame rendered with node data.
+
+A fake node is served from a separate process, optionally with every response
+delayed to look like a node across the network. main.py is started fresh for
+every run and the time until it logs its first scrape-to-render latency (the
+first frame that shows a scrape) is measured from here, interpreter start,
+imports and UI construction included.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--latency-ms 100] [--app-dir path/to/other/checkout]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+FIRST_FRAME_MARKER = "Scrape to render latency"
+
+
+def start_fake_node(port: int, payload_kb: int, latency_ms: float) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_node", "--port", str(port), "--payload-kb", str(payload_kb),
+            "--latency-ms", str(latency_ms), "--no-etag",
+        ],
+        stdout=subprocess.PIPE,
+    )
+    process.stdout.readline()  # "Serving ..." once the server is listening
+    return process
+
+
+def first_frame(app_dir: str, port: int, timeout: float) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "dashboard.log")
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [
+                sys.executable, "main.py",
+                "--storage-metrics-url", f"http://127.0.0.1:{port}/node/0/metrics",
+                "--storage-rpc-url", f"http://127.0.0.1:{port}/node/0",
+                "--logs-path", log_path,
+            ],
+            cwd=app_dir,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while time.perf_counter() - started < timeout:
+                if os.path.exists(log_path):
+                    with open(log_path, encoding="utf-8") as log_file:
+                        if FIRST_FRAME_MARKER in log_file.read():
+                            return time.perf_counter() - started
+                time.sleep(0.002)
+            raise SystemExit(f"No frame with node data within {timeout} s")
+        finally:
+            process.kill()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0, 100, 300], help="Response delay of the fake node")
+    parser.add_argument("--payload-kb", type=int, default=200)
+    parser.add_argument("--port", type=int, default=9380)
+    parser.add_argument("--timeout", type=float, default=15)
+    parser.add_argument("--app-dir", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), help="Checkout whose main.py is started")
+    args = parser.parse_args()
+
+    print(f"{'latency ms':>10} {'best ms':>9} {'median ms':>10}")
+    for latency_ms in args.latency_ms:
+        server = start_fake_node(args.port, args.payload_kb, latency_ms)
+        try:
+            timings = [first_frame(args.app_dir, args.port, args.timeout) for _ in range(args.runs)]
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{latency_ms:>10.0f} {min(timings) * 1000:>9.0f} {statistics.median(timings) * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
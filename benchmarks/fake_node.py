@@ -0,0 +1,132 @@
+"""Local fake Walrus storage nodes serving synthetic /metrics and /v1/health.
+
+One aiohttp server hosts any number of nodes under /node/<i>/metrics and
+/node/<i>/v1/health. Every request advances that node's counters, so graphs
+and rates move like they would against a real node.
+
+Usage: python -m benchmarks.fake_node --nodes 200 --port 9300 --fleet-file fleet.txt
+"""
+import argparse
+import asyncio
+import zlib
+from typing import Optional
+
+from aiohttp import web
+
+from benchmarks.payloads import generate_health_payload, generate_metrics_payload
+
+
+class FakeNodeServer:
+    def __init__(
+        self,
+        nodes: int = 1,
+        payload_bytes: int = 200_000,
+        host: str = "127.0.0.1",
+        port: int = 9300,
+        compress: bool = True,
+        etag: bool = True,
+        latency: float = 0,
+    ):
+        self.nodes = nodes
+        self.payload_bytes = payload_bytes
+        self.compress = compress  # gzip/deflate when the client accepts it
+        self.etag = etag  # ETag validators, answered with 304 while the body is unchanged
+        self.latency = latency  # Seconds every response is held back, like a node far away
+        self.host = host
+        self.port = port
+        self.ticks = [0] * nodes
+        self.requests = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    def _node_index(self, request: web.Request) -> int:
+        index = int(request.match_info["node"])
+        if not 0 <= index < self.nodes:
+            raise web.HTTPNotFound()
+        return index
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        index = self._node_index(request)
+        self.ticks[index] += 1
+        self.requests += 1
+        body = generate_metrics_payload(size_bytes=self.payload_bytes, tick=self.ticks[index])
+        return await self._respond(request, web.Response(text=body, content_type="text/plain"))
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        index = self._node_index(request)
+        self.requests += 1
+        return await self._respond(request, web.json_response(generate_health_payload(tick=self.ticks[index])))
+
+    async def _respond(self, request: web.Request, response: web.Response) -> web.StreamResponse:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.etag:
+            response.etag = f"{zlib.crc32(response.body):08x}"
+            if request.if_none_match and any(match.value == response.etag.value for match in request.if_none_match):
+                return web.Response(status=304, headers={"ETag": response.headers["ETag"]})
+        if self.compress:
+            response.enable_compression()
+        return response
+
+    def node_urls(self, index: int) -> tuple:
+        base = f"http://{self.host}:{self.port}/node/{index}"
+        return f"node-{index}", f"{base}/metrics", base
+
+    def fleet(self) -> list:
+        return [self.node_urls(index) for index in range(self.nodes)]
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/node/{node}/metrics", self.handle_metrics)
+        app.router.add_get("/node/{node}/v1/health", self.handle_health)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def serve(args):
+    server = FakeNodeServer(
+        nodes=args.nodes,
+        payload_bytes=args.payload_kb * 1000,
+        host=args.host,
+        port=args.port,
+        compress=not args.no_compression,
+        etag=not args.no_etag,
+        latency=args.latency_ms / 1000,
+    )
+    await server.start()
+    if args.fleet_file:
+        with open(args.fleet_file, "w", encoding="utf-8") as fleet_file:
+            for node in server.fleet():
+                fleet_file.write(" ".join(node) + "\n")
+        print(f"Fleet file written to {args.fleet_file}")
+    print(f"Serving {args.nodes} fake nodes on http://{args.host}:{args.port}/node/<0..{args.nodes - 1}>", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=1)
+    parser.add_argument("--payload-kb", type=int, default=200, help="Approximate /metrics body size per node")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9300)
+    parser.add_argument("--fleet-file", type=str, help="Write a --fleet-file for main.py listing every fake node")
+    parser.add_argument("--no-compression", action="store_true", help="Always answer with identity encoding")
+    parser.add_argument("--no-etag", action="store_true", help="Do not send ETag validators")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay every response to simulate a remote node")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import random
+from functools import lru_cache
+from typing import Optional
+
+HISTOGRAM_BUCKETS = ("0.005", "0.01", "0.025", "0.05", "0.1", "0.25", "0.5", "1", "2.5", "5", "10", "+Inf")
+
+
+def _node_values(tick: int) -> dict:
+    return {
+        "epoch": 42,
+        "shards_owned": 12,
+        "uptime": 3600 + tick * 2,
+        "workers_num": 4,
+        "latest_downloaded_checkpoint": 1_000_000 + tick * 7,
+        "total_downloaded_checkpoints": 900_000 + tick * 7,
+        "checkpoint_downloader_lag": max(0, 50 - tick),
+        "persisted_events": 500_000 + tick * 3,
+        "pending_events": 10 + tick % 5,
+        "highest_finished_event": 500_010 + tick * 3,
+        "confirmations_issued_total": 20_000 + tick,
+        "recover_blob_backlog_queued": tick % 3,
+        "recover_blob_backlog_in_progress": tick % 2,
+    }
+
+
+def _walrus_lines(values: dict) -> list:
+    return [
+        "# HELP uptime uptime of the node service in seconds",
+        "# TYPE uptime counter",
+        f'uptime{{chain_identifier="4c78adac",is_docker="false",process="walrus-node",version="1.2.0-abcdef"}} {values["uptime"]}',
+        "# HELP walrus_build_info Walrus binary info",
+        "# TYPE walrus_build_info gauge",
+        'walrus_build_info{version="1.2.0-abcdef"} 1',
+        "# TYPE walrus_current_epoch gauge",
+        f'walrus_current_epoch {values["epoch"]}',
+        "# TYPE walrus_shards_owned gauge",
+        f'walrus_shards_owned {values["shards_owned"]}',
+        "# TYPE checkpoint_downloader_num_workers gauge",
+        f'checkpoint_downloader_num_workers {values["workers_num"]}',
+        "# TYPE event_processor_latest_downloaded_checkpoint gauge",
+        f'event_processor_latest_downloaded_checkpoint {values["latest_downloaded_checkpoint"]}',
+        "# TYPE event_processor_total_downloaded_checkpoints counter",
+        f'event_processor_total_downloaded_checkpoints {values["total_downloaded_checkpoints"]}',
+        "# TYPE checkpoint_downloader_checkpoint_lag gauge",
+        f'checkpoint_downloader_checkpoint_lag {values["checkpoint_downloader_lag"]}',
+        "# TYPE walrus_event_cursor_progress gauge",
+        f'walrus_event_cursor_progress{{state="persisted"}} {values["persisted_events"]}',
+        f'walrus_event_cursor_progress{{state="pending"}} {values["pending_events"]}',
+        f'walrus_event_cursor_progress{{state="highest_finished"}} {values["highest_finished_event"]}',
+        "# TYPE walrus_storage_confirmations_issued_total counter",
+        f'walrus_storage_confirmations_issued_total {values["confirmations_issued_total"]}',
+        "# TYPE walrus_recover_blob_backlog gauge",
+        f'walrus_recover_blob_backlog{{state="queued"}} {values["recover_blob_backlog_queued"]}',
+        f'walrus_recover_blob_backlog{{state="in-progress"}} {values["recover_blob_backlog_in_progress"]}',
+    ]
+
+
+# Share of observations at or below each bucket of HISTOGRAM_BUCKETS, the last one is +Inf.
+_LATENCY_SHAPE = (0.05, 0.15, 0.35, 0.55, 0.75, 0.9, 0.96, 0.99, 0.995, 0.998, 0.999, 1.0)
+
+
+def latency_lines(tick: int, label_sets: int = 24) -> list:
+    """The latency histograms of StorageMetrics.LATENCY_HISTOGRAMS, growing by a fixed distribution every tick."""
+    lines = []
+    for name, per_tick in (("walrus_http_request_duration_seconds", 40), ("walrus_event_processing_duration_seconds", 12)):
+        lines += [f"# HELP {name} Synthetic latency histogram", f"# TYPE {name} histogram"]
+        for i in range(label_sets):
+            labels = f'method="{("GET", "PUT", "POST")[i % 3]}",route="/v1/route_{i // 3}",status="200"'
+            observations = per_tick * (tick + 1) * (i % 4 + 1)
+            for le, share in zip(HISTOGRAM_BUCKETS, _LATENCY_SHAPE):
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {int(observations * share)}')
+            lines.append(f"{name}_sum{{{labels}}} {observations * 0.08:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {observations}")
+    return lines
+
+
+def _histogram_family(name: str, rng: random.Random, label_sets: int) -> list:
+    lines = [f"# HELP {name} Synthetic latency histogram", f"# TYPE {name} histogram"]
+    for i in range(label_sets):
+        labels = f'method="GET",route="/v1/route_{i}",status="200"'
+        cumulative = 0
+        for le in HISTOGRAM_BUCKETS:
+            cumulative += rng.randint(0, 1000)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {rng.random() * cumulative:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+    return lines
+
+
+@lru_cache(maxsize=16)
+def _filler(size_bytes: int, seed: int) -> str:
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    family = 0
+    while size < size_bytes:
+        family_lines = _histogram_family(f"walrus_synthetic_{family}_duration_seconds", rng, label_sets=8)
+        lines.extend(family_lines)
+        size += sum(len(line) + 1 for line in family_lines)
+        family += 1
+    return "\n".join(lines)
+
+
+def generate_metrics_payload(size_bytes: int = 1_000_000, tick: int = 0, seed: int = 0, values: Optional[dict] = None) -> str:
+    """Build a synthetic /metrics body of roughly ``size_bytes`` bytes.
+
+    The Walrus series the dashboard reads are spread across the payload (some
+    at the very end) between histogram families, so lookups cannot short
+    circuit on an early match. The histogram filler is generated once per
+    (size, seed) and reused, only the Walrus values change with ``tick``.
+    """
+    walrus = _walrus_lines(values or _node_values(tick))
+    head, tail = walrus[: len(walrus) // 2], walrus[len(walrus) // 2:] + latency_lines(tick)
+    walrus = head + tail
+    walrus_size = sum(len(line) + 1 for line in walrus)
+    filler = _filler(max(0, size_bytes - walrus_size), seed)
+    return "\n".join(head) + "\n" + (filler + "\n" if filler else "") + "\n".join(tail) + "\n"
+
+
+def generate_health_payload(tick: int = 0, shards: int = 12) -> dict:
+    """Build a synthetic /v1/health response."""
+    return {
+        "success": {
+            "code": 200,
+            "data": {
+                "uptime": {"secs": 3600 + tick * 2, "nanos": 0},
+                "epoch": 42,
+                "publicKey": "synthetic",
+                "nodeStatus": "Active",
+                "eventProgress": {"persisted": 500_000 + tick * 3, "pending": 10},
+                "shardSummary": {
+                    "owned": shards,
+                    "ownedShardStatus": {"unknown": 0, "ready": shards, "inTransfer": 0, "inRecovery": 0},
+                },
+                "shardDetail": {
+                    "owned": [{"shard": i, "status": "ready"} for i in range(shards)],
+                },
+            },
+        }
+    }
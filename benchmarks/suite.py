@@ -0,0 +1,270 @@
+"""Benchmark suite of the whole scrape-to-frame pipeline, with a saved baseline to catch regressions.
+
+Cases (select with --only, matched as a substring of the case name):
+  parse/<size>     StorageMetrics.snapshot over a full /metrics body
+  filter/<size>    MetricsLineFilter over the body in 64 KiB chunks, then the snapshot of what it kept
+  apply            StorageDashboard.apply_snapshot, the scrape landing in the dashboard state
+  panel/<name>     one panel created and drawn at its size, with cold figlet and chart caches
+  frame            new snapshot, all panels re-created and the whole layout drawn to a 200x60 console
+  frame/ansi       new snapshot drawn by the ANSI renderer at 200x60, only changed boxes and lines written
+  poll/<size>      StorageCollector.update_metrics against an in-process fake node, HTTP and filter included
+  health/<decoder> NodeHealth decoded from a /v1/health body of 1000 shards, with every installed JSON decoder
+  histogram/<n>    both latency histograms summed from n label sets of 12 buckets each
+
+Every case reports operations per second (best of --rounds) and the peak
+memory of one operation. Payloads are generated from a fixed seed, so runs
+are comparable across machines of the same kind.
+
+Usage:
+  python -m benchmarks.suite --save baseline.json
+  python -m benchmarks.suite --baseline baseline.json [--tolerance 0.2] [--sizes-kb 200 1000] [--only panel]
+"""
+import argparse
+import asyncio
+import io
+import json
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.fake_node import FakeNodeServer
+from benchmarks.payloads import generate_health_payload, generate_metrics_payload, latency_lines
+
+CHUNK_SIZE = 64 * 1024
+
+
+class Case:
+    """One benchmark: ``run`` is a sync or async callable doing a single operation."""
+
+    __slots__ = ("name", "run")
+
+    def __init__(self, name: str, run: Callable):
+        self.name = name
+        self.run = run
+
+
+def size_label(size_kb: int) -> str:
+    return f"{size_kb}kb"
+
+
+def parse_cases(sizes_kb: List[int]) -> List[Case]:
+    from src.metrics_parser import MetricsLineFilter, StorageMetrics
+
+    cases = []
+    for size_kb in sizes_kb:
+        text = generate_metrics_payload(size_bytes=size_kb * 1000)
+        body = text.encode()
+        cases.append(Case(f"parse/{size_label(size_kb)}", lambda text=text: StorageMetrics.snapshot(text)))
+
+        def filtered(body=body):
+            line_filter = MetricsLineFilter(StorageMetrics.SCRAPE_NAMES)
+            for start in range(0, len(body), CHUNK_SIZE):
+                if line_filter.feed(body[start:start + CHUNK_SIZE]):
+                    break
+            return StorageMetrics.snapshot(line_filter.result().decode())
+
+        cases.append(Case(f"filter/{size_label(size_kb)}", filtered))
+    return cases
+
+
+def health_cases() -> List[Case]:
+    from src.node_health import HEALTH_DECODERS, health_decoder
+
+    body = json.dumps(generate_health_payload(shards=1000)).encode()
+    cases = []
+    for name in HEALTH_DECODERS:
+        try:
+            _, decode = health_decoder(name)
+        except ImportError:
+            continue
+        cases.append(Case(f"health/{name}", lambda decode=decode: decode(body)))
+    return cases
+
+
+def histogram_cases(label_sets: int = 1000) -> List[Case]:
+    from src.metrics_parser import StorageMetrics
+
+    # Both latency families with ``label_sets`` series of 12 buckets each, as on a node with many routes.
+    text = "\n".join(latency_lines(0, label_sets))
+    return [Case(f"histogram/{label_sets}", lambda: StorageMetrics.get_latency_histograms(text))]
+
+
+def dashboard_cases(session) -> List[Case]:
+    from rich.console import Console
+    from src.ansi_renderer import AnsiRenderer
+    from src.metrics_parser import StorageMetrics
+    from src.storage_dashboard import StorageDashboard
+
+    dashboard = StorageDashboard(refresh_per_second=5, session=session, refresh_metrics_rate=2, refresh_node_rpc_rate=20, graph_size=50)
+    ticks = iter(range(1, 10 ** 9))
+    snapshots = [StorageMetrics.snapshot(generate_metrics_payload(size_bytes=0, tick=tick)) for tick in range(1, 201)]
+
+    def next_snapshot():
+        # Timestamps have to keep growing or the series drop the row as out of order.
+        tick = next(ticks)
+        snapshot = snapshots[tick % len(snapshots)]
+        snapshot.timestamp = time.time() + tick
+        return snapshot
+
+    for _ in range(dashboard.graph_size):
+        dashboard.apply_snapshot(next_snapshot())
+
+    console = Console(file=io.StringIO(), width=200, height=60, force_terminal=True, color_system="truecolor")
+    # Region of every panel in a full frame, so each one is drawn at the size it really gets.
+    renderer = dashboard.renderer
+    renderer.render_panels()
+    regions = {layout.name: rendered.region for layout, rendered in renderer.layout.render(console, console.options).items()}
+
+    def cold_caches():
+        dashboard.figlet_cache.clear()
+        dashboard.chart_cache.clear()
+
+    cases = [Case("apply", lambda: dashboard.apply_snapshot(next_snapshot()))]
+    for (_, name), create_panel, _ in renderer.panels:
+        region = regions[name]
+
+        def panel(create_panel=create_panel, region=region):
+            cold_caches()
+            return console.render_lines(create_panel(), console.options.update_dimensions(region.width, region.height))
+
+        cases.append(Case(f"panel/{name.lower().replace(' ', '_')}", panel))
+
+    def frame():
+        dashboard.apply_snapshot(next_snapshot())
+        renderer.render_panels()
+        console.file.seek(0)
+        console.file.truncate()
+        console.print(renderer.layout)
+
+    cases.append(Case("frame", frame))
+
+    ansi = AnsiRenderer(dashboard, stream=io.BytesIO(), size=(200, 60))
+
+    def ansi_frame():
+        dashboard.apply_snapshot(next_snapshot())
+        ansi.stream.seek(0)
+        ansi.stream.truncate()
+        ansi.render()
+
+    cases.append(Case("frame/ansi", ansi_frame))
+    return cases
+
+
+def poll_cases(session, server: FakeNodeServer, sizes_kb: List[int]) -> List[Case]:
+    from src.storage_collector import StorageCollector
+
+    cases = []
+    for size_kb in sizes_kb:
+        collector = StorageCollector(session=session, refresh_metrics_rate=2, refresh_node_rpc_rate=20, graph_size=50)
+
+        async def poll(collector=collector, size_kb=size_kb):
+            server.payload_bytes = size_kb * 1000
+            if not await collector.update_metrics():
+                raise RuntimeError("Poll against the fake node failed")
+
+        cases.append(Case(f"poll/{size_label(size_kb)}", poll))
+    return cases
+
+
+async def call(run: Callable):
+    result = run()
+    if asyncio.iscoroutine(result):
+        result = await result
+    return result
+
+
+async def measure(case: Case, rounds: int, min_time: float) -> Tuple[float, int]:
+    """Best operations per second over ``rounds`` rounds of at least ``min_time`` seconds, and peak bytes of one operation."""
+    await call(case.run)  # Warm up imports, caches and connections
+    best = 0.0
+    for _ in range(rounds):
+        operations = 0
+        started = time.perf_counter()
+        while True:
+            await call(case.run)
+            operations += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        best = max(best, operations / elapsed)
+
+    # Traced separately, tracemalloc slows everything down.
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    await call(case.run)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, max(peak - baseline, 0)
+
+
+def compare(results: Dict[str, dict], baseline: Optional[Dict[str, dict]], tolerance: float) -> List[str]:
+    """Print the results next to the baseline and return the cases that regressed beyond ``tolerance``."""
+    regressions = []
+    print(f"{'case':<48} {'ops/s':>12} {'peak KiB':>10} {'base ops/s':>12} {'ops':>8} {'mem':>8}")
+    for name, result in results.items():
+        line = f"{name:<48} {result['ops']:>12.1f} {result['peak_bytes'] / 1024:>10.1f}"
+        previous = (baseline or {}).get(name)
+        if previous:
+            ops_change = result["ops"] / previous["ops"] - 1
+            memory_change = (result["peak_bytes"] + 1) / (previous["peak_bytes"] + 1) - 1
+            regressed = ops_change < -tolerance or memory_change > tolerance
+            if regressed:
+                regressions.append(name)
+            line += f" {previous['ops']:>12.1f} {ops_change:>+7.0%} {memory_change:>+7.0%}{'  REGRESSION' if regressed else ''}"
+        print(line)
+    return regressions
+
+
+async def run(args) -> Dict[str, dict]:
+    from src.aio_http_client import AioHttpCalls
+
+    # The fake node runs in this process, its plain responses are cheap next to the client side.
+    server = FakeNodeServer(nodes=1, port=args.port, compress=False, etag=False)
+    await server.start()
+    _, metrics_url, rpc_url = server.node_urls(0)
+    try:
+        async with AioHttpCalls(storage_rpc=rpc_url, storage_metrics=metrics_url, conditional=False) as session:
+            cases = parse_cases(args.sizes_kb) + health_cases() + histogram_cases() + dashboard_cases(session) + poll_cases(session, server, args.sizes_kb)
+            results = {}
+            for case in cases:
+                if args.only and not any(pattern in case.name for pattern in args.only):
+                    continue
+                ops, peak = await measure(case, args.rounds, args.min_time)
+                results[case.name] = {"ops": ops, "peak_bytes": peak}
+            return results
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[200, 1000, 5000], help="Sizes of the generated /metrics bodies")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per round")
+    parser.add_argument("--only", nargs="+", help="Run only the cases whose name contains one of these")
+    parser.add_argument("--port", type=int, default=9390, help="Port of the in-process fake node")
+    parser.add_argument("--baseline", help="Compare with the results saved in this file, exit with 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown or memory growth against the baseline, e.g. 0.2 = 20%%")
+    parser.add_argument("--save", help="Write the results to this file, to be used as a baseline later")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as save_file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results}, save_file, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+    if regressions:
+        raise SystemExit(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
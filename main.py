@@ -1,26 +1,184 @@
 import asyncio
+from typing import Optional
 from utils.args import args
-from utils.logger import logger
-from src.storage_dashboard import StorageDashboard
+from utils.logger import log_stats, logger, set_up_logger
 from src.aio_http_client import AioHttpCalls
 
-async def run_dashboard(dashboard: StorageDashboard):
-    await dashboard.start()
+async def run_dashboard(dashboard, finished: Optional[asyncio.Event] = None):
+    if finished is None:
+        await dashboard.start()
+        return
+    # A headless replay stops at the end of the capture, the dashboard keeps showing the last state.
+    task = asyncio.create_task(dashboard.start())
+    waiter = asyncio.create_task(finished.wait())
+    try:
+        await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    if not task.cancelled():
+        task.result()
 
 async def main():
+    set_up_logger(log_lvl=args.logs_lvl, log_path=args.logs_path)
     logger.info("Starting Dashboard...")
 
-    async with AioHttpCalls(storage_metrics=args.storage_metrics_url, storage_rpc=args.storage_rpc_url) as session:
-        dashboard = StorageDashboard(
-            session=session,
-            refresh_metrics_rate=args.storage_refresh_metrics_rate,
-            refresh_node_rpc_rate=args.storage_refresh_rpc_rate,
-            refresh_per_second=args.dashboard_refresh_per_second,
-            graph_size=args.dashboard_graph_size,
+    replay = None
+    recorder = None
+    connect = args.connect
+    if connect and (args.fleet_file or args.serve_socket):
+        logger.warning("--connect is not available in fleet mode or with --serve-socket")
+        connect = None
+    if args.serve_socket and args.fleet_file:
+        logger.warning("The collector daemon is not available in fleet mode")
+    if (args.replay or args.record) and (args.fleet_file or connect):
+        logger.warning("Record and replay are not available in fleet mode or with --connect")
+    elif args.replay:
+        from src.capture import ReplaySession
+        replay = ReplaySession(args.replay, speed=args.replay_speed)
+    elif args.record:
+        from src.capture import CaptureWriter
+        recorder = CaptureWriter(args.record, urls={"metrics": args.storage_metrics_url, "rpc": args.storage_rpc_url})
+
+    # On replay the capture sets the pace: polls are answered when the recorded response is due.
+    metrics_rate, metrics_min, metrics_max = args.storage_refresh_metrics_rate, args.storage_refresh_metrics_min, args.storage_refresh_metrics_max
+    rpc_rate, poll_timeout, clock = args.storage_refresh_rpc_rate, args.storage_poll_timeout, None
+    if replay is not None:
+        metrics_rate = metrics_min = metrics_max = rpc_rate = 0
+        poll_timeout, clock = None, replay.clock
+    if connect:
+        # The daemon sets the pace, its pollers are the only ones that run.
+        metrics_min = metrics_max = None
+    full_scrape = args.storage_full_scrape or recorder is not None
+
+    async with replay or AioHttpCalls(
+        storage_metrics=args.storage_metrics_url,
+        storage_rpc=args.storage_rpc_url,
+        connector_limit=max(args.fleet_concurrency, 100),
+        conditional=not args.fleet_file, # A cached body per node is not worth it for a whole fleet
+        recorder=recorder,
+    ) as session:
+        history = None
+        # With --connect the daemon keeps the history and sends it on connect.
+        if args.history_dir and not args.fleet_file and not connect:
+            from src.history_store import HistoryStore
+            history = HistoryStore(directory=args.history_dir, flush_interval=args.history_flush_interval)
+
+        instrumentation = None
+        if (args.instrument or args.instrument_output) and not args.fleet_file:
+            from src.instrumentation import Instrumentation
+            instrumentation = Instrumentation()
+            instrumentation.add_counters("logging", log_stats)
+        elif args.instrument or args.instrument_output:
+            logger.warning("Stage timings are not available in fleet mode")
+
+        # Imported lazily, so headless runs never load rich, pyfiglet or asciichartpy.
+        if args.serve_socket and not args.fleet_file:
+            from src.collector_daemon import CollectorDaemon
+            dashboard = CollectorDaemon(
+                session=session,
+                refresh_metrics_rate=metrics_rate,
+                refresh_node_rpc_rate=rpc_rate,
+                graph_size=args.dashboard_graph_size,
+                socket_path=args.serve_socket,
+                parse_mode=args.parse_mode,
+                history=history,
+                poll_jitter=args.storage_poll_jitter,
+                poll_timeout=poll_timeout,
+                poll_max_backoff=args.storage_poll_max_backoff,
+                full_scrape=full_scrape,
+                rate_window=args.rate_window,
+                instrumentation=instrumentation,
+                refresh_metrics_min=metrics_min,
+                refresh_metrics_max=metrics_max,
+                request_budget=args.storage_request_budget,
+                clock=clock,
+            )
+        elif args.headless:
+            from src.headless import HeadlessCollector
+            dashboard = HeadlessCollector(
+                session=session,
+                refresh_metrics_rate=metrics_rate,
+                refresh_node_rpc_rate=rpc_rate,
+                graph_size=args.dashboard_graph_size,
+                parse_mode=args.parse_mode,
+                history=history,
+                poll_jitter=args.storage_poll_jitter,
+                poll_timeout=poll_timeout,
+                poll_max_backoff=args.storage_poll_max_backoff,
+                full_scrape=full_scrape,
+                rate_window=args.rate_window,
+                instrumentation=instrumentation,
+                refresh_metrics_min=metrics_min,
+                refresh_metrics_max=metrics_max,
+                request_budget=args.storage_request_budget,
+                clock=clock,
+                output=args.headless_output,
             )
+        elif args.fleet_file:
+            from src.fleet_dashboard import FleetDashboard, load_fleet_file
+            dashboard = FleetDashboard(
+                session=session,
+                nodes=load_fleet_file(args.fleet_file),
+                refresh_metrics_rate=args.storage_refresh_metrics_rate,
+                refresh_node_rpc_rate=args.storage_refresh_rpc_rate,
+                refresh_per_second=args.dashboard_refresh_per_second,
+                concurrency=args.fleet_concurrency,
+                parse_mode=args.parse_mode,
+                poll_jitter=args.storage_poll_jitter,
+                full_scrape=args.storage_full_scrape,
+            )
+        else:
+            # The first scrape is sent right away and arrives while rich, pyfiglet and the
+            # layout are loaded in a worker thread, the first poll then picks it up.
+            if not connect:
+                from src.metrics_parser import MetricsLineFilter, StorageMetrics
+                session.prefetch_storage_metrics(line_filter=None if full_scrape else MetricsLineFilter(StorageMetrics.SCRAPE_NAMES))
+                session.prefetch_storage_status()
+
+            def create_dashboard():
+                from src.storage_dashboard import StorageDashboard
+                return StorageDashboard(
+                    session=session,
+                    refresh_metrics_rate=metrics_rate,
+                    refresh_node_rpc_rate=rpc_rate,
+                    refresh_per_second=args.dashboard_refresh_per_second,
+                    graph_size=args.dashboard_graph_size,
+                    renderer=args.renderer,
+                    parse_mode=args.parse_mode,
+                    history=history,
+                    poll_jitter=args.storage_poll_jitter,
+                    poll_timeout=poll_timeout,
+                    poll_max_backoff=args.storage_poll_max_backoff,
+                    full_scrape=full_scrape,
+                    rate_window=args.rate_window,
+                    graph_view=args.graph_view,
+                    instrumentation=instrumentation,
+                    refresh_metrics_min=metrics_min,
+                    refresh_metrics_max=metrics_max,
+                    request_budget=args.storage_request_budget,
+                    clock=clock,
+                )
+
+            dashboard = await asyncio.to_thread(create_dashboard)
+
+        if connect:
+            # Snapshots and node status come from the daemon, this process never polls the node.
+            from src.collector_daemon import DaemonSubscriber
+            dashboard.pollers = {"daemon": DaemonSubscriber(dashboard, connect, max_backoff=args.storage_poll_max_backoff)}
+
+        exporter = None
+        if args.exporter_port and not args.fleet_file:
+            from src.exporter import MetricsExporter
+            exporter = MetricsExporter(dashboard, host=args.exporter_host, port=args.exporter_port)
+            await exporter.start()
+        elif args.exporter_port:
+            logger.warning("The metrics exporter is not available in fleet mode")
 
         try:
-            await run_dashboard(dashboard)
+            await run_dashboard(dashboard, finished=replay.finished if replay is not None and args.headless else None)
         except asyncio.CancelledError:
             logger.info("Dashboard cancelled.")
         except KeyboardInterrupt:
@@ -28,6 +186,11 @@ async def main():
         except Exception as e:
             logger.error(f"Fatal error: {e}", exc_info=True)
         finally:
+            if exporter is not None:
+                await exporter.stop()
+            if instrumentation is not None and args.instrument_output:
+                instrumentation.dump(args.instrument_output)
+                logger.info(f"Stage timings written to {args.instrument_output}")
             logger.info("Goodbye!")
 
 if __name__ == "__main__":
@@ -1,8 +1,98 @@
-from typing import Optional, Literal
+from typing import Callable, Dict, Optional, Literal, Tuple
 import aiohttp
+import asyncio
+import json
+import time
 import traceback
+import zlib
+from src.node_health import NodeHealth, decode_health
 from utils.logger import logger
 
+
+class RequestStats:
+    """Transfer counters for one URL. ``wire_bytes`` is the body as received, before decompression.
+
+    ``closed_early`` counts streamed responses whose connection was closed
+    instead of reused, because the rest of the body was too large to drain.
+    """
+
+    __slots__ = (
+        "requests",
+        "not_modified",
+        "failures",
+        "closed_early",
+        "wire_bytes",
+        "decoded_bytes",
+        "last_wire_bytes",
+        "last_decoded_bytes",
+        "last_latency",
+        "last_encoding",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.closed_early = 0
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+        self.last_wire_bytes = 0
+        self.last_decoded_bytes = 0
+        self.last_latency: Optional[float] = None
+        self.last_encoding: Optional[str] = None
+
+    def record(self, status: int, latency: float, wire_bytes: int, decoded_bytes: int, encoding: Optional[str]):
+        self.requests += 1
+        if status == 304:
+            self.not_modified += 1
+        elif status != 200:
+            self.failures += 1
+        self.wire_bytes += wire_bytes
+        self.decoded_bytes += decoded_bytes
+        self.last_wire_bytes = wire_bytes
+        self.last_decoded_bytes = decoded_bytes
+        self.last_latency = latency
+        self.last_encoding = encoding
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class DeflateDecompressor:
+    """Streaming ``deflate`` with the zlib or gzip header detected from the first bytes.
+
+    Like ``AioHttpCalls.decompress``, a body the header check rejects is
+    inflated again from its first byte as raw deflate.
+    """
+
+    __slots__ = ("_inflater", "_head")
+
+    def __init__(self):
+        self._inflater = zlib.decompressobj(wbits=47)
+        self._head: Optional[bytes] = b""  # Input until the header is checked, None after that
+
+    @property
+    def unconsumed_tail(self) -> bytes:
+        return self._inflater.unconsumed_tail
+
+    def decompress(self, data: bytes, max_length: int = 0) -> bytes:
+        if self._head is not None:
+            self._head += data
+            try:
+                inflated = self._inflater.decompress(data, max_length)
+            except zlib.error:
+                self._inflater = zlib.decompressobj(wbits=-15)
+                data, self._head = self._head, None
+            else:
+                if len(self._head) >= 2:  # Both header formats are told apart by their first two bytes
+                    self._head = None
+                return inflated
+        return self._inflater.decompress(data, max_length)
+
+    def flush(self) -> bytes:
+        return self._inflater.flush()
+
+
 class AioHttpCalls:
 
     def __init__(
@@ -11,58 +101,221 @@ class AioHttpCalls:
         storage_metrics: Optional[str] = None,
         session: Optional[str] = None,
         timeout: int = 3,
+        connector_limit: int = 100,
+        connector_limit_per_host: int = 0,
+        keepalive_timeout: float = 60,
+        dns_cache_ttl: int = 300,
+        conditional: bool = True,
+        chunk_size: int = 64 * 1024,
+        drain_limit: int = 256 * 1024,
+        recorder=None,
     ):
 
         self.timeout = timeout
+        self.connector_limit = connector_limit # Max simultaneous connections in the shared pool
+        self.connector_limit_per_host = connector_limit_per_host # 0 means no per host limit
+        self.keepalive_timeout = keepalive_timeout # Idle connections are kept this long, longer than any poll interval
+        self.dns_cache_ttl = dns_cache_ttl
+        self.conditional = conditional # Send If-None-Match / If-Modified-Since when the endpoint provided validators
+        self.chunk_size = chunk_size # Read size when a body is streamed through a line filter
+        self.drain_limit = drain_limit # Max unread bytes dropped to keep the connection after a line filter stopped early
+        self.recorder = recorder # CaptureWriter every decoded body is appended to
         self.session = session
-        self._manage_session = session is None # Indicates if this class should manage the session lifecycle.  
+        self._manage_session = session is None # Indicates if this class should manage the session lifecycle.
 
         self.storage_rpc = storage_rpc
         self.storage_metrics = storage_metrics
 
+        self.request_stats: Dict[str, RequestStats] = {}
+        # (url, filtered) -> (etag, last_modified, decoded body). A filtered read only caches the lines
+        # it kept, so it never answers a 304 to a read of the whole body or the other way round.
+        self._validators: Dict[Tuple[str, bool], tuple] = {}
+        self._prefetched: Dict[str, asyncio.Task] = {} # url -> request started before anyone asked for it
+
     async def __aenter__(self):
         if not self.session:
             logger.debug(f"Creating aiohttp session")
-            self.session = aiohttp.ClientSession()
+            connector = aiohttp.TCPConnector(
+                limit=self.connector_limit,
+                limit_per_host=self.connector_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            # Bodies are decompressed here rather than by aiohttp, so the bytes on the wire can be counted.
+            self.session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+        if self.recorder is not None:
+            self.recorder.start()
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
+        for task in self._prefetched.values():
+            task.cancel()
+        self._prefetched.clear()
+        if self.recorder is not None:
+            await self.recorder.close()
         if self._manage_session and self.session:
             logger.debug(f"Closing aiohttp session")
             await self.session.close()
 
-    async def handle_rpc_request(self, url, callback):
-        try:
-            logger.debug(f"Requesting {url}")
-            async with self.session.get(url, timeout=self.timeout, ssl=False) as response:
+    @staticmethod
+    def decompress(body: bytes, encoding: Optional[str]) -> bytes:
+        if not encoding or encoding == "identity":
+            return body
+        if encoding in ("gzip", "x-gzip"):
+            return zlib.decompress(body, wbits=31)
+        if encoding == "deflate":
+            try:
+                return zlib.decompress(body)
+            except zlib.error:
+                return zlib.decompress(body, wbits=-15) # Some servers send raw deflate without the zlib header
+        raise ValueError(f"Unsupported content encoding {encoding}")
+
+    def _request_headers(self, key: Tuple[str, bool]) -> dict:
+        headers = {"Accept-Encoding": "gzip, deflate"}
+        validators = self._validators.get(key)
+        if self.conditional and validators:
+            etag, last_modified, _ = validators
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    @staticmethod
+    def decompressor(encoding: Optional[str]):
+        """Incremental counterpart of ``decompress``, None for an identity body."""
+        if not encoding or encoding == "identity":
+            return None
+        if encoding in ("gzip", "x-gzip"):
+            return zlib.decompressobj(wbits=31)
+        if encoding == "deflate":
+            return DeflateDecompressor()
+        raise ValueError(f"Unsupported content encoding {encoding}")
+
+    async def _read_filtered(self, response, encoding: Optional[str], line_filter) -> Tuple[int, bytes, bool]:
+        """Wire bytes read, the lines kept by ``line_filter`` and whether the connection was given up."""
+        wire_bytes = 0
+        decompressor = self.decompressor(encoding)
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            wire_bytes += len(chunk)
+            if decompressor is None:
+                done = line_filter.feed(chunk)
+            else:
+                # Metrics compress very well, inflate in bounded pieces so one chunk cannot expand into megabytes.
+                done = line_filter.feed(decompressor.decompress(chunk, self.chunk_size))
+                while not done and decompressor.unconsumed_tail:
+                    done = line_filter.feed(decompressor.decompress(decompressor.unconsumed_tail, self.chunk_size))
+            if done:
+                break
+        else:
+            if decompressor:
+                line_filter.feed(decompressor.flush())
+            return wire_bytes, line_filter.result(), False
+
+        # Nothing wanted is left. Leaving the rest unread closes the connection, which costs a new
+        # connection (and TLS handshake) on the next poll: a small rest is read and dropped instead.
+        # Beyond drain_limit, or with an unknown length, reading it would cost more than reconnecting.
+        remaining = response.content_length - wire_bytes if response.content_length is not None else None
+        if remaining is None or remaining > self.drain_limit:
+            return wire_bytes, line_filter.result(), True
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            wire_bytes += len(chunk)
+        return wire_bytes, line_filter.result(), False
+
+    def prefetch(self, url: str, ssl: bool = True, line_filter=None):
+        """Start fetching ``url`` in the background, the next ``fetch`` of it returns that response instead of a new one."""
+        if url not in self._prefetched:
+            self._prefetched[url] = asyncio.create_task(self._fetch(url, ssl, line_filter), name=f"prefetch-{url}")
+
+    def prefetch_storage_metrics(self, line_filter=None):
+        self.prefetch(self.storage_metrics, line_filter=line_filter)
+
+    def prefetch_storage_status(self):
+        self.prefetch(f"{self.storage_rpc}/v1/health", ssl=False)
+
+    async def fetch(self, url: str, ssl: bool = True, line_filter=None) -> Optional[bytes]:
+        """GET ``url`` and return the decoded body, or None on an unexpected status.
+
+        A 304 Not Modified answer returns the body cached with the validators
+        by the last read of ``url`` with or without a filter alike.
+        With a ``line_filter`` (see ``MetricsLineFilter``) the body is streamed
+        through it in chunks and only the lines it kept are returned.
+        A response prefetched for ``url`` is used once, whatever the arguments.
+        """
+        prefetched = self._prefetched.pop(url, None)
+        if prefetched is not None:
+            return await prefetched
+        return await self._fetch(url, ssl, line_filter)
+
+    async def _fetch(self, url: str, ssl: bool, line_filter) -> Optional[bytes]:
+        stats = self.request_stats.setdefault(url, RequestStats())
+        started = time.perf_counter()
+        key = (url, line_filter is not None)
+        async with self.session.get(url, timeout=self.timeout, ssl=ssl, headers=self._request_headers(key)) as response:
+            encoding = None if self.session.auto_decompress else response.headers.get("Content-Encoding")
+            body = None
+            if response.status == 200 and line_filter is not None:
+                wire_bytes, body, closed_early = await self._read_filtered(response, encoding, line_filter)
+                stats.closed_early += closed_early
+            else:
+                raw = await response.read()
+                wire_bytes = len(raw)
                 if response.status == 200:
-                    return await callback(response.json())
+                    body = self.decompress(raw, encoding)
+            if response.status == 304 and key in self._validators:
+                body = self._validators[key][2]
+            elif response.status == 200:
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if self.conditional and (etag or last_modified):
+                    self._validators[key] = (etag, last_modified, body)
                 else:
-                    logger.error(
-                        f"Request to {url} failed with status code {response.status}"
-                    )
-                    return None
+                    self._validators.pop(key, None)
+
+        latency = time.perf_counter() - started
+        streamed = line_filter is not None and response.status == 200
+        decoded_bytes = line_filter.scanned_bytes if streamed else len(body) if body is not None else 0
+        stats.record(response.status, latency, wire_bytes, decoded_bytes, encoding)
+        kept = f", {len(body)} B kept{' (stopped early)' if line_filter.done else ''}" if streamed else ""
+        logger.debug(
+            f"GET {url} {response.status} in {latency * 1000:.1f} ms, "
+            f"{wire_bytes} B on the wire, {decoded_bytes} B decoded ({encoding or 'identity'}){kept}"
+        )
+        if body is None:
+            logger.error(f"Request to {url} failed with status code {response.status}")
+        elif self.recorder is not None:
+            self.recorder.append("metrics" if url == self.storage_metrics else "status", body)
+        return body
+
+    def stats(self) -> dict:
+        return {url: stats.to_dict() for url, stats in self.request_stats.items()}
+
+    async def handle_rpc_request(self, url, callback, decode: Callable[[bytes], object] = json.loads):
+        try:
+            logger.debug(f"Requesting {url}")
+            body = await self.fetch(url, ssl=False)
+            if body is None:
+                return None
+            return await callback(decode(body))
         except aiohttp.ClientError as e:
             logger.error(f"Issue with making request to {url}: {e}")
         except TimeoutError as e:
             logger.error(f"Issue with making request to {url}. TimeoutError: {e}")
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Unexpected response from {url}: {e!r}")
         except Exception as e:
             logger.error(
                 f"An unexpected error occurred while making request to {url}: {e}"
             )
             traceback.print_exc()
 
-    async def handle_metrics_request(self, url, callback):
+    async def handle_metrics_request(self, url, callback, line_filter=None):
         try:
             logger.debug(f"Requesting {url}")
-            async with self.session.get(url, timeout=self.timeout) as response:
-                if response.status == 200:
-                    return await callback(response.text())
-                else:
-                    logger.error(
-                        f"Request to {url} failed with status code {response.status}"
-                    )
-                    return None
+            body = await self.fetch(url, line_filter=line_filter)
+            if body is None:
+                return None
+            return await callback(body.decode("utf-8", errors="replace"))
         except aiohttp.ClientError as e:
             logger.error(f"Issue with making request to {url}: {e}")
         except TimeoutError as e:
@@ -73,19 +326,16 @@ class AioHttpCalls:
             )
             traceback.print_exc()
 
-    async def get_storage_metrics(self) -> str:
-        
-        async def process_response(response):
-            data = await response
+    async def get_storage_metrics(self, storage_metrics: Optional[str] = None, line_filter=None) -> str:
+
+        async def process_response(data):
             return data
 
-        return await self.handle_metrics_request(self.storage_metrics, process_response)
+        return await self.handle_metrics_request(storage_metrics or self.storage_metrics, process_response, line_filter)
+
+    async def get_storage_status(self, storage_rpc: Optional[str] = None) -> Optional[NodeHealth]:
 
-    async def get_storage_status(self) -> str:
-        
-        async def process_response(response):
-            data = await response
+        async def process_response(data):
             return data
 
-        return await self.handle_rpc_request(f"{self.storage_rpc}/v1/health", process_response)
-    
\ No newline at end of file
+        return await self.handle_rpc_request(f"{storage_rpc or self.storage_rpc}/v1/health", process_response, decode_health)
@@ -0,0 +1,224 @@
+import shutil
+import sys
+from functools import partial
+from typing import BinaryIO, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.catalog import PanelSpec, layout_rows
+from src.formater import covert_seconds_to_dhm
+from src.rates import ETA_FIELDS
+from src.renderer import Renderer
+from utils.logger import logger
+
+CSI = "\x1b["
+COLORS = {"red": "31", "green": "32", "yellow": "33", "magenta": "35", "cyan": "36"}
+
+# A content line of a box: plain text, or text and the color it is drawn in.
+Line = Union[str, Tuple[str, str]]
+
+
+def split(total: int, ratios: Sequence[int]) -> List[Tuple[int, int]]:
+    """Offsets and sizes of ``ratios`` shares of ``total`` cells, the last share takes the rounding rest."""
+    parts = []
+    offset = 0
+    for index, ratio in enumerate(ratios):
+        size = total - offset if index == len(ratios) - 1 else total * ratio // sum(ratios)
+        parts.append((offset, size))
+        offset += size
+    return parts
+
+
+def draw_box(title: str, lines: Sequence[Line], width: int, height: int, color: str, center: bool = False) -> List[str]:
+    """``height`` strings of ``width`` visible cells: a rounded border in ``color`` around the cropped ``lines``."""
+    if width < 2 or height < 2:
+        return [" " * width] * height
+    inner_width, inner_height = width - 2, height - 2
+    border = f"{CSI}{COLORS.get(color, '37')}m"
+    title = f" {title} "[:max(inner_width - 1, 0)]
+    top = f"{border}╭─{CSI}1m{title}{CSI}22m{'─' * (inner_width - 1 - len(title))}╮{CSI}0m"
+    bottom = f"{border}╰{'─' * inner_width}╯{CSI}0m"
+
+    lines = [line if isinstance(line, tuple) else (line, None) for line in lines][:inner_height]
+    if center:
+        # The lines are centered as one block, so figlet digits stay aligned.
+        block = max((len(text) for text, _ in lines), default=0)
+        lines = [("", None)] * ((inner_height - len(lines)) // 2) + [(text.ljust(block).center(inner_width), color) for text, color in lines]
+    rows = [top]
+    for index in range(inner_height):
+        text, text_color = lines[index] if index < len(lines) else ("", None)
+        cell = text[:inner_width].ljust(inner_width)
+        if text_color:
+            cell = f"{CSI}1;{COLORS.get(text_color, '37')}m{cell}{CSI}0m"
+        rows.append(f"{border}│{CSI}0m{cell}{border}│{CSI}0m")
+    rows.append(bottom)
+    return rows
+
+
+class AnsiRenderer(Renderer):
+    """Rich-free backend writing plain ANSI escape sequences, for small boxes and slow SSH links.
+
+    The screen is split like the rich layout. Every box is drawn into lines of
+    fixed width, only when one of its data sources changed, and each of its
+    lines is compared with what the terminal already shows at that position.
+    Only lines that differ are written, each behind a cursor move, in one
+    write per frame.
+    """
+
+    def __init__(self, dashboard, stream: Optional[BinaryIO] = None, size: Optional[Tuple[int, int]] = None):
+        super().__init__(dashboard)
+        self.stream = stream or getattr(sys.stdout, "buffer", sys.stdout)
+        self.size = size  # Fixed (columns, lines), the terminal size if not given
+        self.frames = 0
+        self.bytes_written = 0
+
+        # (ratio, [(name, ratio, draw, data sources)]) per row of the catalog layout, as in the rich renderer.
+        self.rows = [
+            (ratio, [(spec.name, spec.ratio, partial(getattr(self, f"draw_{spec.style}"), spec), spec.sources) for spec in specs])
+            for _, ratio, specs in layout_rows(instrumented=dashboard.instrumentation is not None)
+        ]
+
+        self._geometry: List[tuple] = []  # (name, row, column, width, height, draw, sources)
+        self._rendered_size: Optional[Tuple[int, int]] = None
+        self._rendered_versions: Dict[str, tuple] = {}
+        self._screen: Dict[Tuple[int, int], str] = {}  # (row, column) -> box line the terminal shows there
+
+    def layout(self, columns: int, lines: int) -> List[tuple]:
+        geometry = []
+        for (top, height), (_, boxes) in zip(split(lines, [ratio for ratio, _ in self.rows]), self.rows):
+            for (left, width), (name, _, draw, sources) in zip(split(columns, [ratio for _, ratio, _, _ in boxes]), boxes):
+                geometry.append((name, top, left, width, height, draw, sources))
+        return geometry
+
+    def write(self, data: str):
+        encoded = data.encode()
+        self.stream.write(encoded)
+        self.stream.flush()
+        self.bytes_written += len(encoded)
+
+    def open(self):
+        # Alternate screen, hidden cursor, like rich.live with screen=True.
+        self.write(f"{CSI}?1049h{CSI}?25l{CSI}2J")
+        if self.dashboard.instrumentation is not None:
+            self.dashboard.instrumentation.instrument(self, "write", "terminal write")
+
+    def close(self):
+        self.write(f"{CSI}0m{CSI}?25h{CSI}?1049l")
+        logger.debug(f"ANSI renderer wrote {self.bytes_written} B in {self.frames} frames")
+
+    def render(self) -> bool:
+        size = self.size or tuple(shutil.get_terminal_size())
+        output = []
+        if size != self._rendered_size:
+            self._rendered_size = size
+            self._geometry = self.layout(*size)
+            self._rendered_versions.clear()
+            self._screen.clear()
+            output.append(f"{CSI}0m{CSI}2J")
+
+        for name, top, left, width, height, draw, sources in self._geometry:
+            version = self.dashboard.data_version(*sources)
+            if self._rendered_versions.get(name) == version:
+                continue
+            self._rendered_versions[name] = version
+            for offset, line in enumerate(draw(width, height)):
+                position = (top + offset, left)
+                if self._screen.get(position) != line:
+                    self._screen[position] = line
+                    output.append(f"{CSI}{top + offset + 1};{left + 1}H{line}")
+
+        if not output:
+            return False
+        self.write("".join(output))
+        self.frames += 1
+        return True
+
+    def draw_number(self, panel: PanelSpec, width: int, height: int) -> List[str]:
+        value = getattr(self.dashboard, panel.field)
+        color = panel.color_for(value)
+        text = self.dashboard.ascii_number(value) if isinstance(value, int) else self.dashboard.format_value(value)
+        return draw_box(panel.title, [(line, color) for line in text.rstrip("\n").split("\n")], width, height, color, center=True)
+
+    def draw_status(self, panel: PanelSpec, width: int, height: int) -> List[str]:
+        dashboard = self.dashboard
+        try:
+            uptime = covert_seconds_to_dhm(seconds=dashboard.uptime) if dashboard.uptime else 'N/A'
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while converting seconds to dhm format: {e}")
+            uptime = 'N/A'
+        lines = [
+            (f"STATUS: {dashboard.status}", "green" if dashboard.status == "Active" else "red"),
+            f"VERSION: {dashboard.version}",
+            f"EPOCH: {dashboard.epoch}",
+            f"UPTIME: {uptime}",
+            f"WORKERS: {dashboard.format_value(dashboard.workers_num)}",
+        ]
+        return draw_box(panel.title, lines, width, height, panel.color)
+
+    def draw_shards(self, panel: PanelSpec, width: int, height: int) -> List[str]:
+        dashboard = self.dashboard
+        lines = [
+            (f"OWNED: {dashboard.shards_owned}", "cyan"),
+            (f"READY: {dashboard.shards_ready}", "green"),
+            f"UNKNOWN: {dashboard.shards_unknown}",
+            f"inRECOVERY: {dashboard.shards_inRecovery}",
+            f"inTRANSFER: {dashboard.shards_inTransfer}",
+        ]
+        return draw_box(panel.title, lines, width, height, panel.color)
+
+    def draw_graph(self, panel: PanelSpec, width: int, height: int) -> List[str]:
+        # asciichartpy draws height + 1 rows, the border takes two more.
+        graph = self.dashboard.plot_series(panel.field, height=max(height - 3, 1))
+        return draw_box(f"{panel.title}{self.dashboard.view_label()}", graph.split("\n"), width, height, panel.color)
+
+    def draw_throughput(self, panel: PanelSpec, width: int, height: int) -> List[str]:
+        dashboard = self.dashboard
+        rows = (
+            ("total_downloaded_checkpoints", "CHECKPOINTS"),
+            ("confirmations_issued_total", "CONFIRMATIONS"),
+            ("persisted_events", "PERSISTED EVENTS"),
+            ("highest_finished_event", "FINISHED EVENTS"),
+        )
+        lines = [f"{'':<17}{'NOW':>12}{f'AVG {dashboard.rates.window:g}s':>14}"]
+        for field, label in rows:
+            lines.append(f"{label + ':':<17}{dashboard.format_rate(dashboard.rates.rate(field)):>12}{dashboard.format_rate(dashboard.rates.smoothed(field)):>14}")
+        return draw_box(panel.title, lines, width, height, panel.color)
+
+    def draw_catch_up(self, panel: PanelSpec, width: int, height: int) -> List[str]:
+        dashboard = self.dashboard
+        labels = {"checkpoint_downloader_lag": "CHECKPOINT LAG", "pending_events": "PENDING EVENTS"}
+        lines = []
+        for field in ETA_FIELDS:
+            backlog, eta_text, color = dashboard.catch_up_state(field)
+            lines.append((f"{labels[field]}: {backlog if backlog is not None else 'N/A'} ({dashboard.format_rate(dashboard.rates.smoothed(field))})", color))
+            lines.append((f"ETA: {eta_text}", color))
+            lines.append("")
+        return draw_box(panel.title, lines, width, height, panel.color)
+
+    def draw_latency(self, panel: PanelSpec, width: int, height: int) -> List[str]:
+        dashboard = self.dashboard
+        lines = [f"{'HISTOGRAM':<18}" + "".join(f"{column:>14}" for column in ("OBSERVATIONS", "MEAN ms", "P50 ms", "P90 ms", "P99 ms"))]
+        for title, window in dashboard.latency.items():
+            values = (
+                dashboard.format_rate(window.values["rate"]),
+                dashboard.format_ms(window.values["mean"]),
+                dashboard.format_ms(window.quantile(0.5)),
+                dashboard.format_ms(window.quantile(0.9)),
+                dashboard.format_ms(window.quantile(0.99)),
+            )
+            lines.append(f"{title:<18}" + "".join(f"{value:>14}" for value in values))
+        return draw_box(f"{panel.title} (last {dashboard.rates.window:g}s)", lines, width, height, panel.color)
+
+    def draw_stages(self, panel: PanelSpec, width: int, height: int) -> List[str]:
+        dashboard = self.dashboard
+        lines = [f"{'STAGE':<16}" + "".join(f"{column:>10}" for column in ("CALLS", "ERRORS", "MEAN ms", "P50 ms", "P95 ms", "P99 ms", "MAX ms"))]
+        for stage, histogram in dashboard.instrumentation.rows():
+            values = (
+                histogram.count,
+                histogram.errors,
+                dashboard.format_ms(histogram.mean),
+                dashboard.format_ms(histogram.quantile(0.5)),
+                dashboard.format_ms(histogram.quantile(0.95)),
+                dashboard.format_ms(histogram.quantile(0.99)),
+                dashboard.format_ms(histogram.maximum),
+            )
+            lines.append(f"{stage:<16}" + "".join(f"{value:>10}" for value in values))
+        return draw_box(panel.title, lines, width, height, panel.color)
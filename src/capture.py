@@ -0,0 +1,303 @@
+import asyncio
+import json
+import os
+import struct
+import time
+import zlib
+from difflib import SequenceMatcher
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.aio_http_client import AioHttpCalls, RequestStats
+from utils.logger import logger
+
+MAGIC = b"RWCAPT01"
+KINDS = ("metrics", "status")
+FULL, DELTA = 0, 1
+# Recorded time, kind index, FULL or DELTA, size of the zlib payload that follows.
+FRAME = struct.Struct("<dBBI")
+# Replaces previous lines [start, end) with the next ``size`` bytes of lines.
+DELTA_OP = struct.Struct("<III")
+# Every Nth body of a kind is stored whole, so a damaged frame only loses the bodies up to the next one.
+KEYFRAME_INTERVAL = 100
+# Kind byte of the empty frame that starts every recording session appended to an existing file.
+SESSION = 0xFF
+# When lines were added or removed, at most this many lines between the common head and tail are
+# diffed with SequenceMatcher. It is quadratic at worst and holds the GIL in the writer thread,
+# a larger change is stored as one replaced block.
+MAX_MATCHED_LINES = 2000
+
+
+def line_delta(previous: List[bytes], lines: List[bytes]) -> bytes:
+    """Line ops turning ``previous`` into ``lines``.
+
+    Consecutive scrapes nearly always have the same lines in the same order
+    with a few changed values, those are compared position by position. When
+    lines were added or removed, only the part between the common head and
+    tail is diffed.
+    """
+    if len(previous) == len(lines):
+        ops = []
+        index, count = 0, len(lines)
+        while index < count:
+            if previous[index] == lines[index]:
+                index += 1
+                continue
+            start = index
+            while index < count and previous[index] != lines[index]:
+                index += 1
+            ops.append((start, index, start, index))
+    else:
+        head, shortest = 0, min(len(previous), len(lines))
+        while head < shortest and previous[head] == lines[head]:
+            head += 1
+        tail = 0
+        while tail < shortest - head and previous[-1 - tail] == lines[-1 - tail]:
+            tail += 1
+        old, new = previous[head:len(previous) - tail], lines[head:len(lines) - tail]
+        if len(old) + len(new) > MAX_MATCHED_LINES:
+            ops = [(head, head + len(old), head, head + len(new))]
+        else:
+            matcher = SequenceMatcher(None, old, new, autojunk=False)
+            ops = [(head + i1, head + i2, head + j1, head + j2) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+    delta = bytearray()
+    for start, end, new_start, new_end in ops:
+        chunk = b"".join(lines[new_start:new_end])
+        delta += DELTA_OP.pack(start, end, len(chunk))
+        delta += chunk
+    return bytes(delta)
+
+
+def apply_delta(previous: List[bytes], delta: bytes) -> List[bytes]:
+    lines: List[bytes] = []
+    cursor = offset = 0
+    while offset < len(delta):
+        start, end, size = DELTA_OP.unpack_from(delta, offset)
+        offset += DELTA_OP.size
+        lines += previous[cursor:start]
+        lines += delta[offset:offset + size].splitlines(keepends=True)
+        offset += size
+        cursor = end
+    lines += previous[cursor:]
+    return lines
+
+
+class CaptureWriter:
+    """Append-only capture of raw /metrics and /v1/health bodies, see CaptureReader for the layout.
+
+    Like HistoryStore, ``append`` only buffers the body. Diffing against the
+    previous body of the same kind, compressing and writing happen every
+    ``flush_interval`` seconds in a worker thread.
+    """
+
+    def __init__(self, path: str, urls: Dict[str, Optional[str]], flush_interval: float = 10, level: int = 6):
+        self.path = path
+        self.urls = urls
+        self.flush_interval = flush_interval
+        self.level = level
+        self.frames = 0
+        self.body_bytes = 0
+        self.written_bytes = 0
+        self._pending: List[Tuple[float, int, bytes]] = []
+        self._previous: Dict[int, List[bytes]] = {}  # Lines of the last body written per kind, touched by the writer only
+        self._since_keyframe: Dict[int, int] = {}
+        self._session_marked = False
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def append(self, kind: str, body: bytes):
+        self._pending.append((time.time(), KINDS.index(kind), body))
+
+    def header(self) -> bytes:
+        urls = json.dumps(self.urls).encode()
+        return MAGIC + struct.pack("<H", len(urls)) + urls
+
+    def encode(self, kind: int, body: bytes) -> Tuple[int, bytes]:
+        lines = body.splitlines(keepends=True)
+        previous = self._previous.get(kind)
+        self._previous[kind] = lines
+        if previous is not None and self._since_keyframe[kind] < KEYFRAME_INTERVAL:
+            delta = line_delta(previous, lines)
+            if len(delta) < len(body):
+                self._since_keyframe[kind] += 1
+                return DELTA, delta
+        self._since_keyframe[kind] = 1
+        return FULL, body
+
+    def _write(self, batch: List[Tuple[float, int, bytes]]):
+        frames = bytearray()
+        for timestamp, kind, body in batch:
+            encoding, data = self.encode(kind, body)
+            payload = zlib.compress(data, self.level)
+            frames += FRAME.pack(timestamp, kind, encoding, len(payload))
+            frames += payload
+            self.body_bytes += len(body)
+        with open(self.path, "ab") as capture_file:
+            if capture_file.tell() == 0:
+                capture_file.write(self.header())
+            elif not self._session_marked:
+                # Appended to an earlier recording: the replay skips the time in between.
+                capture_file.write(FRAME.pack(batch[0][0], SESSION, FULL, 0))
+            self._session_marked = True
+            capture_file.write(frames)
+        self.frames += len(batch)
+        self.written_bytes += len(frames)
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except OSError as e:
+                logger.error(f"Failed to write {len(batch)} captured responses to {self.path}: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        logger.info(f"Captured {self.frames} responses ({self.body_bytes} B) into {self.written_bytes} B in {self.path}")
+
+
+class CaptureReader:
+    """Frames of a capture file, in the order they were recorded.
+
+    Layout: ``MAGIC``, the length prefixed JSON of the recorded URLs, then
+    one frame per response: ``FRAME`` followed by the zlib compressed body,
+    or by the ``line_delta`` against the previous body of the same kind.
+    Recording sessions appended to an existing file start with an empty
+    ``SESSION`` frame and full bodies.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as capture_file:
+            magic = capture_file.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a capture file")
+            (length,) = struct.unpack("<H", capture_file.read(2))
+            self.urls: Dict[str, Optional[str]] = json.loads(capture_file.read(length))
+            self.data_offset = capture_file.tell()
+
+    def __iter__(self) -> Iterator[Tuple[float, str, bytes]]:
+        for timestamp, kind, body, _ in self.frames():
+            yield timestamp, kind, body
+
+    def frames(self, kind: Optional[str] = None) -> Iterator[Tuple[float, str, bytes, float]]:
+        """``(timestamp, kind, body, paused)`` of every frame, or only of ``kind``.
+
+        Frames of other kinds are skipped without being read, so one reader
+        per kind keeps a single body in memory however the kinds interleave.
+        ``paused`` is the time between the recording sessions before the frame.
+        """
+        previous: Dict[int, List[bytes]] = {}
+        paused = 0.0
+        last: Optional[float] = None  # Recorded time of the last frame of any kind
+        with open(self.path, "rb") as capture_file:
+            capture_file.seek(self.data_offset)
+            while True:
+                head = capture_file.read(FRAME.size)
+                if not head:
+                    return
+                if len(head) < FRAME.size:
+                    logger.warning(f"Capture {self.path} ends with a partially written frame, ignored")
+                    return
+                timestamp, index, encoding, size = FRAME.unpack(head)
+                if index == SESSION:
+                    paused += max(timestamp - last, 0.0) if last is not None else 0.0
+                    last = timestamp
+                    continue
+                last = timestamp
+                if kind is not None and KINDS[index] != kind:
+                    capture_file.seek(size, os.SEEK_CUR)
+                    continue
+                payload = capture_file.read(size)
+                if len(payload) < size:
+                    logger.warning(f"Capture {self.path} ends with a partially written frame, ignored")
+                    return
+                data = zlib.decompress(payload)
+                if encoding == FULL:
+                    lines = data.splitlines(keepends=True)
+                elif index in previous:
+                    lines = apply_delta(previous[index], data)
+                else:
+                    continue  # A delta without its base, the next full body resynchronizes
+                previous[index] = lines
+                yield timestamp, KINDS[index], b"".join(lines), paused
+
+
+class ReplaySession(AioHttpCalls):
+    """Serves the bodies of a capture file in place of the node, at the pace they were recorded.
+
+    ``speed`` scales the recorded gaps between responses (10 replays ten
+    times faster), 0 serves them as fast as they are polled. Every kind is
+    read and paced on its own against the same clock, the time between
+    appended recording sessions is skipped. Once the metrics run out
+    ``finished`` is set and further polls wait forever, so the last state
+    stays on screen.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.reader = CaptureReader(path)
+        super().__init__(storage_rpc=self.reader.urls.get("rpc"), storage_metrics=self.reader.urls.get("metrics"))
+        self.speed = speed
+        self.finished = asyncio.Event()
+        self.replayed_at: Optional[float] = None  # Recorded time of the last metrics body served
+        self._frames = {kind: self.reader.frames(kind) for kind in KINDS}
+        self._started: Optional[Tuple[float, float]] = None  # (recorded time, loop time) of the first body served
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        for task in self._prefetched.values():
+            task.cancel()
+        self._prefetched.clear()
+        for frames in self._frames.values():
+            frames.close()
+
+    def clock(self) -> float:
+        """Timestamp for the snapshot parsed from the last metrics body: when it was recorded."""
+        return self.replayed_at if self.replayed_at is not None else time.time()
+
+    async def _fetch(self, url: str, ssl: bool, line_filter) -> Optional[bytes]:
+        kind = "metrics" if url == self.storage_metrics else "status"
+        frame = next(self._frames[kind], None)
+        if frame is None:
+            if kind == "metrics" and not self.finished.is_set():
+                logger.info(f"Replay of {self.reader.path} finished")
+                self.finished.set()
+            await asyncio.Future()
+        timestamp, _, body, paused = frame
+
+        loop = asyncio.get_running_loop()
+        if self._started is None:
+            self._started = (timestamp - paused, loop.time())
+        delay = self._started[1] + (timestamp - paused - self._started[0]) / self.speed - loop.time() if self.speed > 0 else 0
+        await asyncio.sleep(max(delay, 0))
+
+        if kind == "metrics":
+            self.replayed_at = timestamp
+        self.request_stats.setdefault(url, RequestStats()).record(200, 0.0, len(body), len(body), None)
+        if line_filter is not None:
+            line_filter.feed(body)
+            body = line_filter.result()
+        return body
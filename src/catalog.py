@@ -0,0 +1,164 @@
+from typing import Dict, Optional, Tuple
+
+# Metric types: sample values of gauges and counters are read as ints, an info
+# metric is read from one of its labels, histograms from their _bucket and _sum series.
+METRIC_TYPES = ("gauge", "counter", "info", "histogram")
+
+
+class MetricSpec:
+    """One value read from /metrics into ``MetricsSnapshot.<field>``.
+
+    ``labels`` select the sample, extra labels or another label order on the
+    node still match. ``missing`` replaces a value the node does not present,
+    ``warn`` logs when that happens. ``graph`` keeps it as a graph series and
+    ``rate`` derives a per second rate for it.
+    """
+
+    __slots__ = ("field", "name", "labels", "type", "label", "title", "missing", "warn", "graph", "rate")
+
+    def __init__(
+        self,
+        field: str,
+        name: str,
+        type: str = "gauge",
+        labels: Optional[Dict[str, str]] = None,
+        label: Optional[str] = None,
+        title: Optional[str] = None,
+        missing=None,
+        warn: bool = False,
+        graph: bool = False,
+        rate: bool = False,
+    ):
+        if type not in METRIC_TYPES:
+            raise ValueError(f"Unknown metric type {type} of {field}")
+        if (type == "info") != (label is not None):
+            raise ValueError(f"{field}: the label to read is required for info metrics and only for them")
+        self.field = field
+        self.name = name
+        self.type = type
+        self.labels = labels or {}
+        self.label = label
+        self.title = title or field
+        self.missing = missing
+        self.warn = warn
+        self.graph = graph
+        self.rate = rate
+
+    @property
+    def numeric(self) -> bool:
+        return self.type in ("gauge", "counter")
+
+    def describe(self) -> str:
+        """Name and label values for log messages, e.g. ``walrus_event_cursor_progress [pending]``."""
+        return f"{self.name} [{','.join(self.labels.values())}]" if self.labels else self.name
+
+
+class PanelSpec:
+    """One box of the dashboard layout.
+
+    ``number`` shows ``field`` as a big figlet number (in ``alert_color``
+    while it is above zero) and ``graph`` plots its series. Any other style
+    names a panel a renderer draws by hand, e.g. ``create_status_panel`` or
+    ``draw_status``, from the data ``sources``.
+    """
+
+    __slots__ = ("name", "style", "title", "color", "field", "alert_color", "ratio", "sources")
+
+    def __init__(
+        self,
+        name: str,
+        style: str,
+        title: str,
+        color: str = "cyan",
+        field: Optional[str] = None,
+        alert_color: Optional[str] = None,
+        ratio: int = 1,
+        sources: Optional[Tuple[str, ...]] = None,
+    ):
+        self.name = name
+        self.style = style
+        self.title = title
+        self.color = color
+        self.field = field
+        self.alert_color = alert_color
+        self.ratio = ratio
+        if sources is None:
+            sources = ("metrics", "view") if style == "graph" else ("metrics",)
+        self.sources = sources
+
+    def color_for(self, value) -> str:
+        return self.alert_color if self.alert_color and isinstance(value, int) and value > 0 else self.color
+
+
+# Everything read from /metrics, in snapshot and on-disk history column order. A metric
+# added here is scraped, parsed, kept in history and exported, a panel shows it.
+METRICS = (
+    MetricSpec("chain", "uptime", "info", label="chain_identifier", missing="N/A"),
+    MetricSpec("version", "walrus_build_info", "info", label="version", missing="N/A"),
+    MetricSpec("uptime", "uptime"),
+    MetricSpec("workers_num", "checkpoint_downloader_num_workers"),
+    MetricSpec("total_downloaded_checkpoints", "event_processor_total_downloaded_checkpoints", "counter", rate=True),
+    MetricSpec("pending_events", "walrus_event_cursor_progress", labels={"state": "pending"}, warn=True, graph=True, rate=True),
+    MetricSpec("persisted_events", "walrus_event_cursor_progress", labels={"state": "persisted"}, warn=True, graph=True, rate=True),
+    MetricSpec("highest_finished_event", "walrus_event_cursor_progress", labels={"state": "highest_finished"}, warn=True, graph=True, rate=True),
+    MetricSpec("confirmations_issued_total", "walrus_storage_confirmations_issued_total", "counter", warn=True, graph=True, rate=True),
+    MetricSpec("latest_downloaded_checkpoint", "event_processor_latest_downloaded_checkpoint", warn=True, graph=True, rate=True),
+    MetricSpec("checkpoint_downloader_lag", "checkpoint_downloader_checkpoint_lag", warn=True, graph=True, rate=True),
+    MetricSpec("recover_blob_backlog_in_progress", "walrus_recover_blob_backlog", labels={"state": "in-progress"}, missing=0, warn=True),
+    MetricSpec("recover_blob_backlog_queued", "walrus_recover_blob_backlog", labels={"state": "queued"}, missing=0, warn=True, graph=True),
+    MetricSpec("request_latency", "walrus_http_request_duration_seconds", "histogram", title="Requests"),
+    MetricSpec("event_latency", "walrus_event_processing_duration_seconds", "histogram", title="Event processing"),
+)
+
+# Rows of the dashboard from top to bottom: (name, height ratio, boxes from left to right).
+LAYOUT = (
+    ("header", 1, (
+        PanelSpec("Status", "status", "NODE INFO", ratio=2, sources=("metrics", "status")),
+        PanelSpec("Shards", "shards", "SHARDS", ratio=1, sources=("status",)),
+        PanelSpec("Checkpoint Lag", "number", "CHECKPOINTS LAG", "green", "checkpoint_downloader_lag", alert_color="red", ratio=3),
+        PanelSpec("Blob_Recover_Backlog_In_Progress", "number", "BLOBS RECOVER (in progress)", "green", "recover_blob_backlog_in_progress", alert_color="yellow", ratio=3),
+        PanelSpec("Total Persisted Events", "number", "PERSISTED EVENTS", "green", "persisted_events", ratio=3),
+        PanelSpec("Total Downloaded Checkpoints", "number", "TOTAL DOWNLOADED CHECKPOINTS", "cyan", "total_downloaded_checkpoints", ratio=3),
+    )),
+    ("main", 3, (
+        PanelSpec("Latest Downloaded Checkpoint", "graph", "Latest Checkpoint", "green", "latest_downloaded_checkpoint"),
+        PanelSpec("Blob_Recover_Backlog_Queued", "graph", "Blobs Recover Queued", "yellow", "recover_blob_backlog_queued"),
+        PanelSpec("Confirmations Issued", "graph", "Confirmations", "cyan", "confirmations_issued_total"),
+        PanelSpec("Throughput", "throughput", "THROUGHPUT"),
+    )),
+    ("events", 3, (
+        PanelSpec("Persisted Events", "graph", "Persisted Events", "green", "persisted_events"),
+        PanelSpec("Pending Events", "graph", "Pending Events", "red", "pending_events"),
+        PanelSpec("Highest Finished Event", "graph", "Highest Finished Event", "cyan", "highest_finished_event"),
+        PanelSpec("Catch Up", "catch_up", "CATCH UP"),
+    )),
+    ("latency", 1, (
+        PanelSpec("Latency", "latency", "LATENCY"),
+    )),
+)
+
+# Appended below LAYOUT with --instrument. Redrawn with every scrape, not every frame,
+# so the panel does not keep the screen busy by itself.
+DEBUG_ROW = ("debug", 1, (PanelSpec("Stages", "stages", "STAGE TIMINGS", "magenta", sources=("metrics", "status")),))
+
+SCALAR_METRICS = tuple(metric for metric in METRICS if metric.type != "histogram")
+HISTOGRAM_METRICS = tuple(metric for metric in METRICS if metric.type == "histogram")
+
+
+def metric(field: str) -> MetricSpec:
+    for spec in METRICS:
+        if spec.field == field:
+            return spec
+    raise KeyError(field)
+
+
+def layout_rows(instrumented: bool = False) -> tuple:
+    """LAYOUT with the debug row when instrumented, checked against METRICS once at startup."""
+    rows = LAYOUT + ((DEBUG_ROW,) if instrumented else ())
+    for _, _, panels in rows:
+        for panel in panels:
+            if panel.style in ("number", "graph"):
+                spec = metric(panel.field)
+                if panel.style == "graph" and not spec.graph:
+                    raise ValueError(f"Panel {panel.name} plots {panel.field}, which is not kept as a graph series")
+    return rows
@@ -0,0 +1,454 @@
+import asyncio
+import json
+import math
+import os
+import stat
+import struct
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+from src.aio_http_client import AioHttpCalls
+from src.catalog import HISTOGRAM_METRICS, SCALAR_METRICS
+from src.history_store import HISTORY_FIELDS, MISSING, HistoryStore
+from src.instrumentation import Instrumentation
+from src.metrics_parser import MetricsSnapshot
+from src.node_health import NodeHealth
+from src.parse_executor import ParseMode
+from src.series import GRAPH_VIEWS
+from src.storage_collector import StorageCollector
+from utils.logger import logger
+
+MAGIC = b"RWFEED01"
+HELLO, HISTORY, SNAPSHOT, STATUS = range(4)
+# Frame kind and size of the payload that follows.
+FRAME = struct.Struct("<BI")
+# Timestamp and parse duration (NaN when unknown), followed by the bitmap of changed scalar fields.
+SNAPSHOT_HEAD = struct.Struct("<dd")
+BITMAP_SIZE = (len(SCALAR_METRICS) + 7) // 8
+INT = struct.Struct("<q")
+TEXT_SIZE = struct.Struct("<H")
+NO_TEXT = 0xFFFF  # TEXT_SIZE of an info value the node did not present
+# Histogram flag and number of finite buckets, then bounds (WITH_BOUNDS only), counts, sum and count as doubles.
+HISTOGRAM_HEAD = struct.Struct("<BH")
+ABSENT, SAME_BOUNDS, WITH_BOUNDS = range(3)
+TOTALS = struct.Struct("<dd")
+# One past scrape of the graph history, the same layout as a HistorySegment record.
+HISTORY_RECORD = struct.Struct("<d" + "q" * len(HISTORY_FIELDS))
+# A subscriber with more unsent bytes than this when the next scrape is published is dropped.
+MAX_CLIENT_BUFFER = 4 * 1024 * 1024
+# The catch-up (up to a day of history) is written in pieces of this size, each one drained
+# before the next, so it never counts against MAX_CLIENT_BUFFER.
+CATCH_UP_CHUNK = 256 * 1024
+
+
+def layout() -> dict:
+    """What both ends must agree on to read SNAPSHOT and HISTORY frames."""
+    return {
+        "fields": [metric.field for metric in SCALAR_METRICS],
+        "histograms": [metric.name for metric in HISTOGRAM_METRICS],
+        "history": list(HISTORY_FIELDS),
+    }
+
+
+def frame(kind: int, payload: bytes) -> bytes:
+    return FRAME.pack(kind, len(payload)) + payload
+
+
+def encode_snapshot(snapshot: MetricsSnapshot, previous: Optional[MetricsSnapshot] = None) -> bytes:
+    """SNAPSHOT payload holding only the scalar fields that differ from ``previous``.
+
+    Between two scrapes most fields stay the same and cost one bit each,
+    histogram bounds are only sent when they changed. Without ``previous``
+    every field is sent.
+    """
+    changed = 0
+    values = bytearray()
+    for index, metric in enumerate(SCALAR_METRICS):
+        value = getattr(snapshot, metric.field)
+        if previous is not None and getattr(previous, metric.field) == value:
+            continue
+        changed |= 1 << index
+        if metric.numeric:
+            values += INT.pack(MISSING if value is None else int(value))
+        elif value is None:
+            values += TEXT_SIZE.pack(NO_TEXT)
+        else:
+            text = str(value).encode()[:NO_TEXT - 1]
+            values += TEXT_SIZE.pack(len(text)) + text
+
+    parse_duration = snapshot.parse_duration
+    payload = bytearray(SNAPSHOT_HEAD.pack(snapshot.timestamp, math.nan if parse_duration is None else parse_duration))
+    payload += changed.to_bytes(BITMAP_SIZE, "little")
+    payload += values
+
+    histograms = snapshot.histograms or {}
+    previous_histograms = (previous.histograms or {}) if previous is not None else {}
+    for metric in HISTOGRAM_METRICS:
+        histogram = histograms.get(metric.name)
+        if histogram is None:
+            payload += HISTOGRAM_HEAD.pack(ABSENT, 0)
+            continue
+        bounds = histogram["bounds"]
+        last = previous_histograms.get(metric.name)
+        same_bounds = last is not None and last["bounds"] == bounds
+        doubles = struct.Struct(f"<{len(bounds)}d")
+        payload += HISTOGRAM_HEAD.pack(SAME_BOUNDS if same_bounds else WITH_BOUNDS, len(bounds))
+        if not same_bounds:
+            payload += doubles.pack(*bounds)
+        payload += doubles.pack(*histogram["counts"])
+        payload += TOTALS.pack(histogram["sum"], histogram["count"])
+    return bytes(payload)
+
+
+def decode_snapshot(payload: bytes, previous: Optional[MetricsSnapshot] = None) -> MetricsSnapshot:
+    """Inverse of ``encode_snapshot``, unchanged fields are taken from ``previous``."""
+    timestamp, parse_duration = SNAPSHOT_HEAD.unpack_from(payload)
+    offset = SNAPSHOT_HEAD.size
+    changed = int.from_bytes(payload[offset:offset + BITMAP_SIZE], "little")
+    offset += BITMAP_SIZE
+
+    values = {"timestamp": timestamp, "parse_duration": None if math.isnan(parse_duration) else parse_duration}
+    for index, metric in enumerate(SCALAR_METRICS):
+        if not changed >> index & 1:
+            values[metric.field] = getattr(previous, metric.field) if previous is not None else None
+        elif metric.numeric:
+            (value,) = INT.unpack_from(payload, offset)
+            offset += INT.size
+            values[metric.field] = None if value == MISSING else value
+        else:
+            (size,) = TEXT_SIZE.unpack_from(payload, offset)
+            offset += TEXT_SIZE.size
+            if size == NO_TEXT:
+                values[metric.field] = None
+            else:
+                values[metric.field] = payload[offset:offset + size].decode()
+                offset += size
+
+    histograms = {}
+    previous_histograms = (previous.histograms or {}) if previous is not None else {}
+    for metric in HISTOGRAM_METRICS:
+        flag, count = HISTOGRAM_HEAD.unpack_from(payload, offset)
+        offset += HISTOGRAM_HEAD.size
+        if flag == ABSENT:
+            continue
+        doubles = struct.Struct(f"<{count}d")
+        if flag == WITH_BOUNDS:
+            bounds = list(doubles.unpack_from(payload, offset))
+            offset += doubles.size
+        else:
+            bounds = previous_histograms[metric.name]["bounds"]
+        counts = list(doubles.unpack_from(payload, offset))
+        offset += doubles.size
+        total, observations = TOTALS.unpack_from(payload, offset)
+        offset += TOTALS.size
+        histograms[metric.name] = {"bounds": bounds, "counts": counts, "sum": total, "count": observations}
+    values["histograms"] = histograms
+    return MetricsSnapshot(**values)
+
+
+def encode_history_record(timestamp: float, values: dict) -> bytes:
+    return HISTORY_RECORD.pack(timestamp, *(MISSING if values.get(field) is None else int(values[field]) for field in HISTORY_FIELDS))
+
+
+def decode_history(payload: bytes):
+    """``(timestamp, values)`` of every record of a HISTORY payload."""
+    for record in HISTORY_RECORD.iter_unpack(payload):
+        yield record[0], {field: None if value == MISSING else value for field, value in zip(HISTORY_FIELDS, record[1:])}
+
+
+class CollectorDaemon(StorageCollector):
+    """The one process polling and parsing the node, fanning its snapshots out to dashboards over a Unix socket.
+
+    Every scrape is encoded once, as a SNAPSHOT frame with only what changed
+    since the previous one, and the same bytes are written to every
+    subscriber. Another viewer costs the node nothing and the daemon one
+    socket write per scrape. A subscriber that connects first gets the
+    layout, the graph history of the longest view, the snapshots of the last
+    rate window and the node status, then the live frames.
+    """
+
+    def __init__(
+        self,
+        session: AioHttpCalls,
+        refresh_metrics_rate: int,
+        refresh_node_rpc_rate: int,
+        graph_size: int,
+        socket_path: str,
+        parse_mode: ParseMode = "inline",
+        history: Optional[HistoryStore] = None,
+        poll_jitter: float = 0.1,
+        poll_timeout: Optional[float] = 10,
+        poll_max_backoff: float = 60,
+        full_scrape: bool = False,
+        rate_window: float = 60,
+        instrumentation: Optional[Instrumentation] = None,
+        refresh_metrics_min: Optional[float] = None,
+        refresh_metrics_max: Optional[float] = None,
+        request_budget: Optional[int] = None,
+        clock: Optional[Callable[[], float]] = None,
+        max_client_buffer: int = MAX_CLIENT_BUFFER,
+    ):
+        super().__init__(
+            session=session,
+            refresh_metrics_rate=refresh_metrics_rate,
+            refresh_node_rpc_rate=refresh_node_rpc_rate,
+            graph_size=graph_size,
+            parse_mode=parse_mode,
+            history=history,
+            poll_jitter=poll_jitter,
+            poll_timeout=poll_timeout,
+            poll_max_backoff=poll_max_backoff,
+            full_scrape=full_scrape,
+            rate_window=rate_window,
+            instrumentation=instrumentation,
+            refresh_metrics_min=refresh_metrics_min,
+            refresh_metrics_max=refresh_metrics_max,
+            request_budget=request_budget,
+            clock=clock,
+        )
+        self.socket_path = socket_path
+        self.max_client_buffer = max_client_buffer
+        self.history_span = max(seconds or 0 for seconds in GRAPH_VIEWS.values())
+        self.history_records: Deque[Tuple[float, bytes]] = deque()  # HISTORY_RECORD of every scrape in the history span
+        self.recent: Deque[MetricsSnapshot] = deque()  # Snapshots of the last rate window, sent whole to new subscribers
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self._joining: Dict[asyncio.StreamWriter, bytearray] = {}  # Live frames held back while the catch-up is sent
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self._published: Optional[MetricsSnapshot] = None  # Base of the next SNAPSHOT delta
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def apply_history_record(self, timestamp: float, values: dict):
+        self.keep_history_record(timestamp, encode_history_record(timestamp, values))
+        super().apply_history_record(timestamp, values)
+
+    def apply_snapshot(self, snapshot: MetricsSnapshot):
+        super().apply_snapshot(snapshot)
+        self.keep_history_record(snapshot.timestamp, encode_history_record(snapshot.timestamp, snapshot.to_dict()))
+        self.recent.append(snapshot)
+        # The newest snapshot at or before the window start stays as the baseline of the latency windows.
+        while len(self.recent) > 2 and self.recent[1].timestamp <= snapshot.timestamp - self.rates.window:
+            self.recent.popleft()
+        self.broadcast(frame(SNAPSHOT, encode_snapshot(snapshot, self._published)))
+        self._published = snapshot
+
+    def apply_health(self, health: NodeHealth):
+        super().apply_health(health)
+        self.broadcast(frame(STATUS, json.dumps(health.to_dict()).encode()))
+
+    def keep_history_record(self, timestamp: float, record: bytes):
+        self.history_records.append((timestamp, record))
+        while self.history_records[0][0] < timestamp - self.history_span:
+            self.history_records.popleft()
+
+    def catch_up(self) -> bytes:
+        """Everything a new subscriber needs to show the same state as the daemon."""
+        frames = [frame(HELLO, MAGIC + json.dumps(layout()).encode())]
+        # Scrapes of the rate window are sent whole below, the history stops where they start.
+        start = self.recent[0].timestamp if self.recent else math.inf
+        records = b"".join(record for timestamp, record in self.history_records if timestamp < start)
+        if records:
+            frames.append(frame(HISTORY, records))
+        previous = None
+        for snapshot in self.recent:
+            frames.append(frame(SNAPSHOT, encode_snapshot(snapshot, previous)))
+            previous = snapshot
+        if self.health is not None:
+            frames.append(frame(STATUS, json.dumps(self.health.to_dict()).encode()))
+        return b"".join(frames)
+
+    def broadcast(self, data: bytes):
+        for writer, held in list(self._joining.items()):
+            held += data
+            if len(held) > self.max_client_buffer:
+                self.drop(writer, len(held))
+        for writer in list(self.clients):
+            backlog = writer.transport.get_write_buffer_size()
+            if backlog > self.max_client_buffer:
+                self.drop(writer, backlog)
+                continue
+            writer.write(data)
+            self.frames_sent += 1
+            self.bytes_sent += len(data)
+
+    def drop(self, writer: asyncio.StreamWriter, backlog: int):
+        # Never waited for: a stuck viewer must not hold up the others or the pollers.
+        logger.warning(f"Dropping a dashboard that is {backlog} B behind, it catches up when it reconnects")
+        self.dropped += 1
+        self._joining.pop(writer, None)
+        self.clients.discard(writer)
+        writer.transport.abort()  # Its unsent bytes are thrown away, close() would keep them until it reads
+
+    def disconnect(self, writer: asyncio.StreamWriter):
+        self.clients.discard(writer)
+        writer.close()
+
+    async def send_catch_up(self, writer: asyncio.StreamWriter) -> int:
+        """Write the catch-up, then the frames published meanwhile, and register ``writer`` for the live frames."""
+        data = self.catch_up()
+        self._joining[writer] = bytearray()
+        try:
+            for offset in range(0, len(data), CATCH_UP_CHUNK):
+                writer.write(data[offset:offset + CATCH_UP_CHUNK])
+                await writer.drain()
+        finally:
+            held = self._joining.pop(writer, None)
+        if held is None:
+            raise ConnectionResetError("dropped during the catch-up")
+        # No await from here on: the held frames are exactly the ones published since the catch-up was built.
+        writer.write(held)
+        self.clients.add(writer)
+        self.bytes_sent += len(data) + len(held)
+        return len(data)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            size = await self.send_catch_up(writer)
+            logger.info(f"Dashboard connected, sent {size} B of history ({len(self.clients)} connected)")
+            await reader.read()  # Subscribers never send anything, EOF means they left
+        except ConnectionError:
+            pass
+        finally:
+            if writer in self.clients:
+                self.disconnect(writer)
+            logger.info(f"Dashboard disconnected ({len(self.clients)} connected)")
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self.clients),
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": self.dropped,
+            "history_records": len(self.history_records),
+        }
+
+    def instrument_stages(self, instrumentation: Instrumentation):
+        super().instrument_stages(instrumentation)
+        instrumentation.add_counters("fan-out", self.stats)
+
+    def remove_stale_socket(self):
+        try:
+            if stat.S_ISSOCK(os.stat(self.socket_path).st_mode):
+                os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    async def start(self):
+        self.remove_stale_socket()
+        self._server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+        logger.info(f"Collector daemon serving snapshots on {self.socket_path}")
+        await self.start_after_history()
+        try:
+            # The pollers do all the work, snapshots are published as soon as they are applied.
+            await asyncio.Event().wait()
+        finally:
+            self._server.close()
+            for writer in list(self.clients):
+                self.disconnect(writer)
+            await self.stop_services()
+            self.remove_stale_socket()
+            logger.info(f"Collector daemon stopped: {self.stats()}")
+
+
+class DaemonSubscriber:
+    """Feeds a collector from a CollectorDaemon in place of its pollers.
+
+    Snapshots and node status are decoded from the socket and applied as if
+    they had been scraped here, so dashboards, renderers and the exporter
+    work unchanged while the node is never polled. A lost daemon is retried
+    with backoff, the catch-up on reconnect fills the gap in the graphs.
+    """
+
+    def __init__(self, collector: StorageCollector, socket_path: str, max_backoff: float = 60):
+        self.collector = collector
+        self.socket_path = socket_path
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.connects = 0
+        self.failures = 0
+        self.frames = 0
+        self.bytes_received = 0
+        self.last_frame: Optional[float] = None  # Wall clock time of the last frame received
+        self._previous: Optional[MetricsSnapshot] = None  # Base of the next SNAPSHOT delta
+        self._task: Optional[asyncio.Task] = None
+
+    def apply_frame(self, kind: int, payload: bytes):
+        collector = self.collector
+        if kind == HELLO:
+            if payload[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{self.socket_path} is not a collector daemon socket")
+            if json.loads(payload[len(MAGIC):]) != layout():
+                raise ValueError(f"The collector daemon at {self.socket_path} reads a different metric catalog")
+        elif kind == HISTORY:
+            count = 0
+            for timestamp, values in decode_history(payload):
+                collector.apply_history_record(timestamp, values)
+                count += 1
+            collector.bump_version("metrics")
+            logger.info(f"Received {count} history records from the collector daemon")
+        elif kind == SNAPSHOT:
+            self._previous = decode_snapshot(payload, self._previous)
+            collector.apply_snapshot(self._previous)
+        elif kind == STATUS:
+            collector.apply_health(NodeHealth(**json.loads(payload)))
+        # Other kinds come from a newer daemon and are skipped.
+
+    async def receive(self, reader: asyncio.StreamReader):
+        while True:
+            kind, size = FRAME.unpack(await reader.readexactly(FRAME.size))
+            payload = await reader.readexactly(size)
+            self.frames += 1
+            self.bytes_received += FRAME.size + size
+            self.last_frame = time.time()
+            self.apply_frame(kind, payload)
+
+    async def _run(self):
+        consecutive_failures = 0
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            except OSError as e:
+                logger.error(f"Cannot connect to the collector daemon at {self.socket_path}: {e}")
+            else:
+                self.connected = True
+                self.connects += 1
+                consecutive_failures = 0
+                self._previous = None
+                logger.info(f"Connected to the collector daemon at {self.socket_path}")
+                try:
+                    await self.receive(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    logger.error(f"Lost the collector daemon at {self.socket_path}")
+                except Exception as e:
+                    logger.error(f"An error occurred while reading from the collector daemon: {e}")
+                finally:
+                    self.connected = False
+                    writer.close()
+            self.failures += 1
+            consecutive_failures += 1
+            await asyncio.sleep(min(2 ** (consecutive_failures - 1), self.max_backoff))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="daemon-subscriber")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "failures": self.failures,
+            "frames": self.frames,
+            "bytes": self.bytes_received,
+            "last_frame": self.last_frame,
+        }
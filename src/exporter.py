@@ -0,0 +1,151 @@
+import gzip
+from typing import Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from src.catalog import SCALAR_METRICS
+from src.rates import ETA_FIELDS
+from src.storage_collector import StorageCollector
+from utils.logger import logger
+
+TEXT_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Numeric snapshot fields re-exported under the node's own metric name, type and labels.
+EXPORTED_FIELDS = tuple(
+    (metric.field, metric.name, metric.type, ",".join(f'{key}="{escape_label(value)}"' for key, value in metric.labels.items()))
+    for metric in SCALAR_METRICS if metric.numeric
+)
+
+
+def format_value(value) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def render_exposition(families: List[Tuple[str, str, str, List[Tuple[str, object]]]], openmetrics: bool = False) -> bytes:
+    """Render ``(name, type, help, [(labels, value), ...])`` families in the Prometheus text or OpenMetrics format.
+
+    Counters follow the format rules: in OpenMetrics the family is named
+    without the ``_total`` suffix and its samples always carry it.
+    """
+    lines = []
+    for name, metric_type, help_text, samples in families:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            continue
+        family = name
+        if openmetrics and metric_type == "counter":
+            family = name[:-len("_total")] if name.endswith("_total") else name
+            name = family + "_total"
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {metric_type}")
+        for labels, value in samples:
+            lines.append(f"{name}{{{labels}}} {format_value(value)}" if labels else f"{name} {format_value(value)}")
+    if openmetrics:
+        lines.append("# EOF")
+    return ("\n".join(lines) + "\n").encode()
+
+
+class MetricsExporter:
+    """Serves the curated node metrics and derived rates on ``/metrics`` from the dashboard's event loop.
+
+    The exposition is rendered once per new snapshot or node status and kept,
+    plain and gzipped, for each format. Any number of scrapers in between
+    are answered with the cached bytes.
+    """
+
+    def __init__(self, collector: StorageCollector, host: str = "127.0.0.1", port: int = 9200):
+        self.collector = collector
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.renders = 0
+        self._cache: Dict[Tuple[bool, bool], bytes] = {}
+        self._cached_version: Optional[tuple] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    def families(self) -> list:
+        collector = self.collector
+        snapshot = collector.snapshot
+        families: Dict[Tuple[str, str], list] = {}
+        if snapshot is not None:
+            for field, name, metric_type, labels in EXPORTED_FIELDS:
+                families.setdefault((name, metric_type), []).append((labels, getattr(snapshot, field)))
+        node_families = [
+            (name, metric_type, "Re-exported from the storage node", samples)
+            for (name, metric_type), samples in families.items()
+        ]
+
+        info_labels = f'chain_identifier="{escape_label(collector.chain)}",version="{escape_label(collector.version)}",status="{escape_label(collector.status)}"'
+        status = collector.status_dict()
+        shard_samples = [
+            (f'state="{state}"', int(status[key]) if str(status[key]).isdigit() else None)
+            for state, key in (
+                ("owned", "shards_owned"),
+                ("ready", "shards_ready"),
+                ("in_transfer", "shards_in_transfer"),
+                ("in_recovery", "shards_in_recovery"),
+                ("unknown", "shards_unknown"),
+            )
+        ]
+        rates = collector.rates
+        return node_families + [
+            ("walrus_dashboard_node_info", "gauge", "Node identity and status from /metrics and /v1/health", [(info_labels, 1)]),
+            ("walrus_dashboard_epoch", "gauge", "Current epoch from /v1/health", [("", int(collector.epoch) if str(collector.epoch).isdigit() else None)]),
+            ("walrus_dashboard_shards", "gauge", "Owned shards by state from /v1/health", shard_samples),
+            ("walrus_dashboard_rate", "gauge", "Per second rate between the two last scrapes", [(f'series="{field}"', rates.rate(field)) for field in rates.trackers]),
+            ("walrus_dashboard_rate_smoothed", "gauge", "Time weighted EWMA of the per second rate", [(f'series="{field}"', rates.smoothed(field)) for field in rates.trackers]),
+            ("walrus_dashboard_eta_seconds", "gauge", "Seconds until the backlog is drained at the smoothed rate", [(f'backlog="{field}"', rates.eta(field)) for field in ETA_FIELDS]),
+            ("walrus_dashboard_latency_seconds", "gauge", "Latency quantile over the rate window from the node's histogram buckets", [
+                (f'histogram="{escape_label(title)}",quantile="{quantile:g}"', window.quantile(quantile))
+                for title, window in collector.latency.items() for quantile in window.quantiles
+            ]),
+            ("walrus_dashboard_latency_observations_rate", "gauge", "Per second rate of observations into the node's latency histograms", [
+                (f'histogram="{escape_label(title)}"', window.values["rate"]) for title, window in collector.latency.items()
+            ]),
+            ("walrus_dashboard_last_scrape_timestamp_seconds", "gauge", "Time of the last successful node scrape", [("", snapshot.timestamp if snapshot else None)]),
+        ]
+
+    def body(self, openmetrics: bool, gzipped: bool) -> bytes:
+        version = self.collector.data_version("metrics", "status")
+        if version != self._cached_version:
+            self._cache.clear()
+            self._cached_version = version
+        key = (openmetrics, gzipped)
+        body = self._cache.get(key)
+        if body is None:
+            plain = self._cache.get((openmetrics, False))
+            if plain is None:
+                plain = self._cache[(openmetrics, False)] = render_exposition(self.families(), openmetrics)
+                self.renders += 1
+                logger.debug(f"Rendered {'OpenMetrics' if openmetrics else 'text'} exposition: {len(plain)} B")
+            body = self._cache[key] = gzip.compress(plain, compresslevel=6) if gzipped else plain
+        return body
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        openmetrics = "application/openmetrics-text" in request.headers.get("Accept", "")
+        gzipped = "gzip" in request.headers.get("Accept-Encoding", "")
+        headers = {"Content-Type": OPENMETRICS_CONTENT_TYPE if openmetrics else TEXT_CONTENT_TYPE}
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(body=self.body(openmetrics, gzipped), headers=headers)
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Exporting metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        logger.debug(f"Exporter served {self.requests} requests from {self.renders} renders")
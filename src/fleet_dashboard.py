@@ -0,0 +1,218 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+from rich import box
+
+from src.aio_http_client import AioHttpCalls
+from src.metrics_parser import MetricsLineFilter, MetricsSnapshot, StorageMetrics
+from src.node_health import NodeHealth
+from src.parse_executor import MetricsParseExecutor, ParseMode
+from src.scheduler import SourcePoller
+from utils.logger import logger
+
+
+class FleetNode:
+    """Latest known state of one storage node. Holds no history so memory per node stays fixed."""
+
+    __slots__ = (
+        "name",
+        "metrics_url",
+        "rpc_url",
+        "snapshot",
+        "status",
+        "epoch",
+        "shards_owned",
+        "shards_ready",
+        "last_metrics_update",
+        "last_status_update",
+        "errors",
+    )
+
+    def __init__(self, name: str, metrics_url: str, rpc_url: str):
+        self.name = name
+        self.metrics_url = metrics_url
+        self.rpc_url = rpc_url
+        self.snapshot: Optional[MetricsSnapshot] = None
+        self.status = 'N/A'
+        self.epoch = 'N/A'
+        self.shards_owned = 'N/A'
+        self.shards_ready = 'N/A'
+        self.last_metrics_update: Optional[float] = None
+        self.last_status_update: Optional[float] = None
+        self.errors: Dict[str, str] = {}  # Current error per source ("metrics", "rpc"), cleared when that source succeeds
+
+    @property
+    def error(self) -> Optional[str]:
+        return ", ".join(self.errors.values()) or None
+
+    def apply_health(self, health: NodeHealth):
+        self.status = health.status
+        self.epoch = str(health.epoch)
+        self.shards_owned = str(health.shards_owned)
+        self.shards_ready = str(health.shards_ready)
+
+
+def load_fleet_file(path: str) -> List[Tuple[str, str, str]]:
+    """Read `name metrics_url rpc_url` lines. Blank lines and lines starting with # are ignored."""
+    nodes = []
+    with open(path, encoding="utf-8") as fleet_file:
+        for line_number, line in enumerate(fleet_file, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split()
+            if len(parts) != 3:
+                raise ValueError(f"{path}:{line_number}: expected 'name metrics_url rpc_url', got {line!r}")
+            nodes.append((parts[0], parts[1], parts[2]))
+    return nodes
+
+
+class FleetDashboard:
+    """Monitors many storage nodes from one process with a compact per-node summary table.
+
+    All nodes share the session's connection pool. At most ``concurrency``
+    requests are in flight at once, which also caps how many raw /metrics
+    bodies are held in memory at the same time.
+    """
+
+    def __init__(
+        self,
+        session: AioHttpCalls,
+        nodes: List[Tuple[str, str, str]],
+        refresh_per_second: float,
+        refresh_metrics_rate: float,
+        refresh_node_rpc_rate: float,
+        concurrency: int = 32,
+        parse_mode: ParseMode = "inline",
+        poll_jitter: float = 0.1,
+        full_scrape: bool = False,
+    ):
+        self.session = session
+        self.full_scrape = full_scrape
+        self.nodes = [FleetNode(name, metrics_url, rpc_url) for name, metrics_url, rpc_url in nodes]
+        self.refresh_per_second = refresh_per_second
+        self.refresh_metrics_rate = refresh_metrics_rate
+        self.refresh_node_rpc_rate = refresh_node_rpc_rate
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.parser = MetricsParseExecutor(mode=parse_mode)
+        self.console = Console()
+
+        self._version = 0
+        self._rendered_version = None
+
+        # Per node failures are shown in the table, the fleet wide pollers only need their schedule.
+        self.pollers = (
+            SourcePoller("fleet metrics", self.poll_metrics, refresh_metrics_rate, jitter=poll_jitter),
+            SourcePoller("fleet status", self.poll_status, refresh_node_rpc_rate, jitter=poll_jitter),
+        )
+
+    async def update_node_metrics(self, node: FleetNode):
+        async with self.semaphore:
+            line_filter = None if self.full_scrape else MetricsLineFilter(StorageMetrics.METRIC_NAMES)
+            metrics = await self.session.get_storage_metrics(node.metrics_url, line_filter=line_filter)
+            if not metrics:
+                node.errors["metrics"] = "metrics unavailable"
+                return
+            try:
+                node.snapshot = await self.parser.parse(metrics)
+            except Exception as e:
+                logger.error(f"An error occurred while parsing metrics of {node.name}: {e}")
+                node.errors["metrics"] = "metrics parse error"
+                return
+        node.last_metrics_update = asyncio.get_running_loop().time()
+        node.errors.pop("metrics", None)
+
+    async def update_node_status(self, node: FleetNode):
+        async with self.semaphore:
+            health = await self.session.get_storage_status(node.rpc_url)
+        if not health:
+            node.errors["rpc"] = "rpc unavailable"
+            return
+        node.apply_health(health)
+        node.last_status_update = asyncio.get_running_loop().time()
+        node.errors.pop("rpc", None)
+
+    async def poll_metrics(self) -> bool:
+        await asyncio.gather(*(self.update_node_metrics(node) for node in self.nodes))
+        self._version += 1
+        return True
+
+    async def poll_status(self) -> bool:
+        await asyncio.gather(*(self.update_node_status(node) for node in self.nodes))
+        self._version += 1
+        return True
+
+    @staticmethod
+    def _sort_key(node: FleetNode):
+        # Problem nodes first: errors, then not Active, then the biggest checkpoint lag.
+        lag = node.snapshot.checkpoint_downloader_lag if node.snapshot and node.snapshot.checkpoint_downloader_lag is not None else 0
+        return (node.error is None, node.status == "Active", -lag, node.name)
+
+    def create_fleet_table(self) -> Table:
+        now = asyncio.get_running_loop().time()
+        table = Table(
+            title=f"[bold]WALRUS FLEET[/bold] ({len(self.nodes)} nodes)",
+            box=box.SIMPLE_HEAD,
+            expand=True,
+            header_style="bold cyan",
+        )
+        table.add_column("NODE", style="bold")
+        table.add_column("STATUS")
+        table.add_column("EPOCH", justify="right")
+        table.add_column("SHARDS", justify="right")
+        table.add_column("CHECKPOINT", justify="right")
+        table.add_column("LAG", justify="right")
+        table.add_column("PERSISTED", justify="right")
+        table.add_column("PENDING", justify="right")
+        table.add_column("BLOBS RECOVER", justify="right")
+        table.add_column("AGE", justify="right")
+        table.add_column("ERROR", style="red")
+
+        for node in sorted(self.nodes, key=self._sort_key):
+            snapshot = node.snapshot or MetricsSnapshot()
+            lag = snapshot.checkpoint_downloader_lag
+            status_color = "green" if node.status == "Active" else "red"
+            lag_color = "red" if isinstance(lag, int) and lag > 0 else "green"
+            age = f"{now - node.last_metrics_update:.0f}s" if node.last_metrics_update is not None else "N/A"
+            table.add_row(
+                node.name,
+                f"[{status_color}]{node.status}[/{status_color}]",
+                node.epoch,
+                f"{node.shards_ready}/{node.shards_owned}",
+                str(snapshot.latest_downloaded_checkpoint if snapshot.latest_downloaded_checkpoint is not None else 'N/A'),
+                f"[{lag_color}]{lag if lag is not None else 'N/A'}[/{lag_color}]",
+                str(snapshot.persisted_events if snapshot.persisted_events is not None else 'N/A'),
+                str(snapshot.pending_events if snapshot.pending_events is not None else 'N/A'),
+                f"{snapshot.recover_blob_backlog_queued or 0}/{snapshot.recover_blob_backlog_in_progress or 0}",
+                age,
+                node.error or "",
+            )
+        return table
+
+    async def start(self):
+        for poller in self.pollers:
+            poller.start()
+        try:
+            with Live(
+                self.create_fleet_table(),
+                console=self.console,
+                refresh_per_second=self.refresh_per_second,
+                auto_refresh=False,
+                screen=True,
+            ) as live:
+                while True:
+                    # The AGE column is in whole seconds: the table is also rebuilt when the second changes,
+                    # so a node that stopped answering shows its age growing.
+                    version = (self._version, int(asyncio.get_running_loop().time()))
+                    if version != self._rendered_version:
+                        self._rendered_version = version
+                        live.update(self.create_fleet_table(), refresh=True)
+                    await asyncio.sleep(1 / self.refresh_per_second)
+        finally:
+            for poller in self.pollers:
+                await poller.stop()
+            self.parser.close()
+            self.console.clear()
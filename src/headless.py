@@ -0,0 +1,133 @@
+import asyncio
+import json
+import sys
+from typing import Callable, List, Optional, TextIO
+
+from src.aio_http_client import AioHttpCalls
+from src.metrics_parser import MetricsSnapshot
+from src.parse_executor import ParseMode
+from src.history_store import HistoryStore
+from src.instrumentation import Instrumentation
+from src.storage_collector import StorageCollector
+from utils.logger import logger
+
+# Records kept while the output is not keeping up, older ones are dropped beyond that.
+MAX_PENDING_RECORDS = 1000
+
+
+class HeadlessCollector(StorageCollector):
+    """Runs only the polling loop and writes every parsed snapshot as one JSON line.
+
+    Nothing from rich, pyfiglet or asciichartpy is imported on this path.
+    Records are serialized when the snapshot is applied and written by a
+    writer task in a worker thread, so a slow reader of the output never
+    stalls the pollers.
+    """
+
+    def __init__(
+        self,
+        session: AioHttpCalls,
+        refresh_metrics_rate: int,
+        refresh_node_rpc_rate: int,
+        graph_size: int,
+        parse_mode: ParseMode = "inline",
+        history: Optional[HistoryStore] = None,
+        poll_jitter: float = 0.1,
+        poll_timeout: Optional[float] = 10,
+        poll_max_backoff: float = 60,
+        full_scrape: bool = False,
+        rate_window: float = 60,
+        output: Optional[str] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        refresh_metrics_min: Optional[float] = None,
+        refresh_metrics_max: Optional[float] = None,
+        request_budget: Optional[int] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(
+            session=session,
+            refresh_metrics_rate=refresh_metrics_rate,
+            refresh_node_rpc_rate=refresh_node_rpc_rate,
+            graph_size=graph_size,
+            parse_mode=parse_mode,
+            history=history,
+            poll_jitter=poll_jitter,
+            poll_timeout=poll_timeout,
+            poll_max_backoff=poll_max_backoff,
+            full_scrape=full_scrape,
+            rate_window=rate_window,
+            instrumentation=instrumentation,
+            refresh_metrics_min=refresh_metrics_min,
+            refresh_metrics_max=refresh_metrics_max,
+            request_budget=request_budget,
+            clock=clock,
+        )
+        self.output = output
+        self.dropped = 0
+        self._stream: Optional[TextIO] = None
+        self._pending: List[str] = []
+        self._has_pending = asyncio.Event()
+        self._closing = False
+
+    def snapshot_record(self) -> dict:
+        return {
+            "timestamp": self.snapshot.timestamp,
+            "metrics": self.snapshot.to_dict(),
+            "node_status": self.status_dict(),
+            "pollers": self.poller_stats(),
+            "http": self.session.stats(),
+            "rates": self.rates.to_dict(),
+            "latency": {title: window.to_dict() for title, window in self.latency.items()},
+        }
+
+    def apply_snapshot(self, snapshot: MetricsSnapshot):
+        super().apply_snapshot(snapshot)
+        if self._stream is None:
+            return
+        if len(self._pending) >= MAX_PENDING_RECORDS:
+            del self._pending[0]
+            self.dropped += 1
+            logger.warning("Headless output is not keeping up, dropping the oldest snapshot records")
+        self._pending.append(json.dumps(self.snapshot_record(), separators=(",", ":")) + "\n")
+        self._has_pending.set()
+
+    def _write(self, lines: List[str]):
+        self._stream.write("".join(lines))
+        self._stream.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except OSError as e:
+            logger.error(f"Failed to write {len(batch)} snapshot records to {self.output or 'stdout'}: {e}")
+
+    async def _run_writer(self):
+        # Not cancelled on shutdown: a write still running in its thread would race the last flush.
+        while True:
+            await self._has_pending.wait()
+            self._has_pending.clear()
+            await self.flush()
+            if self._closing and not self._pending:
+                return
+
+    async def start(self):
+        self._stream = open(self.output, "a", encoding="utf-8") if self.output else sys.stdout
+        logger.info(f"Headless collector writing snapshots to {self.output or 'stdout'}")
+        writer = asyncio.create_task(self._run_writer())
+        try:
+            await self.start_after_history()
+            # The pollers do all the work, snapshots are queued for the writer as soon as they are applied.
+            await asyncio.Event().wait()
+        finally:
+            await self.stop_services()
+            self._closing = True
+            self._has_pending.set()
+            await writer
+            if self.dropped:
+                logger.warning(f"Dropped {self.dropped} snapshot records the output could not keep up with")
+            if self._stream is not sys.stdout:
+                self._stream.close()
+            self._stream = None
@@ -0,0 +1,88 @@
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def histogram_quantiles(bounds: Sequence[float], counts: Sequence[float], total: float, quantiles: Sequence[float] = QUANTILES) -> List[Optional[float]]:
+    """Prometheus ``histogram_quantile`` for several quantiles over one set of cumulative buckets.
+
+    ``counts`` are cumulative per finite upper bound in ``bounds`` and
+    ``total`` is the +Inf bucket. The quantiles are located in ascending
+    order by one forward walk over the buckets and interpolated linearly
+    inside their bucket, a quantile that falls into the +Inf bucket is the
+    largest finite bound.
+    """
+    if not total or not bounds:
+        return [None] * len(quantiles)
+    results: List[Optional[float]] = [None] * len(quantiles)
+    index = 0
+    for position in sorted(range(len(quantiles)), key=quantiles.__getitem__):
+        rank = quantiles[position] * total
+        while index < len(bounds) and counts[index] < rank:
+            index += 1
+        if index == len(bounds):
+            results[position] = bounds[-1]
+            continue
+        upper = bounds[index]
+        lower = bounds[index - 1] if index else min(0.0, upper)
+        below = counts[index - 1] if index else 0.0
+        in_bucket = counts[index] - below
+        results[position] = lower + (upper - lower) * (rank - below) / in_bucket if in_bucket else upper
+    return results
+
+
+class HistogramWindow:
+    """Quantiles, rate and mean of one histogram family over the last ``window`` seconds of scrapes.
+
+    Cumulative buckets from the scrapes in the window are kept, and the
+    oldest is subtracted from the newest. Results are computed once per
+    scrape in ``update``, panels only read them. A count going down (node
+    restart) or changed buckets start the window over.
+    """
+
+    __slots__ = ("window", "quantiles", "resets", "values", "_samples")
+
+    def __init__(self, window: float = 60, quantiles: Sequence[float] = QUANTILES):
+        self.window = window
+        self.quantiles = tuple(quantiles)
+        self.resets = 0
+        self.values: Dict[str, Optional[float]] = self._empty()
+        self._samples: Deque[Tuple[float, dict]] = deque()
+
+    def _empty(self) -> Dict[str, Optional[float]]:
+        values = {f"p{quantile * 100:g}": None for quantile in self.quantiles}
+        values.update(rate=None, mean=None)
+        return values
+
+    def update(self, timestamp: float, histogram: Optional[dict]):
+        if histogram is None:
+            return
+        if self._samples:
+            last_timestamp, last = self._samples[-1]
+            if timestamp <= last_timestamp:
+                return
+            if histogram["count"] < last["count"] or histogram["bounds"] != last["bounds"]:
+                self._samples.clear()
+                self.resets += 1
+        self._samples.append((timestamp, histogram))
+        # The newest scrape at or before the window start stays as the baseline.
+        while len(self._samples) > 2 and self._samples[1][0] <= timestamp - self.window:
+            self._samples.popleft()
+
+        values = self._empty()
+        if len(self._samples) > 1:
+            (first_timestamp, first), (_, last) = self._samples[0], self._samples[-1]
+            count = last["count"] - first["count"]
+            counts = [new - old for old, new in zip(first["counts"], last["counts"])]
+            for quantile, value in zip(self.quantiles, histogram_quantiles(last["bounds"], counts, count, self.quantiles)):
+                values[f"p{quantile * 100:g}"] = value
+            values["rate"] = count / (timestamp - first_timestamp)
+            values["mean"] = (last["sum"] - first["sum"]) / count if count else None
+        self.values = values
+
+    def quantile(self, quantile: float) -> Optional[float]:
+        return self.values.get(f"p{quantile * 100:g}")
+
+    def to_dict(self) -> dict:
+        return dict(self.values, resets=self.resets)
@@ -0,0 +1,207 @@
+import asyncio
+import bisect
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.catalog import SCALAR_METRICS
+from src.metrics_parser import MetricsSnapshot
+from utils.logger import logger
+
+# Numeric snapshot fields persisted per scrape, in on-disk column order.
+HISTORY_FIELDS = tuple(metric.field for metric in SCALAR_METRICS if metric.numeric)
+
+MISSING = -(2 ** 63)  # Stored in place of a metric that was not presented in the scrape
+MAGIC = b"RWHIST01"
+HEADER_SIZE = 512
+
+
+class HistorySegment:
+    """One day of fixed-width records: float64 timestamp followed by one int64 per field."""
+
+    def __init__(self, path: str, fields: Sequence[str]):
+        self.path = path
+        self.fields = tuple(fields)
+        self.record = struct.Struct("<d" + "q" * len(self.fields))
+
+    @staticmethod
+    def header(fields: Sequence[str]) -> bytes:
+        names = ",".join(fields).encode()
+        header = MAGIC + struct.pack("<H", len(names)) + names
+        if len(header) > HEADER_SIZE:
+            raise ValueError("Too many history fields for the segment header")
+        return header.ljust(HEADER_SIZE, b"\0")
+
+    def read_fields(self, data) -> Optional[Tuple[str, ...]]:
+        if len(data) < HEADER_SIZE or bytes(data[:len(MAGIC)]) != MAGIC:
+            return None
+        (length,) = struct.unpack_from("<H", data, len(MAGIC))
+        names = bytes(data[len(MAGIC) + 2:len(MAGIC) + 2 + length]).decode()
+        return tuple(names.split(",")) if names else ()
+
+    def records(self, start: Optional[float] = None, end: Optional[float] = None, last: Optional[int] = None) -> List[tuple]:
+        """Records with ``start <= timestamp < end``, or only the ``last`` N of them.
+
+        The segment is memory-mapped and located by binary search on the
+        timestamp column, only the requested records are unpacked.
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= HEADER_SIZE:
+            return []
+        with open(self.path, "rb") as segment_file, mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            fields = self.read_fields(data)
+            if fields != self.fields:
+                logger.warning(f"Skipping history segment {self.path}: unexpected layout {fields}")
+                return []
+            size = self.record.size
+            count = (len(data) - HEADER_SIZE) // size  # A partially written trailing record is ignored
+            timestamps = _TimestampColumn(data, size, count)
+            low = bisect.bisect_left(timestamps, start) if start is not None else 0
+            high = bisect.bisect_left(timestamps, end) if end is not None else count
+            if last is not None:
+                low = max(low, high - last)
+            return [self.record.unpack_from(data, HEADER_SIZE + index * size) for index in range(low, high)]
+
+
+class _TimestampColumn:
+    """Sequence view over the timestamp of every record, so bisect can search the mmap directly."""
+
+    def __init__(self, data, record_size: int, count: int):
+        self.data = data
+        self.record_size = record_size
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> float:
+        return struct.unpack_from("<d", self.data, HEADER_SIZE + index * self.record_size)[0]
+
+
+class HistoryStore:
+    """Append-only on-disk history of parsed snapshots, one segment file per UTC day.
+
+    ``append`` only packs the record into an in-memory buffer. A background
+    task flushes the buffer every ``flush_interval`` seconds in a worker
+    thread, so disk I/O never runs on the event loop.
+    """
+
+    def __init__(self, directory: str, flush_interval: float = 10, fields: Sequence[str] = HISTORY_FIELDS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.fields = tuple(fields)
+        self.record = struct.Struct("<d" + "q" * len(self.fields))
+        self._pending: List[Tuple[str, bytes]] = []
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._checked_days = set()  # Days whose segment is known to have this layout, touched by the writer only
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def _day(timestamp: float) -> str:
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+    def segment(self, day: str) -> HistorySegment:
+        return HistorySegment(os.path.join(self.directory, f"{day}.bin"), self.fields)
+
+    def segment_days(self) -> List[str]:
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".bin"))
+
+    def append(self, snapshot: MetricsSnapshot):
+        values = []
+        for field in self.fields:
+            value = getattr(snapshot, field)
+            values.append(value if isinstance(value, int) else MISSING)
+        self._pending.append((self._day(snapshot.timestamp), self.record.pack(snapshot.timestamp, *values)))
+
+    def _write(self, batch: List[Tuple[str, bytes]]):
+        by_day: Dict[str, List[bytes]] = {}
+        for day, record in batch:
+            by_day.setdefault(day, []).append(record)
+        for day, records in by_day.items():
+            segment = self.segment(day)
+            path = segment.path
+            if day not in self._checked_days:
+                self._set_aside_other_layout(segment)
+                self._drop_partial_record(segment)
+                self._checked_days.add(day)
+            with open(path, "ab") as segment_file:
+                if segment_file.tell() == 0:
+                    segment_file.write(HistorySegment.header(self.fields))
+                segment_file.write(b"".join(records))
+
+    def _set_aside_other_layout(self, segment: HistorySegment):
+        # The fields changed (e.g. a metric was added to the catalog) since the segment was started:
+        # records of another size cannot be appended to it, so it is kept next to the new one.
+        path = segment.path
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+            return
+        with open(path, "rb") as segment_file:
+            fields = segment.read_fields(segment_file.read(HEADER_SIZE))
+        if fields != self.fields:
+            aside = f"{path}.{int(os.path.getmtime(path))}.old"
+            os.replace(path, aside)
+            logger.warning(f"History segment {path} has another layout {fields}, moved to {aside}")
+
+    def _drop_partial_record(self, segment: HistorySegment):
+        # A crash can leave half a record (or half a header) at the end. Appending behind it would
+        # shift every later record, so the segment is cut back to its last whole record first.
+        path = segment.path
+        if not os.path.exists(path):
+            return
+        size = os.path.getsize(path)
+        whole = 0 if size < HEADER_SIZE else size - (size - HEADER_SIZE) % segment.record.size
+        if whole != size:
+            os.truncate(path, whole)
+            logger.warning(f"History segment {path} ended with {size - whole} B of a partially written record, dropped")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except OSError as e:
+                logger.error(f"Failed to write {len(batch)} history records to {self.directory}: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def _decode(self, record: tuple) -> Tuple[float, Dict[str, Optional[int]]]:
+        return record[0], {field: (value if value != MISSING else None) for field, value in zip(self.fields, record[1:])}
+
+    def query(self, start: float, end: float) -> Iterator[Tuple[float, Dict[str, Optional[int]]]]:
+        """Yield ``(timestamp, values)`` for ``start <= timestamp < end``, one day segment at a time."""
+        day = datetime.fromtimestamp(start, tz=timezone.utc).date()
+        last_day = datetime.fromtimestamp(end, tz=timezone.utc).date()
+        while day <= last_day:
+            for record in self.segment(day.isoformat()).records(start=start, end=end):
+                yield self._decode(record)
+            day += timedelta(days=1)
+
+    def tail(self, count: int) -> List[Tuple[float, Dict[str, Optional[int]]]]:
+        """The most recent ``count`` records, oldest first."""
+        records: List[tuple] = []
+        for day in reversed(self.segment_days()):
+            records = self.segment(day).records(last=count - len(records)) + records
+            if len(records) >= count:
+                break
+        return [self._decode(record) for record in records]
@@ -0,0 +1,132 @@
+import asyncio
+import bisect
+import functools
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+# Upper bounds of the latency buckets in seconds: 10 us doubling up to ~84 s.
+LATENCY_BUCKETS = tuple(0.00001 * 2 ** index for index in range(24))
+
+
+class LatencyHistogram:
+    """Counts, sum and extremes of one stage's latencies in fixed log-spaced buckets. O(log buckets) per observation."""
+
+    __slots__ = ("bounds", "counts", "count", "errors", "total", "minimum", "maximum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if self.maximum is None or seconds > self.maximum:
+            self.maximum = seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile, capped by the largest observation."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[index], self.maximum) if index < len(self.bounds) else self.maximum
+        return self.maximum
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "sum": self.total,
+            "mean": self.mean,
+            "min": self.minimum,
+            "max": self.maximum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {f"{bound:g}": count for bound, count in zip(self.bounds + (float("inf"),), self.counts) if count},
+        }
+
+
+class Instrumentation:
+    """Per-stage latency histograms of the hot path.
+
+    Stages are measured by replacing a method on one object with a timing
+    wrapper. When instrumentation is off nothing is wrapped, so the hot path
+    runs exactly the same code as without it. Counters the pipeline already
+    keeps (HTTP, pollers, caches) are registered as callables and only read
+    when the panel is drawn or the dump is written.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, Callable[[], object]] = {}
+        self.started = time.time()
+
+    def stage(self, name: str) -> LatencyHistogram:
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = LatencyHistogram()
+        return histogram
+
+    def instrument(self, owner, attribute: str, stage: str):
+        """Time every call of ``owner.attribute`` (sync or async) into the ``stage`` histogram."""
+        method = getattr(owner, attribute)
+        histogram = self.stage(stage)
+
+        if asyncio.iscoroutinefunction(method):
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                except Exception:
+                    histogram.errors += 1
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+        else:
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                except Exception:
+                    histogram.errors += 1
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+
+        setattr(owner, attribute, functools.update_wrapper(timed, method))
+
+    def add_counters(self, name: str, source: Callable[[], object]):
+        self.counters[name] = source
+
+    def rows(self) -> List[tuple]:
+        """``(stage, histogram)`` pairs in the order the stages were registered."""
+        return list(self.stages.items())
+
+    def to_dict(self) -> dict:
+        return {
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "stages": {name: histogram.to_dict() for name, histogram in self.stages.items()},
+            "counters": {name: source() for name, source in self.counters.items()},
+        }
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as dump_file:
+            json.dump(self.to_dict(), dump_file, indent=2, default=str)
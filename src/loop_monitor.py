@@ -0,0 +1,42 @@
+import asyncio
+from typing import Optional
+
+
+class LoopLagMonitor:
+    """Measures how long the event loop is blocked.
+
+    A task sleeps for ``interval`` seconds in a loop, any extra delay before it
+    wakes up is time the loop spent running something else synchronously.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset_max(self) -> float:
+        """Return the worst lag since the previous call and start a new window."""
+        max_lag, self.max_lag = self.max_lag, 0.0
+        return max_lag
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, self.last_lag)
@@ -1,78 +1,346 @@
+import math
 import re
-from typing import Literal, Optional
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-class StorageMetrics:
-    @staticmethod
-    def _get_value(metrics: str, pattern: str) -> Optional[int]:
-        match = re.search(pattern, metrics)
-        if match:
-            return int(match.group(1))
-        return None
+from src.catalog import HISTOGRAM_METRICS, METRICS, SCALAR_METRICS, MetricSpec
 
-    @staticmethod
-    def get_walrus_epoch(metrics: str) -> Optional[int]:
-        pattern = r"walrus_current_epoch\s+(\d+)"
-        return StorageMetrics._get_value(metrics, pattern)
+# One sample per line: `name{labels} value [timestamp]`. The series id (name plus
+# raw label block) and the value are captured in a single C-level scan of the
+# payload; an optional exposition timestamp is matched and dropped.
+_SAMPLE_RE = re.compile(r"^([^#\s][^ \t{\n]*(?:\{.*\})?)[ \t]+(\S+)(?:[ \t]+-?\d+)?\r?$", re.MULTILINE)
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
 
-    @staticmethod
-    def get_latest_downloaded_checkpoint(metrics: str) -> Optional[int]:
-        pattern = r"event_processor_latest_downloaded_checkpoint\s+(\d+)"
-        return StorageMetrics._get_value(metrics, pattern)
 
-    @staticmethod
-    def get_walrus_shards_owned(metrics: str) -> Optional[int]:
-        pattern = r"walrus_shards_owned\s+(\d+)"
-        return StorageMetrics._get_value(metrics, pattern)
+@lru_cache(maxsize=8)
+def _names_pattern(names: Tuple[str, ...]) -> "re.Pattern":
+    # Anchoring on a literal "\n" (instead of ^ with MULTILINE) lets the regex
+    # engine jump between line starts, so lines of other metrics cost almost nothing.
+    alternation = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(r"\n(" + alternation + r")(\{.*\})?[ \t]+(\S+)")
 
-    @staticmethod
-    def get_checkpoint_downloader_lag(metrics: str) -> Optional[int]:
-        pattern = r"checkpoint_downloader_checkpoint_lag\s+(\d+)"
-        return StorageMetrics._get_value(metrics, pattern)
 
-    @staticmethod
-    def get_uptime(metrics: str) -> Optional[int]:
-        pattern = r"uptime\{[^}]*\}\s+(\d+)"
-        return StorageMetrics._get_value(metrics, pattern)
+class MetricsTable:
+    """Indexed sample table built from one pass over a Prometheus text exposition.
+
+    Samples are keyed by their series id exactly as exposed by the node, e.g.
+    ``walrus_current_epoch`` or ``walrus_event_cursor_progress{state="pending"}``,
+    so lookups of known series are a single dict access. Values are kept as raw
+    tokens and only converted when read.
+    """
+
+    __slots__ = ("_series", "_by_name")
+
+    def __init__(self, series: Optional[Dict[str, str]] = None):
+        self._series = series if series is not None else {}
+        self._by_name: Dict[str, List[Tuple[str, str]]] = {}
+
+    @classmethod
+    def parse(cls, text: str, names: Optional[Iterable[str]] = None) -> "MetricsTable":
+        """Tokenize ``text`` in a single pass.
+
+        When ``names`` is given only samples of those metrics are materialized,
+        every other line is skipped inside the regex engine.
+        """
+        if names is None:
+            return cls(dict(_SAMPLE_RE.findall(text)))
+
+        table = cls()
+        for name, label_block, value in _names_pattern(tuple(names)).findall("\n" + text):
+            table._series.setdefault(name + label_block, value)
+            if label_block:
+                table._by_name.setdefault(name, []).append((label_block[1:-1], value))
+        for name in names:
+            table._by_name.setdefault(name, [])
+        return table
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __contains__(self, series_id: str) -> bool:
+        return series_id in self._series
 
     @staticmethod
-    def get_chain_identifier(metrics: str) -> Optional[str]:
-        pattern = r'chain_identifier="([^"]+)"'
-        match = re.search(pattern, metrics)
-        if match:
-            return match.group(1)
+    def series_id(name: str, labels: Optional[Dict[str, str]] = None) -> str:
+        if not labels:
+            return name
+        return name + "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+    def samples(self, name: str) -> List[Tuple[str, str]]:
+        """Return ``(label_block, value)`` pairs of all labelled samples of ``name``."""
+        samples = self._by_name.get(name)
+        if samples is None:
+            prefix = name + "{"
+            samples = [
+                (series_id[len(prefix):-1], value)
+                for series_id, value in self._series.items()
+                if series_id.startswith(prefix)
+            ]
+            self._by_name[name] = samples
+        return samples
+
+    def lookup(self, series_id: str, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """Raw value of ``series_id``, else of the first sample of ``name`` carrying ``labels``."""
+        value = self._series.get(series_id)
+        if value is None:
+            # Label order (or extra labels) differ from what we expect, match on the parsed labels instead.
+            for label_block, sample_value in self.samples(name):
+                if not labels:
+                    return sample_value
+                parsed = dict(_LABEL_RE.findall(label_block))
+                if all(parsed.get(key) == val for key, val in labels.items()):
+                    return sample_value
+        return value
+
+    def get(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        value = self.lookup(self.series_id(name, labels), name, labels)
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return None
+
+    def get_any(self, name: str) -> Optional[Tuple[Dict[str, str], float]]:
+        """Return labels and value of the first sample of ``name`` regardless of its labels."""
+        if name in self._series:
+            value = self.get(name)
+            return ({}, value) if value is not None else None
+        for label_block, value in self.samples(name):
+            try:
+                return dict(_LABEL_RE.findall(label_block)), float(value)
+            except ValueError:
+                continue
         return None
 
-    @staticmethod
-    def get_walrus_build_info(metrics: str) -> Optional[str]:
-        pattern = r'walrus_build_info\{version="([^"]+)"\}'
-        match = re.search(pattern, metrics)
-        if match:
-            return match.group(1)
+    def get_label(self, name: str, label: str) -> Optional[str]:
+        for label_block, _ in self.samples(name):
+            for key, value in _LABEL_RE.findall(label_block):
+                if key == label:
+                    return value
         return None
 
-    @staticmethod
-    def get_event_cursor_progress(metrics: str, state: Literal["persisted", "pending", "highest_finished"]) -> Optional[int]:
-        pattern = rf'walrus_event_cursor_progress\{{state="{state}"\}}\s+(\d+)'
-        return StorageMetrics._get_value(metrics, pattern)
+    def find_label(self, label: str) -> Optional[str]:
+        """Return the first value of ``label`` on any series. Walks the whole table, use as a fallback only."""
+        needle = label + '="'
+        for series_id in self._series:
+            if needle in series_id:
+                for key, value in _LABEL_RE.findall(series_id[series_id.find("{") + 1:-1]):
+                    if key == label:
+                        return value
+        return None
 
-    @staticmethod
-    def get_checkpoint_downloader_num_workers(metrics: str) -> Optional[int]:
-        pattern = r"checkpoint_downloader_num_workers\s+(\d+)"
-        return StorageMetrics._get_value(metrics, pattern)
+
+@lru_cache(maxsize=8)
+def _line_pattern(names: Tuple[str, ...]) -> "re.Pattern":
+    # Same literal "\n" anchoring as _names_pattern, on bytes and capturing the whole line.
+    alternation = b"|".join(re.escape(name.encode()) for name in sorted(names, key=len, reverse=True))
+    return re.compile(rb"\n((" + alternation + rb")[{ \t][^\n]*)")
+
+
+class MetricsLineFilter:
+    """Keeps the sample lines of ``names`` from a /metrics body that arrives in chunks.
+
+    Only wanted lines and one partial line are held in memory. The text format
+    keeps every sample of a metric family in one contiguous group, so once
+    every name has been seen and a line of any other metric follows, nothing
+    wanted is left and ``feed`` returns True so the reader can stop early.
+    For a histogram all of its _bucket, _sum and _count names must be wanted.
+    """
+
+    __slots__ = ("names", "done", "scanned_bytes", "_pattern", "_lines", "_tail", "_seen")
+
+    def __init__(self, names: Iterable[str]):
+        self.names = tuple(names)
+        self.done = False
+        self.scanned_bytes = 0
+        self._pattern = _line_pattern(self.names)
+        self._lines: List[bytes] = []
+        self._tail = b"\n"  # Unfinished last line, always preceded by the newline the pattern anchors on
+        self._seen = set()
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done or not chunk:
+            return self.done
+        self.scanned_bytes += len(chunk)
+        block = self._tail + chunk
+        end = block.rfind(b"\n")
+        self._tail = block[end:]
+        if end:
+            self._scan(block, end)
+        return self.done
+
+    def _scan(self, block: bytes, end: int):
+        position = 0  # End of the last wanted line in this block
+        for match in self._pattern.finditer(block, 0, end):
+            self._lines.append(match.group(1))
+            self._seen.add(match.group(2))
+            position = match.end()
+        if position < end and len(self._seen) == len(self.names):
+            self.done = True
+
+    def result(self) -> bytes:
+        if len(self._tail) > 1 and not self.done:
+            self._scan(self._tail + b"\n", len(self._tail))  # The body did not end with a newline
+        self._tail = b"\n"
+        return b"\n".join(self._lines) + b"\n" if self._lines else b""
+
+
+_le_pattern = re.compile(r'le="([^"]*)"')
+
+
+@lru_cache(maxsize=8)
+def _families_pattern(names: Tuple[str, ...]) -> "re.Pattern":
+    # The samples of a family are kept together by the text format, so one match is the whole
+    # run of _bucket/_sum/_count lines of one of the wanted families.
+    alternation = "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    line = r"_(?:bucket|sum|count)[{ \t][^\n]*"
+    return re.compile(r"\n(?P<family>" + alternation + r")" + line + r"(?:\n(?P=family)" + line + r")*")
+
+
+@lru_cache(maxsize=32)
+def _histogram_patterns(name: str) -> Tuple["re.Pattern", "re.Pattern", "re.Pattern"]:
+    family = re.escape(name)
+    return (
+        # le label and value of a bucket, the other labels are skipped
+        re.compile(r"\n" + family + r'_bucket\{(?:[^\n]*?,)?le="([^"]*)"[^\n]*?\}[ \t]+(\S+)'),
+        # Value of a bucket only: with a single group findall returns plain strings, much cheaper than tuples
+        re.compile(r"\n" + family + r"_bucket\{[^\n]*\}[ \t]+(\S+)"),
+        re.compile(r"\n" + family + r"_sum(?:\{[^\n]*\})?[ \t]+(\S+)"),
+    )
+
+
+def parse_histograms(text: str, names: Sequence[str]) -> Dict[str, dict]:
+    """Buckets of the histogram families ``names`` summed over all of their label sets.
+
+    One regex pass over ``text`` cuts out the lines of every wanted family,
+    a family that is not exported is left out of the result.
+    """
+    names = tuple(names)
+    if text.startswith(names):
+        text = "\n" + text  # Only a filtered body can start with a sample line
+    regions: Dict[str, List[str]] = {}
+    for match in _families_pattern(names).finditer(text):
+        regions.setdefault(match.group("family"), []).append(match.group())
+    histograms = {}
+    for name, parts in regions.items():
+        histogram = _parse_family(name, "".join(parts))
+        if histogram is not None:
+            histograms[name] = histogram
+    return histograms
+
+
+def _parse_family(name: str, region: str) -> Optional[dict]:
+    """The histogram of the family ``name`` from its sample lines, each preceded by a newline.
+
+    ``counts`` are cumulative per finite upper bound in ``bounds`` like in the
+    exposition, ``count`` is the +Inf bucket. Normally every label set lists
+    the same buckets in the same order, then the le labels and the values are
+    captured separately and bucket k is the sum of every n-th value from k.
+    Anything else is summed sample by sample.
+    """
+    bucket_pattern, value_pattern, sum_pattern = _histogram_patterns(name)
+    les = _le_pattern.findall(region)
+    values = value_pattern.findall(region)
+    try:
+        width = les.index(les[0], 1)
+    except (IndexError, ValueError):
+        width = len(les)
+    if width and len(les) == len(values) and les == les[:width] * (len(les) // width):
+        totals = {le: sum(map(float, values[k::width])) for k, le in enumerate(les[:width])}
+    else:
+        totals: Dict[str, float] = {}
+        for le, value in bucket_pattern.findall(region):
+            totals[le] = totals.get(le, 0.0) + float(value)
+    if not totals:
+        return None
+
+    buckets = sorted((float(le), total) for le, total in totals.items())
+    finite = [(bound, total) for bound, total in buckets if math.isfinite(bound)]
+    return {
+        "bounds": [bound for bound, _ in finite],
+        "counts": [total for _, total in finite],
+        "sum": sum(map(float, sum_pattern.findall(region)), 0.0),
+        "count": buckets[-1][1],
+    }
+
+
+class ExtractionPlan:
+    """The metric catalog compiled for parsing: what to scrape and how to read each value.
+
+    Series ids are built once here, so a scrape costs one regex pass over the
+    body (see MetricsTable.parse) and one dict lookup per metric. Only
+    metrics the node exposes with other labels fall back to matching the
+    parsed labels.
+    """
+
+    __slots__ = ("names", "scrape_names", "fields", "histograms", "_lookups")
+
+    def __init__(self, metrics: Sequence[MetricSpec]):
+        scalar = [metric for metric in metrics if metric.type != "histogram"]
+        self.histograms = tuple(metric for metric in metrics if metric.type == "histogram")
+        self.names = tuple(dict.fromkeys(metric.name for metric in scalar))
+        # parse_histograms only reads the _bucket and _sum series, _count is scraped as well because
+        # the three alternate per label set: without it a family is not one contiguous group of
+        # wanted lines and MetricsLineFilter would stop at the first _count line.
+        self.scrape_names = self.names + tuple(f"{metric.name}{suffix}" for metric in self.histograms for suffix in ("_bucket", "_sum", "_count"))
+        self.fields = tuple(metric.field for metric in scalar)
+        self._lookups = tuple((metric, MetricsTable.series_id(metric.name, metric.labels)) for metric in scalar)
+
+    def extract(self, text: str) -> Dict[str, object]:
+        """Every catalog value of one /metrics body by field, None when the node does not present it."""
+        table = MetricsTable.parse(text, names=self.names)
+        values: Dict[str, object] = {}
+        for metric, series_id in self._lookups:
+            if metric.label is not None:
+                values[metric.field] = table.get_label(metric.name, metric.label) or table.find_label(metric.label)
+                continue
+            raw = table.lookup(series_id, metric.name, metric.labels)
+            try:
+                value = float(raw) if raw is not None else None
+            except ValueError:
+                value = None
+            values[metric.field] = int(value) if value is not None and math.isfinite(value) else None
+        values["histograms"] = self.extract_histograms(text)
+        return values
+
+    def extract_histograms(self, text: str) -> Dict[str, dict]:
+        return parse_histograms(text, [metric.name for metric in self.histograms]) if self.histograms else {}
+
+
+class StorageMetrics:
+    # The catalog in src/catalog.py compiled once at import.
+    PLAN = ExtractionPlan(METRICS)
+    METRIC_NAMES = PLAN.names
+    SCRAPE_NAMES = PLAN.scrape_names
+    # Latency histograms shown as windowed quantiles, by title.
+    LATENCY_HISTOGRAMS = {metric.title: metric.name for metric in HISTOGRAM_METRICS}
 
     @staticmethod
-    def get_confirmations_issued_total(metrics: str) -> Optional[int]:
-        pattern = r"walrus_storage_confirmations_issued_total\s+(\d+)"
-        return StorageMetrics._get_value(metrics, pattern)
+    def parse(metrics: str) -> MetricsTable:
+        return MetricsTable.parse(metrics, names=StorageMetrics.METRIC_NAMES)
 
     @staticmethod
-    def get_total_downloaded_checkpoints(metrics: str) -> Optional[int]:
-        pattern = r"event_processor_total_downloaded_checkpoints\s+(\d+)"
-        return StorageMetrics._get_value(metrics, pattern)
+    def get_latency_histograms(metrics: str) -> Dict[str, dict]:
+        return StorageMetrics.PLAN.extract_histograms(metrics)
 
     @staticmethod
-    def get_walrus_recover_blob_backlog(metrics: str, state: Literal["queued", "in-progress",]) -> Optional[int]:
-        pattern = rf'walrus_recover_blob_backlog\{{state="{state}"\}}\s+(\d+)'
+    def snapshot(metrics: str) -> "MetricsSnapshot":
+        """Parse a raw /metrics body into a MetricsSnapshot. Pure function, safe to run in a worker thread or process."""
+        started = time.perf_counter()
+        values = StorageMetrics.PLAN.extract(metrics)
+        return MetricsSnapshot(timestamp=time.time(), parse_duration=time.perf_counter() - started, **values)
+
+
+class MetricsSnapshot:
+    """Values extracted from one /metrics scrape, one slot per catalog metric. Missing metrics are ``None``."""
+
+    __slots__ = ("timestamp",) + tuple(metric.field for metric in SCALAR_METRICS) + ("histograms", "parse_duration")
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            setattr(self, field, values.get(field))
 
-        return StorageMetrics._get_value(metrics, pattern)
-    
\ No newline at end of file
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
@@ -0,0 +1,165 @@
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class NodeHealth:
+    """One /v1/health response: node status, epoch and the owned shard summary.
+
+    ``shards`` (the per-shard ``shardDetail`` list, which grows with the
+    number of shards) is only turned into ``(shard, status)`` pairs when read.
+    With msgspec it is not even decoded until then.
+    """
+
+    __slots__ = (
+        "status",
+        "epoch",
+        "shards_owned",
+        "shards_ready",
+        "shards_in_transfer",
+        "shards_in_recovery",
+        "shards_unknown",
+        "_shard_detail",
+        "_load_shard_detail",
+        "_shards",
+    )
+
+    def __init__(
+        self,
+        status: str,
+        epoch: Optional[int],
+        shards_owned: Optional[int],
+        shards_ready: Optional[int],
+        shards_in_transfer: Optional[int],
+        shards_in_recovery: Optional[int],
+        shards_unknown: Optional[int],
+        shard_detail=None,
+        load_shard_detail: Optional[Callable] = None,
+    ):
+        self.status = status
+        self.epoch = epoch
+        self.shards_owned = shards_owned
+        self.shards_ready = shards_ready
+        self.shards_in_transfer = shards_in_transfer
+        self.shards_in_recovery = shards_in_recovery
+        self.shards_unknown = shards_unknown
+        self._shard_detail = shard_detail  # Decoded object, or raw JSON for load_shard_detail
+        self._load_shard_detail = load_shard_detail
+        self._shards: Optional[List[Tuple[int, str]]] = None
+
+    @classmethod
+    def from_document(cls, document: dict) -> "NodeHealth":
+        """Fields of an already decoded response, in one walk down ``success.data``."""
+        data = document["success"]["data"]
+        summary = data.get("shardSummary") or {}
+        owned_status = summary.get("ownedShardStatus") or {}
+        return cls(
+            data["nodeStatus"],
+            data.get("epoch"),
+            summary.get("owned"),
+            owned_status.get("ready"),
+            owned_status.get("inTransfer"),
+            owned_status.get("inRecovery"),
+            owned_status.get("unknown"),
+            shard_detail=data.get("shardDetail"),
+        )
+
+    @property
+    def shards(self) -> List[Tuple[int, str]]:
+        if self._shards is None:
+            detail = self._shard_detail
+            if self._load_shard_detail is not None:
+                detail = self._load_shard_detail(detail)
+            owned = (detail.get("owned") or []) if isinstance(detail, dict) else []
+            self._shards = [(shard.get("shard"), shard.get("status")) for shard in owned]
+            self._shard_detail = self._load_shard_detail = None
+        return self._shards
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if not name.startswith("_")}
+
+
+def _msgspec_decoder() -> Callable[[bytes], NodeHealth]:
+    import msgspec
+
+    # Only the fields read are declared: everything else is skipped while parsing,
+    # shardDetail is kept as raw JSON until NodeHealth.shards is read.
+    class OwnedShardStatus(msgspec.Struct):
+        ready: Optional[int] = None
+        inTransfer: Optional[int] = None
+        inRecovery: Optional[int] = None
+        unknown: Optional[int] = None
+
+    class ShardSummary(msgspec.Struct):
+        owned: Optional[int] = None
+        ownedShardStatus: OwnedShardStatus = msgspec.field(default_factory=OwnedShardStatus)
+
+    class Data(msgspec.Struct):
+        nodeStatus: str
+        epoch: Optional[int] = None
+        shardSummary: ShardSummary = msgspec.field(default_factory=ShardSummary)
+        shardDetail: msgspec.Raw = msgspec.field(default_factory=msgspec.Raw)
+
+    class Success(msgspec.Struct):
+        data: Data
+
+    class Document(msgspec.Struct):
+        success: Success
+
+    decoder = msgspec.json.Decoder(Document)
+    load_raw = msgspec.json.Decoder()
+
+    def load_shard_detail(raw):
+        return load_raw.decode(raw) if len(raw) else None
+
+    def decode(body: bytes) -> NodeHealth:
+        data = decoder.decode(body).success.data
+        summary = data.shardSummary
+        owned_status = summary.ownedShardStatus
+        return NodeHealth(
+            data.nodeStatus,
+            data.epoch,
+            summary.owned,
+            owned_status.ready,
+            owned_status.inTransfer,
+            owned_status.inRecovery,
+            owned_status.unknown,
+            shard_detail=data.shardDetail,
+            load_shard_detail=load_shard_detail,
+        )
+
+    return decode
+
+
+def _orjson_decoder() -> Callable[[bytes], NodeHealth]:
+    import orjson
+
+    loads = orjson.loads
+    return lambda body: NodeHealth.from_document(loads(body))
+
+
+def _json_decoder() -> Callable[[bytes], NodeHealth]:
+    loads = json.loads
+    return lambda body: NodeHealth.from_document(loads(body))
+
+
+# Tried in this order by ``health_decoder("auto")``, msgspec and orjson are optional.
+HEALTH_DECODERS: Dict[str, Callable[[], Callable[[bytes], NodeHealth]]] = {
+    "msgspec": _msgspec_decoder,
+    "orjson": _orjson_decoder,
+    "json": _json_decoder,
+}
+
+
+def health_decoder(name: str = "auto") -> Tuple[str, Callable[[bytes], NodeHealth]]:
+    """``(name, decode)`` of the named decoder, or of the first one installed for "auto"."""
+    if name != "auto":
+        return name, HEALTH_DECODERS[name]()
+    for candidate, create in HEALTH_DECODERS.items():
+        try:
+            return candidate, create()
+        except ImportError:
+            continue
+    raise RuntimeError("No JSON decoder available")
+
+
+HEALTH_DECODER, decode_health = health_decoder()
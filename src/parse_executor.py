@@ -0,0 +1,50 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Literal, Optional
+
+from src.metrics_parser import MetricsSnapshot, StorageMetrics
+from utils.logger import logger
+
+ParseMode = Literal["inline", "thread", "process"]
+PARSE_MODES = ("inline", "thread", "process")
+
+
+class MetricsParseExecutor:
+    """Runs StorageMetrics.snapshot either on the event loop or in a worker pool.
+
+    ``inline`` parses synchronously on the loop (the original behaviour),
+    ``thread`` and ``process`` hand the raw body to a single worker so the loop
+    keeps rendering while a large payload is parsed.
+    """
+
+    def __init__(self, mode: ParseMode = "inline"):
+        if mode not in PARSE_MODES:
+            raise ValueError(f"Unknown parse mode: {mode}")
+        self.mode = mode
+        self._executor: Optional[Executor] = None
+        if mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metrics-parser")
+        elif mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=1)
+
+        self.last_parse_duration: Optional[float] = None  # Time spent inside the parser
+        self.last_loop_block: Optional[float] = None  # Time the event loop was held by this parse
+
+    async def parse(self, metrics: str) -> MetricsSnapshot:
+        started = time.perf_counter()
+        if self._executor is None:
+            snapshot = StorageMetrics.snapshot(metrics)
+            self.last_loop_block = time.perf_counter() - started
+        else:
+            loop = asyncio.get_running_loop()
+            snapshot = await loop.run_in_executor(self._executor, StorageMetrics.snapshot, metrics)
+            self.last_loop_block = None
+        self.last_parse_duration = snapshot.parse_duration
+        return snapshot
+
+    def close(self):
+        if self._executor is not None:
+            logger.debug(f"Shutting down {self.mode} metrics parser pool")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
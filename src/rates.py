@@ -0,0 +1,111 @@
+import math
+from typing import Dict, Mapping, Optional
+
+from src.catalog import SCALAR_METRICS
+
+
+# Snapshot fields a rate is derived for. True marks counters that restart from zero
+# with the node process, the others are cursors and gauges kept across restarts.
+RATE_FIELDS = {metric.field: metric.type == "counter" for metric in SCALAR_METRICS if metric.rate}
+
+# Backlogs that get a time to drain, from the smoothed rate they shrink at.
+ETA_FIELDS = ("checkpoint_downloader_lag", "pending_events")
+
+
+class RateTracker:
+    """Per-second rate of one series, updated in O(1) per sample.
+
+    The smoothed rate is an EWMA whose weight grows with the time since the
+    previous sample (``1 - exp(-elapsed / window)``), so a late or skipped
+    scrape counts for exactly the time it covers. A missing value keeps the
+    previous sample, the next one then spans the whole gap.
+    """
+
+    __slots__ = ("counter", "window", "last_value", "last_timestamp", "rate", "smoothed", "resets")
+
+    def __init__(self, counter: bool, window: float = 60):
+        self.counter = counter
+        self.window = window
+        self.last_value: Optional[int] = None
+        self.last_timestamp: Optional[float] = None
+        self.rate: Optional[float] = None
+        self.smoothed: Optional[float] = None
+        self.resets = 0
+
+    def update(self, timestamp: float, value: Optional[int], restarted: bool = False) -> Optional[float]:
+        if value is None:
+            return self.rate
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return self.rate  # Duplicate or out of order sample
+        if self.last_timestamp is None:
+            self.last_value, self.last_timestamp = value, timestamp
+            return None
+
+        delta = value - self.last_value
+        if self.counter and (restarted or delta < 0):
+            # The counter started again from zero, everything it holds was counted since the restart.
+            delta = value
+            self.resets += 1
+        elapsed = timestamp - self.last_timestamp
+        self.rate = delta / elapsed
+        if self.smoothed is None:
+            self.smoothed = self.rate
+        else:
+            self.smoothed += (1 - math.exp(-elapsed / self.window)) * (self.rate - self.smoothed)
+        self.last_value, self.last_timestamp = value, timestamp
+        return self.rate
+
+    def to_dict(self) -> dict:
+        return {"rate": self.rate, "smoothed": self.smoothed, "resets": self.resets}
+
+
+def eta(backlog: Optional[int], trend: Optional[float]) -> Optional[float]:
+    """Seconds until ``backlog`` reaches zero while it changes by ``trend`` per second. None while it is not shrinking."""
+    if backlog is None:
+        return None
+    if backlog <= 0:
+        return 0.0
+    if trend is None or trend >= 0:
+        return None
+    return backlog / -trend
+
+
+class RateEngine:
+    """Rates of every field in ``RATE_FIELDS``, fed one scrape at a time.
+
+    A node restart is detected from ``uptime`` going backwards, so a counter
+    that was reset and already grew past its old value is still handled.
+    """
+
+    def __init__(self, window: float = 60, fields: Mapping[str, bool] = RATE_FIELDS):
+        self.window = window
+        self.trackers: Dict[str, RateTracker] = {field: RateTracker(counter, window) for field, counter in fields.items()}
+        self.restarts = 0
+        self._last_uptime: Optional[int] = None
+
+    def update(self, timestamp: float, values: Mapping[str, Optional[int]]):
+        uptime = values.get("uptime")
+        restarted = uptime is not None and self._last_uptime is not None and uptime < self._last_uptime
+        if uptime is not None:
+            self._last_uptime = uptime
+        if restarted:
+            self.restarts += 1
+        for field, tracker in self.trackers.items():
+            tracker.update(timestamp, values.get(field), restarted)
+
+    def rate(self, field: str) -> Optional[float]:
+        return self.trackers[field].rate
+
+    def smoothed(self, field: str) -> Optional[float]:
+        return self.trackers[field].smoothed
+
+    def eta(self, field: str) -> Optional[float]:
+        tracker = self.trackers[field]
+        return eta(tracker.last_value, tracker.smoothed)
+
+    def to_dict(self) -> dict:
+        return {
+            "rates": {field: tracker.to_dict() for field, tracker in self.trackers.items()},
+            "eta": {field: self.eta(field) for field in ETA_FIELDS if field in self.trackers},
+            "restarts": self.restarts,
+        }
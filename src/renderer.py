@@ -0,0 +1,47 @@
+import importlib
+from typing import Optional
+
+# Backends by name and the class implementing them, imported only when chosen.
+RENDERERS = {
+    "rich": "src.rich_renderer:RichRenderer",
+    "ansi": "src.ansi_renderer:AnsiRenderer",
+}
+
+
+class Renderer:
+    """Draws the state of a StorageDashboard to the terminal.
+
+    The dashboard owns the data, the caches of figlet numbers and charts and
+    the render loop. A backend only decides how panels look and what is
+    written to the terminal: ``render`` is called every frame and must
+    return quickly without writing anything when no data source changed
+    and the terminal was not resized.
+    """
+
+    def __init__(self, dashboard):
+        self.dashboard = dashboard
+
+    def open(self):
+        """Take over the terminal, e.g. switch to the alternate screen."""
+
+    def close(self):
+        """Give the terminal back the way it was found."""
+
+    def render(self) -> bool:
+        """Bring the screen up to date. Returns True when anything was written."""
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def create_renderer(name: str, dashboard, **options) -> Renderer:
+    spec: Optional[str] = RENDERERS.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown renderer: {name}")
+    module, cls = spec.split(":")
+    return getattr(importlib.import_module(module), cls)(dashboard, **options)
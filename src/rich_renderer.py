@@ -0,0 +1,212 @@
+from functools import partial
+from typing import Optional
+
+from rich.console import Console
+from rich.live import Live
+from rich.layout import Layout
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+from rich.style import Style
+from rich.align import Align
+from rich import box
+
+from src.catalog import PanelSpec, layout_rows
+from src.formater import covert_seconds_to_dhm
+from src.rates import ETA_FIELDS
+from src.renderer import Renderer
+from utils.logger import logger
+
+
+class RichRenderer(Renderer):
+    """The original full screen layout of Rich panels, redrawn with rich.live.Live."""
+
+    def __init__(self, dashboard, console: Optional[Console] = None):
+        super().__init__(dashboard)
+        self.console = console or Console()
+        self.live: Optional[Live] = None
+        self.layout = Layout()
+
+        # The catalog layout compiled once: a rich Layout per box and the panel factory that fills it.
+        rows = layout_rows(instrumented=dashboard.instrumentation is not None)
+        self.layout.split_column(*(Layout(name=row, ratio=ratio) for row, ratio, _ in rows))
+        panels = []
+        for row, _, specs in rows:
+            self.layout[row].split_row(*(Layout(name=spec.name, ratio=spec.ratio) for spec in specs))
+            for spec in specs:
+                create_panel = getattr(self, f"create_{spec.style}_panel")
+                # Every panel with the data sources it is built from. A panel is only re-created
+                # when the version of one of its sources was bumped since its last render.
+                panels.append(((row, spec.name), partial(create_panel, spec), spec.sources))
+        self.panels = tuple(panels)
+        self._rendered_versions = {}
+        self._rendered_console_size = None
+
+    def create_shards_panel(self, panel: PanelSpec):
+        dashboard = self.dashboard
+        owned_color = "cyan"
+        ready_color = "green"
+        unknown_color = "yellow"
+        in_recovery_color = "yellow"
+        in_transfer_color = "yellow"
+
+        content = ""
+        content += f"[bold {owned_color}]OWNED:[/bold {owned_color}] [bold]{dashboard.shards_owned}[/bold]\n"
+        content += f"[bold {ready_color}]READY:[/bold {ready_color}] [bold]{dashboard.shards_ready}[/bold]\n"
+        content += f"[bold {unknown_color}]UNKNOWN:[/bold {unknown_color}] [bold]{dashboard.shards_unknown}[/bold]\n"
+        content += f"[bold {in_recovery_color}]inRECOVERY:[/bold {in_recovery_color}] [bold]{dashboard.shards_inRecovery}[/bold]\n"
+        content += f"[bold {in_transfer_color}]inTRANSFER:[/bold {in_transfer_color}] [bold]{dashboard.shards_inTransfer}[/bold]"
+
+        return Panel(content, expand=True, title=f"[bold]{panel.title}[/bold]", border_style=panel.color)
+
+    def create_number_panel(self, panel: PanelSpec):
+        dashboard = self.dashboard
+        value = getattr(dashboard, panel.field)
+        color = panel.color_for(value)
+        text = Text(dashboard.ascii_number(value) if isinstance(value, int) else dashboard.format_value(value), style=Style(bold=True, underline=False, color=color))
+        centered_text = Align.center(text, vertical="middle")
+        return Panel(centered_text, expand=True, title=f"[bold] {panel.title}[/bold]", border_style=color)
+
+    def create_status_panel(self, panel: PanelSpec):
+        dashboard = self.dashboard
+        try:
+            if dashboard.uptime:
+                _uptime = covert_seconds_to_dhm(seconds=dashboard.uptime)
+            else:
+                _uptime = 'N/A'
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while converting seconds to dhm format: {e}")
+            _uptime = 'N/A'
+
+        status_color = "green" if dashboard.status == "Active" else "red"
+        version_color = "cyan"
+        epoch_color = "green"
+        uptime_color = "cyan"
+        workser_color = "green"
+
+        content = ""
+        content += f"[bold {status_color}]STATUS:[/bold {status_color}] [bold]{dashboard.status}[/bold]\n"
+        content += f"[bold {version_color}]VERSION:[/bold {version_color}] [bold]{dashboard.version}[/bold]\n"
+        content += f"[bold {epoch_color}]EPOCH:[/bold {epoch_color}] [bold]{dashboard.epoch}[/bold]\n"
+        content += f"[bold {uptime_color}]UPTIME:[/bold {uptime_color}] [bold]{_uptime}[/bold]\n"
+        content += f"[bold {workser_color}]WORKERS:[/bold {workser_color}] [bold]{dashboard.format_value(dashboard.workers_num)}[/bold]"
+
+        return Panel(content, expand=True, title=f"[bold]{panel.title}[/bold]", border_style=panel.color)
+
+    def create_graph_panel(self, panel: PanelSpec):
+        dashboard = self.dashboard
+        graph = dashboard.plot_series(panel.field)
+        return Panel(graph, expand=False, title=f"[bold][{panel.color}]{panel.title}{dashboard.view_label()}[/bold][/{panel.color}]", title_align="left", box=box.SIMPLE)
+
+    def create_throughput_panel(self, panel: PanelSpec):
+        dashboard = self.dashboard
+        rows = (
+            ("total_downloaded_checkpoints", "CHECKPOINTS", "cyan"),
+            ("confirmations_issued_total", "CONFIRMATIONS", "cyan"),
+            ("persisted_events", "PERSISTED EVENTS", "green"),
+            ("highest_finished_event", "FINISHED EVENTS", "green"),
+        )
+        table = Table.grid(padding=(0, 1), expand=True)
+        table.add_column()
+        table.add_column(justify="right")
+        table.add_column(justify="right")
+        table.add_row("", "[bold]NOW[/bold]", f"[bold]AVG {dashboard.rates.window:g}s[/bold]")
+        for field, label, color in rows:
+            table.add_row(
+                f"[bold {color}]{label}:[/bold {color}]",
+                dashboard.format_rate(dashboard.rates.rate(field)),
+                f"[bold]{dashboard.format_rate(dashboard.rates.smoothed(field))}[/bold]",
+            )
+        return Panel(table, expand=True, title=f"[bold]{panel.title}[/bold]", border_style=panel.color)
+
+    def create_catch_up_panel(self, panel: PanelSpec):
+        dashboard = self.dashboard
+        labels = {"checkpoint_downloader_lag": "CHECKPOINT LAG", "pending_events": "PENDING EVENTS"}
+        content = ""
+        for field in ETA_FIELDS:
+            backlog, eta_text, color = dashboard.catch_up_state(field)
+            content += f"[bold {color}]{labels[field]}:[/bold {color}] [bold]{backlog if backlog is not None else 'N/A'}[/bold] ({dashboard.format_rate(dashboard.rates.smoothed(field))})\n"
+            content += f"[bold {color}]ETA:[/bold {color}] [bold]{eta_text}[/bold]\n\n"
+        return Panel(content.rstrip(), expand=True, title=f"[bold]{panel.title}[/bold]", border_style=panel.color)
+
+    def create_latency_panel(self, panel: PanelSpec):
+        dashboard = self.dashboard
+        table = Table(box=box.SIMPLE_HEAD, expand=True, padding=(0, 1))
+        table.add_column("HISTOGRAM", style="bold cyan")
+        for column in ("OBSERVATIONS", "MEAN ms", "P50 ms", "P90 ms", "P99 ms"):
+            table.add_column(column, justify="right")
+        for title, window in dashboard.latency.items():
+            table.add_row(
+                title,
+                dashboard.format_rate(window.values["rate"]),
+                dashboard.format_ms(window.values["mean"]),
+                dashboard.format_ms(window.quantile(0.5)),
+                dashboard.format_ms(window.quantile(0.9)),
+                f"[bold]{dashboard.format_ms(window.quantile(0.99))}[/bold]",
+            )
+        return Panel(table, expand=True, title=f"[bold]{panel.title} (last {dashboard.rates.window:g}s)[/bold]", border_style=panel.color)
+
+    def create_stages_panel(self, panel: PanelSpec):
+        dashboard = self.dashboard
+        table = Table(box=box.SIMPLE_HEAD, expand=True, padding=(0, 1))
+        table.add_column("STAGE", style="bold cyan")
+        for column in ("CALLS", "ERRORS", "MEAN ms", "P50 ms", "P95 ms", "P99 ms", "MAX ms"):
+            table.add_column(column, justify="right")
+        for stage, histogram in dashboard.instrumentation.rows():
+            table.add_row(
+                stage,
+                str(histogram.count),
+                f"[red]{histogram.errors}[/red]" if histogram.errors else "0",
+                dashboard.format_ms(histogram.mean),
+                dashboard.format_ms(histogram.quantile(0.5)),
+                dashboard.format_ms(histogram.quantile(0.95)),
+                dashboard.format_ms(histogram.quantile(0.99)),
+                dashboard.format_ms(histogram.maximum),
+            )
+        return Panel(table, expand=True, title=f"[bold]{panel.title}[/bold]", border_style=panel.color)
+
+    def render_panels(self) -> int:
+        """Re-create the panels whose data sources changed since they were last rendered. Returns how many were updated."""
+        updated = 0
+        for (section, name), create_panel, sources in self.panels:
+            version = self.dashboard.data_version(*sources)
+            if self._rendered_versions.get(name) == version:
+                continue
+            self.layout[section][name].update(create_panel())
+            self._rendered_versions[name] = version
+            updated += 1
+        return updated
+
+    def open(self):
+        self.live = Live(
+            self.layout,
+            console=self.console,
+            refresh_per_second=self.dashboard.refresh_per_second,
+            auto_refresh=False,
+            screen=True,
+        )
+        self.live.__enter__()
+        if self.dashboard.instrumentation is not None:
+            self.dashboard.instrumentation.instrument(self.live, "refresh", "terminal write")
+
+    def close(self):
+        if self.live is not None:
+            self.live.__exit__(None, None, None)
+            self.live = None
+        self.console.clear()
+
+    def render(self) -> bool:
+        # log_renderable = self.dashboard.rich_logger.get_logs()
+        # log_panel = Panel(Text.from_ansi(log_renderable), expand=True, title="[bold]App Logs[/bold]", title_align="center", border_style="black")
+        # self.layout["logs"].update(log_panel)
+
+        console_size = self.console.size
+        if console_size != self._rendered_console_size:
+            self._rendered_console_size = console_size
+            self._rendered_versions.clear()
+
+        # Nothing changed since the previous frame, skip the terminal write entirely.
+        if not self.render_panels():
+            return False
+        self.live.refresh()
+        return True
@@ -0,0 +1,175 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Mapping, Optional
+
+from utils.logger import logger
+
+
+class RequestBudget:
+    """At most ``requests`` requests in any ``period`` seconds, shared by the pollers of one node."""
+
+    def __init__(self, requests: int, period: float = 60):
+        self.requests = requests
+        self.period = period
+        self._sent = deque(maxlen=requests)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait until a request fits in the budget and take it. Returns the seconds waited."""
+        async with self._lock:
+            waited = 0.0
+            if len(self._sent) == self.requests:
+                waited = max(0.0, self._sent[0] + self.period - time.monotonic())
+                if waited:
+                    await asyncio.sleep(waited)
+            self._sent.append(time.monotonic())
+            return waited
+
+
+class AdaptiveInterval:
+    """Poll interval following how fast the watched values move.
+
+    Any value changing by more than its tolerance since the previous sample
+    drops the interval to ``minimum``. Every quiet sample multiplies it by
+    ``growth``, up to ``maximum``.
+    """
+
+    __slots__ = ("minimum", "maximum", "growth", "tolerances", "interval", "_last")
+
+    def __init__(self, initial: float, minimum: float, maximum: float, tolerances: Mapping[str, float], growth: float = 1.5):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.growth = growth
+        self.tolerances = tolerances
+        self.interval = min(max(initial, self.minimum), self.maximum)
+        if self.interval != initial:
+            logger.warning(f"Poll interval {initial:g} s is outside {self.minimum:g}-{self.maximum:g} s, starting at {self.interval:g} s")
+        self._last: Optional[dict] = None
+
+    def moved(self, values: Mapping[str, Optional[float]]) -> bool:
+        if self._last is None:
+            return False
+        for field, tolerance in self.tolerances.items():
+            value, last = values.get(field), self._last.get(field)
+            if value is not None and last is not None and abs(value - last) > tolerance:
+                return True
+        return False
+
+    def update(self, values: Mapping[str, Optional[float]]) -> float:
+        if self.moved(values):
+            self.interval = self.minimum
+        elif self._last is not None:
+            self.interval = min(self.interval * self.growth, self.maximum)
+        self._last = {field: values.get(field) for field in self.tolerances}
+        return self.interval
+
+
+class SourcePoller:
+    """Polls one data source from its own asyncio task.
+
+    ``poll`` is awaited every ``interval`` seconds (randomized by +/- ``jitter``
+    as a fraction of the interval) and cancelled after ``timeout`` seconds.
+    It returns True on success. After a failure the next attempt is delayed
+    exponentially, up to ``max_backoff`` seconds. With a ``budget`` every poll
+    first waits for a free request in it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        poll: Callable[[], Awaitable[bool]],
+        interval: float,
+        jitter: float = 0.1,
+        timeout: Optional[float] = None,
+        max_backoff: float = 60,
+        budget: Optional[RequestBudget] = None,
+    ):
+        self.name = name
+        self.poll = poll
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.max_backoff = max(max_backoff, interval)
+        self.budget = budget
+
+        self.polls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.throttled = 0  # Polls delayed by the request budget
+        self.last_duration: Optional[float] = None
+        self.last_success: Optional[float] = None  # Wall clock time of the last successful poll
+        self.last_success_interval: Optional[float] = None  # Time between the two last successful polls
+        self._task: Optional[asyncio.Task] = None
+
+    def next_delay(self) -> float:
+        if self.consecutive_failures:
+            return min(self.interval * 2 ** self.consecutive_failures, self.max_backoff)
+        if self.jitter:
+            return max(0.0, self.interval * (1 + random.uniform(-self.jitter, self.jitter)))
+        return self.interval
+
+    async def run_once(self) -> bool:
+        started = time.perf_counter()
+        try:
+            success = bool(await asyncio.wait_for(self.poll(), timeout=self.timeout))
+        except asyncio.TimeoutError:
+            logger.error(f"{self.name} poll timed out after {self.timeout} s")
+            success = False
+        except Exception as e:
+            logger.error(f"An unexpected error occurred while polling {self.name}: {e}")
+            success = False
+        self.last_duration = time.perf_counter() - started
+        self.polls += 1
+
+        if success:
+            now = time.time()
+            if self.last_success is not None:
+                self.last_success_interval = now - self.last_success
+            self.last_success = now
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+        logger.debug(
+            f"{self.name} poll {'ok' if success else 'failed'} in {self.last_duration * 1000:.1f} ms "
+            f"(configured every {self.interval} s, measured {self._format_interval()}, next in {self.next_delay():.1f} s)"
+        )
+        return success
+
+    def _format_interval(self) -> str:
+        return f"{self.last_success_interval:.2f} s" if self.last_success_interval is not None else "N/A"
+
+    async def _run(self):
+        while True:
+            if self.budget is not None and await self.budget.acquire():
+                self.throttled += 1
+            started = time.perf_counter()
+            await self.run_once()
+            # The interval is measured start to start, a slow poll does not push the schedule back.
+            await asyncio.sleep(max(0.0, self.next_delay() - (time.perf_counter() - started)))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"poller-{self.name}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "polls": self.polls,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "last_success": self.last_success,
+            "last_success_interval": self.last_success_interval,
+            "last_duration": self.last_duration,
+        }
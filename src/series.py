@@ -0,0 +1,244 @@
+import bisect
+import math
+from array import array
+from typing import List, Mapping, Optional, Sequence, Tuple
+
+
+# Graph views and the time window each one shows, None is the last graph_size scrapes.
+GRAPH_VIEWS = {
+    "live": None,
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+NAN = float("nan")
+
+
+class RingBuffer:
+    """Fixed capacity ring of floats in one preallocated ``array('d')``."""
+
+    __slots__ = ("capacity", "_data", "_start", "_count")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float):
+        self._data[(self._start + self._count) % self.capacity] = value
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def to_array(self) -> array:
+        """Values oldest first, copied with at most two slices."""
+        end = self._start + self._count
+        if end <= self.capacity:
+            return self._data[self._start:end]
+        return self._data[self._start:] + self._data[:end - self.capacity]
+
+
+class RollupTier:
+    """Fixed-interval buckets keeping min, max and average.
+
+    The current bucket stays open until a sample of a later bucket arrives,
+    ``add`` then returns the closed bucket so it can feed a coarser tier.
+    """
+
+    __slots__ = ("interval", "timestamps", "mins", "maxs", "avgs", "_bucket", "_min", "_max", "_sum", "_count")
+
+    def __init__(self, interval: float, capacity: int):
+        self.interval = interval
+        self.timestamps = RingBuffer(capacity)
+        self.mins = RingBuffer(capacity)
+        self.maxs = RingBuffer(capacity)
+        self.avgs = RingBuffer(capacity)
+        self._bucket: Optional[float] = None
+        self._min = self._max = self._sum = 0.0
+        self._count = 0
+
+    def add(self, timestamp: float, minimum: float, maximum: float, total: float, count: int) -> Optional[tuple]:
+        bucket = timestamp - timestamp % self.interval
+        closed = None
+        if self._bucket is not None and bucket > self._bucket:
+            closed = self._close()
+        if self._bucket is None or bucket > self._bucket:
+            self._bucket, self._min, self._max, self._sum, self._count = bucket, minimum, maximum, total, count
+        elif bucket == self._bucket:
+            self._min = min(self._min, minimum)
+            self._max = max(self._max, maximum)
+            self._sum += total
+            self._count += count
+        return closed
+
+    def _close(self) -> tuple:
+        self.timestamps.append(self._bucket)
+        self.mins.append(self._min)
+        self.maxs.append(self._max)
+        self.avgs.append(self._sum / self._count)
+        return self._bucket, self._min, self._max, self._sum, self._count
+
+    def columns(self) -> Tuple[List[float], List[float], List[float], List[float]]:
+        """Closed buckets plus the open one: timestamps, averages, minimums and maximums."""
+        columns = (self.timestamps.to_array(), self.avgs.to_array(), self.mins.to_array(), self.maxs.to_array())
+        columns = tuple(column.tolist() for column in columns)
+        if self._count:
+            for column, value in zip(columns, (self._bucket, self._sum / self._count, self._min, self._max)):
+                column.append(value)
+        return columns
+
+
+class ColumnarRingBuffer:
+    """The last ``capacity`` rows of a shared timestamp column and one float column per series.
+
+    Columns are ``array('d')`` with ``capacity + slack`` slots written left to
+    right. When the end is reached the live rows are moved back to the front,
+    one slice copy per column every ``slack`` appends (an eighth of the
+    capacity by default), so the newest rows are always contiguous and
+    ``window`` returns memoryview slices without copying.
+    A missing value is stored as NaN, which asciichartpy draws as a gap.
+    """
+
+    __slots__ = ("names", "capacity", "slack", "_timestamps", "_columns", "_start", "_end")
+
+    def __init__(self, names: Sequence[str], capacity: int, slack: Optional[int] = None):
+        self.names = tuple(names)
+        self.capacity = capacity
+        self.slack = slack if slack is not None else max(capacity // 8, 16)
+        size = capacity + max(self.slack, 1)
+        self._timestamps = array("d", bytes(8 * size))
+        self._columns = {name: array("d", bytes(8 * size)) for name in self.names}
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def append(self, timestamp: float, values: Mapping[str, Optional[float]]):
+        if self._end == len(self._timestamps):
+            self._compact()
+        index = self._end
+        self._timestamps[index] = timestamp
+        for name, column in self._columns.items():
+            value = values.get(name)
+            column[index] = NAN if value is None else value
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def _compact(self):
+        count = self._end - self._start
+        for column in (self._timestamps, *self._columns.values()):
+            column[:count] = column[self._start:self._end]
+        self._start, self._end = 0, count
+
+    def _window_start(self, count: Optional[int]) -> int:
+        return self._start if count is None else max(self._start, self._end - count)
+
+    def window(self, name: str, count: Optional[int] = None) -> memoryview:
+        """The last ``count`` values of ``name``, oldest first. Only valid until the next ``append``."""
+        return memoryview(self._columns[name])[self._window_start(count):self._end]
+
+    def timestamps(self, count: Optional[int] = None) -> memoryview:
+        return memoryview(self._timestamps)[self._window_start(count):self._end]
+
+    def last(self, name: str) -> Optional[float]:
+        if self._end == self._start:
+            return None
+        value = self._columns[name][self._end - 1]
+        return None if math.isnan(value) else value
+
+
+class MultiResolutionSeries:
+    """Graph series at raw, 1 minute and 1 hour resolution.
+
+    Raw rows live in one ColumnarRingBuffer, each series also feeds its own
+    minute and hour rollups. Every tier is preallocated, so memory is fixed
+    up front whatever the uptime. A window is read from the finest tier that
+    still covers it.
+    """
+
+    def __init__(self, names: Sequence[str], raw_capacity: int, minute_capacity: int = 24 * 60, hour_capacity: int = 7 * 24):
+        self.names = tuple(names)
+        self.raw = ColumnarRingBuffer(self.names, raw_capacity)
+        self.minutes = {name: RollupTier(60, minute_capacity) for name in self.names}
+        self.hours = {name: RollupTier(3600, hour_capacity) for name in self.names}
+        self.version = 0  # Bumped on every appended row
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def append(self, timestamp: float, values: Mapping[str, Optional[float]]):
+        last = self.raw.timestamps(1)
+        if last and timestamp <= last[0]:
+            return
+        self.raw.append(timestamp, values)
+        for name in self.names:
+            value = values.get(name)
+            if value is None:
+                continue
+            closed = self.minutes[name].add(timestamp, value, value, value, 1)
+            if closed is not None:
+                self.hours[name].add(*closed)
+        self.version += 1
+
+    def last(self, name: str, count: int) -> memoryview:
+        return self.raw.window(name, count)
+
+    def window(self, name: str, seconds: float) -> Tuple[List[float], List[float], List[float], List[float]]:
+        """Timestamps, averages, minimums and maximums of ``name`` in the last ``seconds`` before the newest row."""
+        timestamps = self.raw.timestamps()
+        if not timestamps:
+            return [], [], [], []
+        start = timestamps[-1] - seconds
+        if timestamps[0] <= start or len(timestamps) < self.raw.capacity:
+            low = bisect.bisect_left(timestamps, start)
+            rows = [(timestamp, value) for timestamp, value in zip(timestamps[low:], self.raw.window(name)[low:]) if not math.isnan(value)]
+            values = [value for _, value in rows]
+            return [timestamp for timestamp, _ in rows], values, values, values
+        for tier in (self.minutes[name], self.hours[name]):
+            columns = tier.columns()
+            if columns[0] and (columns[0][0] <= start or tier is self.hours[name] or len(tier.timestamps) < tier.timestamps.capacity):
+                low = bisect.bisect_left(columns[0], start - tier.interval)
+                return tuple(column[low:] for column in columns)
+        return [], [], [], []
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[float]:
+    """Largest-Triangle-Three-Buckets: keep ``threshold`` points of ``ys`` that preserve the visual shape.
+
+    Peaks and dips survive, unlike with plain averaging or striding.
+    """
+    length = len(ys)
+    if threshold >= length or threshold < 3:
+        return list(ys)
+
+    sampled = [ys[0]]
+    every = (length - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle.
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, length)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        point_x, point_y = xs[selected], ys[selected]
+        best_area = -1.0
+        for index in range(start, end):
+            area = abs((point_x - avg_x) * (ys[index] - point_y) - (point_x - xs[index]) * (avg_y - point_y))
+            if area > best_area:
+                best_area = area
+                selected = index
+        sampled.append(ys[selected])
+    sampled.append(ys[-1])
+    return sampled
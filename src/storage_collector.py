@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+from src.aio_http_client import AioHttpCalls
+from src.catalog import SCALAR_METRICS
+from src.metrics_parser import MetricsLineFilter, MetricsSnapshot, StorageMetrics
+from src.node_health import NodeHealth
+from src.parse_executor import MetricsParseExecutor, ParseMode
+from src.loop_monitor import LoopLagMonitor
+from src.history_store import HistoryStore
+from src.instrumentation import Instrumentation
+from src.histograms import HistogramWindow
+from src.rates import RateEngine
+from src.series import GRAPH_VIEWS, MultiResolutionSeries
+from src.scheduler import AdaptiveInterval, RequestBudget, SourcePoller
+from utils.logger import logger
+
+
+# Snapshot fields kept as graph series.
+SERIES_FIELDS = tuple(metric.field for metric in SCALAR_METRICS if metric.graph)
+# Shown in place of a value the node does not present.
+MISSING_VALUES = {metric.field: metric.missing for metric in SCALAR_METRICS if metric.missing is not None}
+
+# Values whose movement speeds up the metrics poller, with the change between two scrapes
+# that still counts as stable. Pending events jitter a little even on a synced node.
+ADAPTIVE_FIELDS = {
+    "checkpoint_downloader_lag": 0,
+    "recover_blob_backlog_in_progress": 0,
+    "recover_blob_backlog_queued": 0,
+    "pending_events": 100,
+}
+
+# History records applied between two yields to the loop while pre-filling the series.
+HISTORY_BATCH = 500
+
+
+class StorageCollector:
+    """Polling and parsing pipeline of a single storage node, without any rendering.
+
+    StorageDashboard builds the TUI on top of it, the headless mode uses it as is.
+    """
+
+    def __init__(
+        self,
+        session: AioHttpCalls,
+        refresh_metrics_rate: int,
+        refresh_node_rpc_rate: int,
+        graph_size: int,
+        parse_mode: ParseMode = "inline",
+        history: Optional[HistoryStore] = None,
+        poll_jitter: float = 0.1,
+        poll_timeout: Optional[float] = 10,
+        poll_max_backoff: float = 60,
+        full_scrape: bool = False,
+        rate_window: float = 60,
+        instrumentation: Optional[Instrumentation] = None,
+        refresh_metrics_min: Optional[float] = None,
+        refresh_metrics_max: Optional[float] = None,
+        request_budget: Optional[int] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        self.session = session
+        self.full_scrape = full_scrape # Keep the whole /metrics body instead of streaming only the wanted series
+        self.clock = clock # Timestamps scrapes instead of the parse time, e.g. with the recorded time on replay
+        self.history = history
+        self.parser = MetricsParseExecutor(mode=parse_mode)
+        self.loop_monitor = LoopLagMonitor()
+        self.rates = RateEngine(window=rate_window)
+        self.latency = {title: HistogramWindow(window=rate_window) for title in StorageMetrics.LATENCY_HISTOGRAMS}
+
+        self.refresh_metrics_rate = refresh_metrics_rate
+        self.refresh_node_rpc_rate = refresh_node_rpc_rate
+        self.graph_size = graph_size
+
+        # The metrics interval follows ADAPTIVE_FIELDS between the two bounds, fixed when neither is given.
+        self.adaptive = None
+        if refresh_metrics_min is not None or refresh_metrics_max is not None:
+            self.adaptive = AdaptiveInterval(
+                refresh_metrics_rate,
+                minimum=refresh_metrics_min if refresh_metrics_min is not None else refresh_metrics_rate,
+                maximum=refresh_metrics_max if refresh_metrics_max is not None else refresh_metrics_rate,
+                tolerances=ADAPTIVE_FIELDS,
+            )
+        # Requests per minute to the node, shared by both pollers.
+        self.budget = RequestBudget(request_budget, 60) if request_budget else None
+
+        # Each source runs on its own schedule, a slow /v1/health call never delays metrics or rendering.
+        self.pollers = {
+            "metrics": SourcePoller(
+                "metrics", self.update_metrics, self.adaptive.interval if self.adaptive else refresh_metrics_rate,
+                jitter=poll_jitter, timeout=poll_timeout, max_backoff=poll_max_backoff, budget=self.budget,
+            ),
+            "status": SourcePoller(
+                "status", self.update_node_status, refresh_node_rpc_rate,
+                jitter=poll_jitter, timeout=poll_timeout, max_backoff=poll_max_backoff, budget=self.budget,
+            ),
+        }
+
+        # Bumped every time new data of that source is applied, consumers compare versions to detect changes.
+        self._data_versions = {"metrics": 0, "status": 0}
+        self.data_changed = asyncio.Event() # Set with every bumped version, wakes the render loop right away
+
+        self.snapshot = None
+        self._snapshot_scraped_at = None
+
+        # One row per scrape. The live graphs read the last graph_size rows, raw rows cover
+        # the last hour and longer views are read from the rollups.
+        fastest = self.adaptive.minimum if self.adaptive else refresh_metrics_rate
+        raw_capacity = max(self.graph_size, int(3600 / max(fastest, 1)) + 1)
+        self.series = MultiResolutionSeries(SERIES_FIELDS, raw_capacity)
+
+        self.health: Optional[NodeHealth] = None  # Last /v1/health response, the fields below are its display strings
+        self.status = 'N/A'
+        self.epoch = 'N/A'
+        self.shards_owned = 'N/A'
+        self.shards_ready = 'N/A'
+        self.shards_inTransfer = 'N/A'
+        self.shards_inRecovery = 'N/A'
+        self.shards_unknown = 'N/A'
+
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            self.instrument_stages(instrumentation)
+
+        # Last value of every catalog metric, e.g. self.checkpoint_downloader_lag. None until presented.
+        for metric in SCALAR_METRICS:
+            setattr(self, metric.field, metric.missing)
+
+    async def update_node_status(self) -> bool:
+
+        try:
+            health = await self.session.get_storage_status()
+            if health:
+                logger.info(f"Fetched node status. Parsing ...")
+                self.apply_health(health)
+                return True
+            else:
+                logger.error(f"Failed to update node status")
+
+        except Exception as e:
+            logger.error(f"An error occurred while updating node status {e}")
+        return False
+
+    async def update_metrics(self) -> bool:
+        try:
+            scraped_at = asyncio.get_running_loop().time()
+            line_filter = None if self.full_scrape else MetricsLineFilter(StorageMetrics.SCRAPE_NAMES)
+            metrics = await self.session.get_storage_metrics(line_filter=line_filter)
+            if metrics:
+                logger.info(f"Fetched node metrics. Parsing ...")
+                snapshot = await self.parser.parse(metrics)
+                if self.clock is not None:
+                    snapshot.timestamp = self.clock()
+                self.apply_snapshot(snapshot)
+                self._snapshot_scraped_at = scraped_at
+                loop_block = f"{self.parser.last_loop_block * 1000:.1f} ms" if self.parser.last_loop_block is not None else "off-loop"
+                logger.debug(
+                    f"Parsed metrics in {self.parser.last_parse_duration * 1000:.1f} ms ({self.parser.mode}, loop blocked: {loop_block}, "
+                    f"max loop lag since last scrape: {self.loop_monitor.reset_max() * 1000:.1f} ms)"
+                )
+                return True
+
+            else:
+                logger.error(f"Failed to update node metrics")
+
+        except Exception as e:
+            logger.error(f"An error occurred while updating node metrics: {e}")
+        return False
+
+    def apply_health(self, health: NodeHealth):
+        self.health = health
+        self.status = health.status
+        self.epoch = str(health.epoch)
+        self.shards_owned = str(health.shards_owned)
+        self.shards_ready = str(health.shards_ready)
+        self.shards_inTransfer = str(health.shards_in_transfer)
+        self.shards_inRecovery = str(health.shards_in_recovery)
+        self.shards_unknown = str(health.shards_unknown)
+        self.bump_version("status")
+
+    def apply_snapshot(self, snapshot: MetricsSnapshot):
+        # Runs synchronously on the loop, so the render loop never sees a half applied scrape.
+        self.snapshot = snapshot
+        self.bump_version("metrics")
+        if self.history is not None:
+            self.history.append(snapshot)
+        self.rates.update(snapshot.timestamp, snapshot.to_dict())
+        histograms = snapshot.histograms or {}
+        for title, name in StorageMetrics.LATENCY_HISTOGRAMS.items():
+            self.latency[title].update(snapshot.timestamp, histograms.get(name))
+
+        for metric in SCALAR_METRICS:
+            value = getattr(snapshot, metric.field)
+            if value is None:
+                if metric.warn:
+                    logger.warning(f"{metric.describe()} not presented" + (f". Setting {metric.missing}" if metric.missing is not None else ""))
+                if metric.missing is None:
+                    continue  # The last presented value stays on screen
+                value = metric.missing
+            setattr(self, metric.field, value)
+
+        self.series.append(snapshot.timestamp, self.fill_missing({field: getattr(snapshot, field) for field in SERIES_FIELDS}))
+
+        if self.adaptive is not None:
+            poller = self.pollers["metrics"]
+            interval = self.adaptive.update({field: getattr(snapshot, field) for field in ADAPTIVE_FIELDS})
+            if interval != poller.interval:
+                logger.debug(f"Metrics poll interval {poller.interval:.1f} s -> {interval:.1f} s")
+                poller.interval = interval
+
+    def status_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "epoch": self.epoch,
+            "shards_owned": self.shards_owned,
+            "shards_ready": self.shards_ready,
+            "shards_in_transfer": self.shards_inTransfer,
+            "shards_in_recovery": self.shards_inRecovery,
+            "shards_unknown": self.shards_unknown,
+        }
+
+    @staticmethod
+    def fill_missing(values: dict) -> dict:
+        for field, missing in MISSING_VALUES.items():
+            if field in values and values[field] is None:
+                values[field] = missing
+        return values
+
+    async def load_history(self):
+        """Pre-fill the graph series with the on-disk history of the longest graph view.
+
+        Segments are read and decoded in a worker thread and the records are
+        applied in batches, so the loop keeps rendering and serving meanwhile.
+        """
+        if self.history is None:
+            return
+        now = time.time()
+        start = now - max(seconds or 0 for seconds in GRAPH_VIEWS.values())
+        records = await asyncio.to_thread(lambda: list(self.history.query(start, now + 1)))
+        for offset in range(0, len(records), HISTORY_BATCH):
+            for timestamp, values in records[offset:offset + HISTORY_BATCH]:
+                self.apply_history_record(timestamp, values)
+            await asyncio.sleep(0)
+        if records:
+            logger.info(f"Loaded {len(records)} history records from {self.history.directory}")
+            self.bump_version("metrics")
+
+    def apply_history_record(self, timestamp: float, values: dict):
+        """A past scrape read back from history: it only feeds the graph series and rates."""
+        self.rates.update(timestamp, values)
+        self.series.append(timestamp, self.fill_missing(values))
+
+    def instrument_stages(self, instrumentation: Instrumentation):
+        instrumentation.instrument(self.session, "get_storage_metrics", "fetch metrics")
+        instrumentation.instrument(self.session, "get_storage_status", "fetch status")
+        instrumentation.instrument(self.parser, "parse", "parse")
+        instrumentation.instrument(self, "apply_snapshot", "apply")
+        instrumentation.add_counters("http", self.session.stats)
+        instrumentation.add_counters("pollers", self.poller_stats)
+
+    def bump_version(self, source: str):
+        self._data_versions[source] += 1
+        self.data_changed.set()
+
+    def data_version(self, *sources: str) -> tuple:
+        """Versions of the given data sources, changes whenever one of them got new data."""
+        return tuple(self._data_versions[source] for source in sources)
+
+    def poller_stats(self) -> dict:
+        return {name: poller.stats() for name, poller in self.pollers.items()}
+
+    async def start_after_history(self):
+        """Start the pollers once the history is loaded, so live scrapes are appended after it."""
+        await self.load_history()
+        self.start_services()
+
+    def start_services(self):
+        # Only the per-scrape debug line reads the lag, so below DEBUG the monitor would wake the
+        # loop 20 times a second for nobody (headless, daemon and ANSI runs on small boxes).
+        if logger.isEnabledFor(logging.DEBUG):
+            self.loop_monitor.start()
+        if self.history is not None:
+            self.history.start()
+        for poller in self.pollers.values():
+            poller.start()
+
+    async def stop_services(self):
+        for poller in self.pollers.values():
+            await poller.stop()
+        await self.loop_monitor.stop()
+        if self.history is not None:
+            await self.history.close()
+        self.parser.close()
@@ -0,0 +1,93 @@
+import asyncio
+import os
+
+from src.capture import DELTA, FRAME, FULL, KINDS, MAX_MATCHED_LINES, CaptureReader, CaptureWriter, apply_delta, line_delta
+
+URLS = {"metrics": "http://127.0.0.1:9184/metrics", "rpc": "https://127.0.0.1:9185"}
+
+
+def lines(*values) -> list:
+    return [f"metric_{index} {value}\n".encode() for index, value in enumerate(values)]
+
+
+def body(tick: int, count: int = 50) -> bytes:
+    return b"# HELP walrus metrics\n" + b"".join(f"walrus_metric_{index} {tick if index % 7 == 0 else index}\n".encode() for index in range(count))
+
+
+def record(path: str, frames) -> CaptureWriter:
+    """Write ``(timestamp, kind, body)`` frames as one recording session."""
+    writer = CaptureWriter(path, urls=URLS)
+    writer._pending = [(timestamp, KINDS.index(kind), data) for timestamp, kind, data in frames]
+    asyncio.run(writer.flush())
+    return writer
+
+
+def test_line_delta_round_trip():
+    previous = lines(*range(20))
+    cases = [
+        previous,  # Unchanged
+        lines(*range(10), 99, *range(11, 20)),  # One value changed
+        previous[:5] + [b"new_metric 1\n"] + previous[5:],  # Line added
+        previous[:5] + previous[8:],  # Lines removed
+        [],  # Everything removed
+        lines(*range(100, 140)),  # Everything different
+    ]
+    for lines_now in cases:
+        assert apply_delta(previous, line_delta(previous, lines_now)) == lines_now
+    assert line_delta(previous, previous) == b""
+
+
+def test_large_change_is_one_replaced_block():
+    previous = lines(*range(MAX_MATCHED_LINES))
+    now = lines(*range(1, MAX_MATCHED_LINES + 1))[::-1] + previous[-1:]
+    assert apply_delta(previous, line_delta(previous, now)) == now
+
+
+def test_capture_round_trip_with_deltas(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    frames = []
+    for tick in range(5):
+        frames.append((1000.0 + tick * 2, "metrics", body(tick)))
+        frames.append((1000.5 + tick * 2, "status", b'{"epoch": %d}' % tick))
+    record(path, frames)
+
+    reader = CaptureReader(path)
+    assert reader.urls == URLS
+    assert list(reader) == frames
+    assert [data for _, _, data, _ in reader.frames("status")] == [data for _, kind, data in frames if kind == "status"]
+
+    with open(path, "rb") as capture_file:
+        capture_file.seek(reader.data_offset)
+        encodings = []
+        while True:
+            head = capture_file.read(FRAME.size)
+            if not head:
+                break
+            _, _, encoding, size = FRAME.unpack(head)
+            encodings.append(encoding)
+            capture_file.seek(size, os.SEEK_CUR)
+    # After the first body, metrics are stored as line deltas. The status bodies are too short to gain from it.
+    assert encodings[0::2] == [FULL] + [DELTA] * 4
+    assert encodings[1::2] == [FULL] * 5
+
+
+def test_appended_session_skips_the_gap(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    record(path, [(1000.0, "metrics", body(0)), (1002.0, "metrics", body(1))])
+    record(path, [(5000.0, "metrics", body(2)), (5002.0, "metrics", body(3))])
+
+    frames = list(CaptureReader(path).frames("metrics"))
+    assert [data for _, _, data, _ in frames] == [body(tick) for tick in range(4)]
+    assert [paused for _, _, _, paused in frames] == [0.0, 0.0, 3998.0, 3998.0]
+
+
+def test_truncated_tail_keeps_whole_frames(tmp_path):
+    path = str(tmp_path / "capture.bin")
+    frames = [(1000.0 + tick, "metrics", body(tick)) for tick in range(3)]
+    record(path, frames)
+    size = os.path.getsize(path)
+
+    for cut in (1, FRAME.size + 1, FRAME.size - 1):
+        with open(path, "r+b") as capture_file:
+            capture_file.truncate(size - cut)
+        assert list(CaptureReader(path)) == frames[:2]
@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import pytest
+
+from src.catalog import HISTOGRAM_METRICS, SCALAR_METRICS
+from src.collector_daemon import (
+    HELLO,
+    HISTORY,
+    MAGIC,
+    SNAPSHOT,
+    DaemonSubscriber,
+    decode_history,
+    decode_snapshot,
+    encode_history_record,
+    encode_snapshot,
+    frame,
+    layout,
+)
+from src.history_store import HISTORY_FIELDS
+from src.metrics_parser import MetricsSnapshot
+
+
+def snapshot(timestamp: float, tick: int, bounds=(0.1, 0.5, 1.0)) -> MetricsSnapshot:
+    values = {}
+    numeric = [metric.field for metric in SCALAR_METRICS if metric.numeric]
+    for index, metric in enumerate(SCALAR_METRICS):
+        if metric.numeric:
+            # The first one is not presented by the node, every other one changes between scrapes
+            values[metric.field] = None if metric.field == numeric[0] else index * 1000 + (tick if index % 2 else 0)
+        else:
+            values[metric.field] = None if tick % 2 and metric.field != SCALAR_METRICS[0].field else f"v{tick}"
+    histograms = {
+        metric.name: {"bounds": list(bounds), "counts": [float(tick), tick * 2.0, tick * 3.0], "sum": tick * 0.5, "count": tick * 4.0}
+        for metric in HISTOGRAM_METRICS[:1]
+    }
+    return MetricsSnapshot(timestamp=timestamp, parse_duration=0.002 if tick else None, histograms=histograms, **values)
+
+
+class RecordingCollector:
+    """Stands in for the dashboard a DaemonSubscriber feeds."""
+
+    def __init__(self):
+        self.snapshots = []
+        self.history = []
+
+    def apply_snapshot(self, item: MetricsSnapshot):
+        self.snapshots.append(item)
+
+    def apply_history_record(self, timestamp: float, values: dict):
+        self.history.append((timestamp, values))
+
+    def apply_health(self, health):
+        pass
+
+    def bump_version(self, source: str):
+        pass
+
+
+def test_snapshot_round_trip_full_and_delta():
+    first, second = snapshot(1000.0, 1), snapshot(1002.0, 2)
+    third = snapshot(1004.0, 3, bounds=(0.2, 0.5, 2.0))
+    third.histograms = {}
+
+    decoded_first = decode_snapshot(encode_snapshot(first))
+    assert decoded_first.to_dict() == first.to_dict()
+
+    delta = encode_snapshot(second, first)
+    assert len(delta) < len(encode_snapshot(second))
+    decoded_second = decode_snapshot(delta, decoded_first)
+    assert decoded_second.to_dict() == second.to_dict()
+
+    assert decode_snapshot(encode_snapshot(third, second), decoded_second).to_dict() == third.to_dict()
+
+
+def test_changed_histogram_bounds_are_sent():
+    first, second = snapshot(1000.0, 1), snapshot(1002.0, 2, bounds=(0.2, 0.5, 2.0))
+    decoded = decode_snapshot(encode_snapshot(second, first), decode_snapshot(encode_snapshot(first)))
+    assert decoded.histograms == second.histograms
+
+
+def test_history_records_round_trip():
+    records = [(1000.0 + index, {field: None if position == index % len(HISTORY_FIELDS) else index * 10 + position for position, field in enumerate(HISTORY_FIELDS)}) for index in range(5)]
+    payload = b"".join(encode_history_record(timestamp, values) for timestamp, values in records)
+    assert list(decode_history(payload)) == records
+
+
+def catch_up_stream(snapshots) -> bytes:
+    frames = [frame(HELLO, MAGIC + json.dumps(layout()).encode())]
+    frames.append(frame(HISTORY, encode_history_record(990.0, {field: 1 for field in HISTORY_FIELDS})))
+    previous = None
+    for item in snapshots:
+        frames.append(frame(SNAPSHOT, encode_snapshot(item, previous)))
+        previous = item
+    return b"".join(frames)
+
+
+def receive(data: bytes) -> RecordingCollector:
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        await subscriber.receive(reader)
+
+    collector = RecordingCollector()
+    subscriber = DaemonSubscriber(collector, "unused.sock")
+    with pytest.raises(asyncio.IncompleteReadError):
+        asyncio.run(run())
+    return collector
+
+
+def test_subscriber_reads_the_catch_up_stream():
+    snapshots = [snapshot(1000.0 + tick * 2, tick) for tick in range(4)]
+    collector = receive(catch_up_stream(snapshots))
+    assert [timestamp for timestamp, _ in collector.history] == [990.0]
+    assert [item.to_dict() for item in collector.snapshots] == [item.to_dict() for item in snapshots]
+
+
+def test_truncated_stream_applies_whole_frames_only():
+    snapshots = [snapshot(1000.0 + tick * 2, tick) for tick in range(4)]
+    data = catch_up_stream(snapshots)
+    last = frame(SNAPSHOT, encode_snapshot(snapshots[-1], snapshots[-2]))
+    for cut in (1, len(last) - 1):
+        collector = receive(data[:-cut])
+        assert [item.to_dict() for item in collector.snapshots] == [item.to_dict() for item in snapshots[:-1]]
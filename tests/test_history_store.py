@@ -0,0 +1,69 @@
+import asyncio
+import os
+
+from src.history_store import HEADER_SIZE, HISTORY_FIELDS, HistoryStore
+from src.metrics_parser import MetricsSnapshot
+
+START = 1_700_000_000.0  # 2023-11-14 22:13:20 UTC
+
+
+def snapshot(timestamp: float, value: int) -> MetricsSnapshot:
+    values = {field: value + index for index, field in enumerate(HISTORY_FIELDS)}
+    values[HISTORY_FIELDS[-1]] = None  # Not presented by the node
+    return MetricsSnapshot(timestamp=timestamp, **values)
+
+
+def write(store: HistoryStore, snapshots):
+    for item in snapshots:
+        store.append(item)
+    asyncio.run(store.flush())
+
+
+def test_append_query_round_trip(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    write(store, [snapshot(START + index * 2, index) for index in range(10)])
+
+    records = list(store.query(START + 4, START + 10))
+
+    assert [timestamp for timestamp, _ in records] == [START + 4, START + 6, START + 8]
+    timestamp, values = records[0]
+    assert values[HISTORY_FIELDS[0]] == 2
+    assert values[HISTORY_FIELDS[-1]] is None
+    assert [timestamp for timestamp, _ in store.tail(2)] == [START + 16, START + 18]
+
+
+def test_query_spans_day_segments(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    write(store, [snapshot(START + index * 3600, index) for index in range(10)])
+
+    assert len(store.segment_days()) == 2
+    assert len(list(store.query(START, START + 10 * 3600))) == 10
+    assert [values[HISTORY_FIELDS[0]] for _, values in store.tail(5)] == [5, 6, 7, 8, 9]
+
+
+def test_partial_trailing_record_is_ignored_and_dropped(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    write(store, [snapshot(START + index, index) for index in range(3)])
+    path = store.segment(store._day(START)).path
+    with open(path, "ab") as segment_file:
+        segment_file.write(b"\x01" * (store.record.size // 2))
+
+    assert len(list(store.query(START, START + 10))) == 3
+
+    # A new process appends behind the whole records, not behind the partial one.
+    write(HistoryStore(str(tmp_path)), [snapshot(START + 3, 3)])
+    records = list(HistoryStore(str(tmp_path)).query(START, START + 10))
+    assert [timestamp for timestamp, _ in records] == [START, START + 1, START + 2, START + 3]
+    assert records[-1][1][HISTORY_FIELDS[0]] == 3
+    assert os.path.getsize(path) == HEADER_SIZE + 4 * store.record.size
+
+
+def test_partial_header_starts_the_segment_over(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    path = store.segment(store._day(START)).path
+    with open(path, "wb") as segment_file:
+        segment_file.write(b"RWHI")
+
+    assert list(store.query(START, START + 10)) == []
+    write(store, [snapshot(START, 7)])
+    assert [values[HISTORY_FIELDS[0]] for _, values in store.query(START, START + 10)] == [7]
@@ -41,6 +41,24 @@ def parse_args():
         default=50,
     )
 
+    parser.add_argument(
+        "--graph-view",
+        type=str,
+        choices=["live", "minute", "hour", "day"],
+        help="Time window of the graphs: the last graph-size scrapes (live) or the last minute/hour/day. Send SIGUSR1 to cycle while running",
+        required=False,
+        default="live",
+    )
+
+    parser.add_argument(
+        "--renderer",
+        type=str,
+        choices=["rich", "ansi"],
+        help="Terminal backend of the dashboard: rich, or plain ANSI escape sequences that redraw only changed lines, for low-power boxes and slow SSH links",
+        required=False,
+        default="rich",
+    )
+
     parser.add_argument(
         "--storage-metrics-url",
         type=str,
@@ -60,11 +78,25 @@ def parse_args():
     parser.add_argument(
         "--storage-refresh-metrics-rate",
         type=float,
-        help="Refresh metrics every N second",
+        help="Refresh metrics every N second. With --storage-refresh-metrics-min or --storage-refresh-metrics-max it is only the starting interval",
         required=False,
         default=2,
     )
 
+    parser.add_argument(
+        "--storage-refresh-metrics-min",
+        type=float,
+        help="Adapt the metrics refresh interval: while checkpoint lag, blob recovery backlog or pending events move, refresh as often as every N second. Defaults to the refresh rate when only the maximum is set",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--storage-refresh-metrics-max",
+        type=float,
+        help="Adapt the metrics refresh interval: while those values are stable, slow refreshes down gradually to every N second. Defaults to the refresh rate when only the minimum is set",
+        required=False,
+    )
+
     parser.add_argument(
         "--storage-refresh-rpc-rate",
         type=float,
@@ -73,6 +105,169 @@ def parse_args():
         default=20,
     )
 
+    parser.add_argument(
+        "--storage-poll-jitter",
+        type=float,
+        help="Randomize every poll interval by up to this fraction, e.g. 0.1 = +/-10%%",
+        required=False,
+        default=0.1,
+    )
+
+    parser.add_argument(
+        "--storage-poll-timeout",
+        type=float,
+        help="Cancel a metrics or rpc poll that takes longer than N second",
+        required=False,
+        default=10,
+    )
+
+    parser.add_argument(
+        "--storage-poll-max-backoff",
+        type=float,
+        help="After failed polls, retry with exponential backoff up to N second",
+        required=False,
+        default=60,
+    )
+
+    parser.add_argument(
+        "--storage-request-budget",
+        type=int,
+        help="Send at most N requests per minute to the node, /metrics and /v1/health together. If not provided, requests are not limited",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--storage-full-scrape",
+        action="store_true",
+        help="Download and keep the whole /metrics body instead of streaming only the series the dashboard uses",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--parse-mode",
+        type=str,
+        choices=["inline", "thread", "process"],
+        help="Where to parse scraped metrics: on the event loop (inline) or in a thread/process pool so large payloads do not stall rendering",
+        required=False,
+        default="inline",
+    )
+
+    parser.add_argument(
+        "--rate-window",
+        type=float,
+        help="Time constant in seconds of the smoothed rates and catch-up ETAs",
+        required=False,
+        default=60,
+    )
+
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Run only the polling loop without the TUI and write every parsed snapshot as newline-delimited JSON",
+    )
+
+    parser.add_argument(
+        "--headless-output",
+        type=str,
+        help="File to append headless JSON lines to. If not provided, snapshots are written to stdout",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--serve-socket",
+        type=str,
+        help="Run as the collector daemon: poll and parse the node once and stream the snapshots to every dashboard started with --connect on this Unix socket",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--connect",
+        type=str,
+        help="Show the snapshots of a collector daemon listening on this Unix socket instead of polling the node",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--history-dir",
+        type=str,
+        help="Directory for the on-disk metrics history. Graphs are pre-filled from it on startup. If not provided, history is not stored",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--history-flush-interval",
+        type=float,
+        help="Write buffered history records to disk every N second",
+        required=False,
+        default=10,
+    )
+
+    parser.add_argument(
+        "--exporter-port",
+        type=int,
+        help="Serve the curated node metrics and derived rates for Prometheus on this port. Disabled if not provided",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--exporter-host",
+        type=str,
+        help="Address the metrics exporter listens on",
+        required=False,
+        default="127.0.0.1",
+    )
+
+    parser.add_argument(
+        "--instrument",
+        action="store_true",
+        help="Time the fetch, parse and render stages and show latency percentiles in a debug panel",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--instrument-output",
+        type=str,
+        help="Write the stage timings and counters as JSON to this file on exit. Implies --instrument",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--record",
+        type=str,
+        help="Append every raw /metrics and /v1/health response with its time to this compressed capture file, for review with --replay. Implies --storage-full-scrape",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--replay",
+        type=str,
+        help="Feed the dashboard (or headless collector) from a capture file written with --record instead of the node",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        help="Replay at N times the recorded pace, 0 = as fast as possible",
+        required=False,
+        default=1,
+    )
+
+    parser.add_argument(
+        "--fleet-file",
+        type=str,
+        help="Monitor many storage nodes at once. Path to a file with one 'name metrics_url rpc_url' line per node",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--fleet-concurrency",
+        type=int,
+        help="Max simultaneous requests to fleet nodes",
+        required=False,
+        default=32,
+    )
+
 
 
     args = parser.parse_args()
@@ -80,4 +275,19 @@ def parse_args():
     return args
 
 
-args = parse_args()
\ No newline at end of file
+_args = None
+
+
+def get_args() -> argparse.Namespace:
+    """Command line arguments, parsed on first use instead of at import time."""
+    global _args
+    if _args is None:
+        _args = parse_args()
+    return _args
+
+
+def __getattr__(name: str):
+    # Keeps `from utils.args import args` working, argv is only parsed when something asks for it.
+    if name == "args":
+        return get_args()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,13 +2,20 @@ import logging
 from collections import deque
 
 class RichPanelLogHandler(logging.Handler):
+    """Keeps the last ``max_logs`` records for the log panel.
+
+    Records are stored as they come and only formatted (colorlog escapes
+    included) when the panel asks for them with get_logs.
+    """
+
     def __init__(self, max_logs=8):
         super().__init__()
-        self.log_lines = deque(maxlen=max_logs)
+        self.log_records = deque(maxlen=max_logs)
 
     def emit(self, record):
-        log_entry = self.format(record).strip()
-        self.log_lines.append(log_entry)
+        self.log_records.append(record)
 
     def get_logs(self):
-        return "\n".join(self.log_lines)
\ No newline at end of file
+        with self.lock:
+            records = list(self.log_records)
+        return "\n".join(self.format(record).strip() for record in records)
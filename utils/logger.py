@@ -1,7 +1,82 @@
+import atexit
 import logging
 import os
+import queue
+import time
+from collections import OrderedDict
 from logging.config import dictConfig
-from utils.args import args
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+# Records waiting for the writer thread. When it falls behind, new records are dropped and counted.
+LOG_QUEUE_SIZE = 10000
+# A warning with the same text is let through at most once per this many seconds.
+REPEAT_INTERVAL = 60
+# Warning texts remembered by RepeatFilter, the least recently seen is forgotten first.
+REPEAT_ENTRIES = 1024
+
+
+class RepeatFilter(logging.Filter):
+    """Lets a WARNING with a given text through once per ``interval``, counting the suppressed repeats.
+
+    The count is appended to the next occurrence that passes, so the log
+    still shows how often e.g. a missing metric was seen. Errors always pass.
+    Only the ``max_entries`` most recently seen texts are remembered, so
+    warnings with changing values in their text cannot grow it without end.
+    """
+
+    def __init__(self, interval: float = REPEAT_INTERVAL, max_entries: int = REPEAT_ENTRIES):
+        super().__init__()
+        self.interval = interval
+        self.max_entries = max_entries
+        self.seen: "OrderedDict[str, list]" = OrderedDict()  # text -> [last passed, suppressed since]
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.WARNING:
+            return True
+        key = str(record.msg)
+        now = time.monotonic()
+        entry = self.seen.get(key)
+        if entry is None:
+            self.seen[key] = [now, 0]
+            if len(self.seen) > self.max_entries:
+                self.seen.popitem(last=False)
+            return True
+        self.seen.move_to_end(key)
+        if now - entry[0] < self.interval:
+            entry[1] += 1
+            self.suppressed += 1
+            return False
+        if entry[1]:
+            record.msg = f"{record.msg} ({entry[1]} repeats suppressed)"
+        entry[0], entry[1] = now, 0
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread without blocking the event loop: a full queue drops the record.
+
+    Records are passed on unformatted, the handlers behind the listener
+    format them in the writer thread, or only when displayed.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[QueueListener] = None
 
 def set_up_logger(log_lvl: str, log_path: str) -> logging.Logger:
     logging_config = {
@@ -69,7 +144,58 @@ def set_up_logger(log_lvl: str, log_path: str) -> logging.Logger:
     dictConfig(logging_config)
     logger = logging.getLogger()
 
+    # The configured handlers move behind a queue, file writes and formatting happen in the listener thread.
+    global _queue_handler, _listener
+    stop_logger()
+    handlers = list(logger.handlers)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(RepeatFilter())
+    logger.addHandler(_queue_handler)
+    _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logger)
+
     return logger
 
 
-logger = set_up_logger(log_lvl=args.logs_lvl, log_path=args.logs_path)
\ No newline at end of file
+def stop_logger():
+    """Write out the queued records and stop the writer thread. Safe to call more than once.
+
+    The handlers go back on the root logger, so records logged during
+    shutdown are still written, synchronously.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    logger.removeHandler(_queue_handler)
+    for handler in _listener.handlers:
+        logger.addHandler(handler)
+    _listener = None
+    if _queue_handler.dropped:
+        logger.warning(f"Log queue was full, {_queue_handler.dropped} records were dropped")
+
+
+def log_handlers() -> List[logging.Handler]:
+    """The handlers records end up in, behind the queue once set_up_logger ran."""
+    if _listener is not None:
+        return list(_listener.handlers)
+    return [handler for handler in logger.handlers if not isinstance(handler, QueueHandler)]
+
+
+def log_stats() -> dict:
+    if _queue_handler is None:
+        return {}
+    repeat_filter = next(item for item in _queue_handler.filters if isinstance(item, RepeatFilter))
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "repeats_suppressed": repeat_filter.suppressed,
+    }
+
+
+# The root logger, configured by set_up_logger once the command line was parsed (see main.py).
+# Importing this module neither parses argv nor loads the handlers.
+logger = logging.getLogger()